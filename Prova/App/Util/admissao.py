@@ -0,0 +1,212 @@
+import asyncio
+import math
+import os
+import threading
+import time
+
+import Util.config as config
+import Util.servidor as servidor
+from Util.metricas import ADMISSAO_ATIVAS, ADMISSAO_FILA, ADMISSAO_REJEICOES
+
+# Parcela das threads de cada worker que cada classe ocupa no máximo, contando
+# a fila: no gthread uma requisição na fila segura a sua thread enquanto espera
+PARCELAS = {'leitura': 0.5, 'escrita': 1.0, 'exportacao': 0.2}
+# Variáveis que fixam o limite de uma classe no lugar da divisão das threads
+VARIAVEIS = {'leitura': 'ADMISSAO_LEITURAS', 'escrita': 'ADMISSAO_ESCRITAS', 'exportacao': 'ADMISSAO_EXPORTACOES'}
+# Variáveis equivalentes do modo ASGI, que não depende das threads do gthread
+VARIAVEIS_ASYNC = {'leitura': 'ADMISSAO_ASYNC_LEITURAS', 'escrita': 'ADMISSAO_ASYNC_ESCRITAS',
+                   'exportacao': 'ADMISSAO_ASYNC_EXPORTACOES'}
+# No ASGI uma requisição na fila não segura thread: a fila de cada classe tem
+# esta quantidade de lugares por vaga
+FILA_POR_VAGA_ASYNC = 4
+# Quanto tempo cada requisição espera vaga na fila, no máximo
+ESPERA = float(os.getenv('ADMISSAO_ESPERA', 1.0))
+
+
+def dividir(threads, parcelas=PARCELAS):
+    """
+    Limit and queue of each endpoint class for `threads` request threads per
+    worker. Each class gets its share of the threads for in-flight and queued
+    requests together (a quarter of it as queue), so with 4 threads or more
+    leitura and exportacao never hold every thread and escrita always finds
+    one free.
+    :return: dict classe -> (limite, fila)
+    """
+    divisao = {}
+    for nome, parcela in parcelas.items():
+        total = max(1, int(threads * parcela))
+        fila = total // 4
+        divisao[nome] = (total - fila, fila)
+    return divisao
+
+
+def dividir_async(conexoes, parcelas=PARCELAS, fila_por_vaga=FILA_POR_VAGA_ASYNC):
+    """
+    Limit and queue of each endpoint class for the ASGI app, whose in-flight
+    requests hold connections of the asyncpg pool rather than threads. Each
+    class runs at most its share of the `conexoes` connections, so leitura
+    and exportacao leave connections free for escrita; waiting costs no thread,
+    so the queue is `fila_por_vaga` places per slot.
+    :return: dict classe -> (limite, fila)
+    """
+    divisao = {}
+    for nome, parcela in parcelas.items():
+        limite = max(1, int(conexoes * parcela))
+        divisao[nome] = (limite, limite * fila_por_vaga)
+    return divisao
+
+
+def _conexoes():
+    """Connections of the asyncpg pool of asgi.py (pool maxconn of the configuration)."""
+    try:
+        return config.get_config().pool['maxconn']
+    except Exception:
+        return 10
+
+
+def _threads():
+    """Request threads of a gunicorn worker: GUNICORN_THREADS or the gunicorn.conf.py default."""
+    return int(os.getenv('GUNICORN_THREADS') or servidor.dimensionar()[1])
+
+
+_DIVISAO = dividir(_threads())
+LIMITES = {nome: int(os.getenv(VARIAVEIS[nome], limite)) for nome, (limite, _) in _DIVISAO.items()}
+FILAS = {nome: int(os.getenv('ADMISSAO_FILA', fila)) for nome, (_, fila) in _DIVISAO.items()}
+
+_DIVISAO_ASYNC = dividir_async(_conexoes())
+LIMITES_ASYNC = {nome: int(os.getenv(VARIAVEIS_ASYNC[nome], limite)) for nome, (limite, _) in _DIVISAO_ASYNC.items()}
+FILAS_ASYNC = {nome: int(os.getenv('ADMISSAO_ASYNC_FILA', fila)) for nome, (_, fila) in _DIVISAO_ASYNC.items()}
+
+# Rotas de operação e documentação: nunca esperam nem são rejeitadas
+ISENTOS = ('/health', '/ready', '/metrics', '/apidocs', '/apispec', '/flasgger_static')
+
+
+class Sobrecarga(Exception):
+    """Raised instead of queueing when an endpoint class is saturated; answered with 503."""
+
+    def __init__(self, classe, retry_after):
+        super().__init__("Servidor sobrecarregado, tente novamente")
+        self.classe = classe
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+def classe(metodo, caminho):
+    """
+    Endpoint class of a request: exportacao (CSV import/export), leitura or escrita.
+    :return: class name, or None for operational routes
+    """
+    if caminho == '/' or caminho.startswith(ISENTOS):
+        return None
+    if caminho.rstrip('/').rsplit('/', 1)[-1] in ('export', 'import'):
+        return 'exportacao'
+    return 'leitura' if metodo in ('GET', 'HEAD', 'OPTIONS') else 'escrita'
+
+
+class Limitador:
+    """
+    Bounded in-flight limit with a short queue: a request takes a slot when
+    one is free, waits up to `espera` seconds while fewer than `fila` others
+    are waiting, and is rejected with Sobrecarga otherwise. Shedding at
+    the door is cheaper than letting requests pile up on the database pool
+    until their clients time out.
+    """
+
+    def __init__(self, nome, limite, fila=0, espera=ESPERA, relogio=time.monotonic):
+        self.nome = nome
+        self.limite = limite
+        self.fila = fila
+        self.espera = espera
+        self.relogio = relogio
+        self.ativos = 0
+        self.esperando = 0
+        self.rejeitadas = 0
+        self._cond = threading.Condition()
+
+    def entrar(self):
+        """:raises Sobrecarga: when the queue is full or the wait deadline passed"""
+        with self._cond:
+            if self.ativos < self.limite:
+                self._ocupar()
+                return
+            if self.esperando >= self.fila:
+                raise self._rejeitar('fila_cheia')
+            prazo = self.relogio() + self.espera
+            self._esperar(1)
+            try:
+                while self.ativos >= self.limite:
+                    resta = prazo - self.relogio()
+                    if resta <= 0:
+                        raise self._rejeitar('prazo')
+                    self._cond.wait(resta)
+            finally:
+                self._esperar(-1)
+            self._ocupar()
+
+    def sair(self):
+        with self._cond:
+            self._liberar()
+            self._cond.notify()
+
+    def stats(self):
+        return {"limit": self.limite, "queue": self.fila, "in_flight": self.ativos, "queued": self.esperando,
+                "rejected": self.rejeitadas}
+
+    def _ocupar(self):
+        self.ativos += 1
+        ADMISSAO_ATIVAS.labels(self.nome).inc()
+
+    def _liberar(self):
+        self.ativos -= 1
+        ADMISSAO_ATIVAS.labels(self.nome).dec()
+
+    def _esperar(self, delta):
+        self.esperando += delta
+        ADMISSAO_FILA.labels(self.nome).inc(delta)
+
+    def _rejeitar(self, motivo):
+        self.rejeitadas += 1
+        ADMISSAO_REJEICOES.labels(self.nome, motivo).inc()
+        return Sobrecarga(self.nome, self.espera)
+
+
+class LimitadorAsync(Limitador):
+    """Limitador for the event loop of the ASGI app (asgi.py)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Criada no primeiro uso, dentro do event loop do servidor
+        self._cond = None
+
+    def _condicao(self):
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    async def entrar(self):
+        async with self._condicao():
+            if self.ativos < self.limite:
+                self._ocupar()
+                return
+            if self.esperando >= self.fila:
+                raise self._rejeitar('fila_cheia')
+            self._esperar(1)
+            try:
+                await asyncio.wait_for(self._cond.wait_for(lambda: self.ativos < self.limite), self.espera)
+            except asyncio.TimeoutError:
+                raise self._rejeitar('prazo')
+            finally:
+                self._esperar(-1)
+            self._ocupar()
+
+    async def sair(self):
+        async with self._condicao():
+            self._liberar()
+            self._cond.notify()
+
+
+LIMITADORES = {nome: Limitador(nome, limite, FILAS[nome]) for nome, limite in LIMITES.items()}
+LIMITADORES_ASYNC = {nome: LimitadorAsync(nome, limite, FILAS_ASYNC[nome]) for nome, limite in LIMITES_ASYNC.items()}
+
+
+def stats():
+    return {nome: limitador.stats() for nome, limitador in LIMITADORES.items()}
@@ -0,0 +1,141 @@
+import threading
+import time
+
+import Util.bd as bd
+import Util.cache as cache
+import Util.statements as statements
+
+# Dados de referência lidos por quase toda requisição: carregados no cache em
+# processo, com as mesmas colunas dos statements <entidade>_por_id
+DADOS_REFERENCIA = {
+    'turmas': ("SELECT id_turma, nome_turma, id_professor, horario, versao FROM turma", cache.TURMAS),
+    'professores': ("SELECT id_professor, nome_completo, email, telefone, versao FROM professor", cache.PROFESSORES),
+    'atividades': ("SELECT id_atividade, descricao, data_realizacao, versao FROM atividade", cache.ATIVIDADES),
+}
+
+# Espera entre tentativas enquanto o banco não responde
+INTERVALO_TENTATIVA = 2.0
+
+_lock = threading.Lock()
+_pronto = threading.Event()
+_etapas = {}
+_erro = None
+_thread = None
+_tarefas = []
+
+
+def registrar(nome, funcao):
+    """
+    Add a warmup step; `funcao(app)` runs after the built-in steps and the
+    worker only reports ready once it returns.
+    """
+    _tarefas.append((nome, funcao))
+
+
+def _conexoes(app):
+    # Abre o mínimo do pool, faz o pre-ping e prepara os statements em cada conexão
+    pool = bd.get_pool()
+    pool.preencher()
+    conexoes = [pool.getconn() for _ in range(max(1, pool.minconn))]
+    try:
+        for conn in conexoes:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                statements.preparar_todos(cursor)
+            finally:
+                cursor.close()
+            conn.commit()
+    finally:
+        for conn in conexoes:
+            conn.close()
+    return len(conexoes)
+
+
+def _dados_referencia(app):
+    conn = bd.get_pool().getconn()
+    linhas = {}
+    try:
+        cursor = conn.cursor()
+        try:
+            for nome, (sql, destino) in DADOS_REFERENCIA.items():
+                geracao = destino.geracao()
+                cursor.execute(sql + f" ORDER BY 1 LIMIT {destino.capacidade}")
+                resultado = cursor.fetchall()
+                for linha in resultado:
+                    destino.set(linha[0], linha, geracao)
+                linhas[nome] = len(resultado)
+        finally:
+            cursor.close()
+    finally:
+        conn.close()
+    return linhas
+
+
+def _openapi(app):
+    # A documentação é montada sob demanda (factory.DocumentacaoSobDemanda);
+    # aqui ela é montada e as especificações geradas antes do primeiro /apispec
+    documentacao = app.extensions.get('documentacao')
+    if documentacao is None:
+        return 0
+    return len(documentacao.especificacoes())
+
+
+ETAPAS = [
+    ('conexoes', _conexoes),
+    ('dados_referencia', _dados_referencia),
+    ('openapi', _openapi),
+]
+
+
+def aquecer(app):
+    """
+    Run every warmup step once, in order, and mark the worker ready.
+    :raises Exception: from the first step that fails
+    """
+    global _erro
+    for nome, funcao in ETAPAS + _tarefas:
+        inicio = time.perf_counter()
+        resultado = funcao(app)
+        with _lock:
+            _etapas[nome] = {
+                'duration': round(time.perf_counter() - inicio, 4),
+                'result': resultado,
+            }
+    with _lock:
+        _erro = None
+    _pronto.set()
+
+
+def _executar(app):
+    global _erro
+    while not _pronto.is_set():
+        try:
+            aquecer(app)
+        except Exception as e:
+            print(f"Aquecimento falhou, nova tentativa em {INTERVALO_TENTATIVA}s: {e}")
+            with _lock:
+                _erro = str(e)
+            time.sleep(INTERVALO_TENTATIVA)
+
+
+def iniciar(app):
+    """Start the warmup in a background thread (once per process)."""
+    global _thread
+    with _lock:
+        if _thread is not None and _thread.is_alive():
+            return
+        _thread = threading.Thread(target=_executar, args=(app,), name='warmup', daemon=True)
+        _thread.start()
+
+
+def pronto():
+    return _pronto.is_set()
+
+
+def estado():
+    """
+    :return: dict with ready flag, finished steps and last error
+    """
+    with _lock:
+        return {'ready': _pronto.is_set(), 'steps': dict(_etapas), 'error': _erro}
@@ -1,39 +1,210 @@
 import psycopg2
 from psycopg2 import OperationalError
-import yaml
 import os
+import threading
+from contextlib import contextmanager
 
-def create_connection():
+import Util.config as config
+from Util.circuito import CircuitBreaker, CircuitOpenError
+from Util.metricas import InstrumentedCursor
+from Util.pipeline import Pipeline
+import Util.replicas as replicas
+import Util.statements as statements
+from Util.pool import ConnectionPool, PooledConnection, PoolTimeout
+
+# Execução de statements nomeados (preparados uma vez por conexão do pool)
+execute = statements.execute
+
+# Pool compartilhado por todos os módulos do processo (recriado após fork)
+_pool = None
+_pool_config = None  # DatabaseConfig usada para criar o pool atual
+_pool_lock = threading.Lock()
+
+# Pools das réplicas de leitura, por DSN
+_replica_pools = {}
+_replica_config = None
+
+
+def _timeouts(cfg):
+    """Connect and statement timeouts passed to every psycopg2.connect."""
+    return {
+        'connect_timeout': cfg.timeouts['connect_timeout'],
+        'options': f"-c statement_timeout={cfg.timeouts['statement_timeout']}",
+    }
+
+
+def _sondar():
+    """Half-open probe: open and close a primary connection."""
+    cfg = config.get_config()
+    psycopg2.connect(**cfg.conexao, **_timeouts(cfg)).close()
+
+
+# Falha rápido quando o primário está fora do ar
+breaker = CircuitBreaker(_sondar)
+
+
+def get_pool():
     """
-    Create a connection to the PostgreSQL database.
-    :return: Connection object or None
+    Return the process-wide connection pool, creating it on first use.
+    A configuration reload with new connection or pool parameters swaps in a
+    new pool; the old one closes its connections as they are returned.
+    :return: ConnectionPool
     """
-    try:
-        # Tentar usar variáveis de ambiente primeiro (Docker)
-        if os.getenv('DB_HOST'):
-            connection = psycopg2.connect(
-                user=os.getenv('DB_USER', 'faat'),
-                password=os.getenv('DB_PASSWORD', 'faat'),
-                host=os.getenv('DB_HOST', 'db'),
-                port=os.getenv('DB_PORT', '5432'),
-                database=os.getenv('DB_NAME', 'escola')
-            )
+    global _pool, _pool_config
+    cfg = config.get_config()
+    pool = _pool
+    if pool is not None and pool.pid == os.getpid() and _pool_config is cfg:
+        return pool
+    with _pool_lock:
+        anterior = _pool
+        if anterior is not None and anterior.pid == os.getpid():
+            if _pool_config is cfg:
+                return anterior
+            breaker.limite = cfg.breaker['limite']
+            breaker.tempo_reset = cfg.breaker['tempo_reset']
+            if (_pool_config.conexao == cfg.conexao and _pool_config.pool == cfg.pool
+                    and _pool_config.timeouts == cfg.timeouts):
+                _pool_config = cfg
+                return anterior
         else:
-            # Usar arquivo de configuração (desenvolvimento local)
-            with open('Util/paramsBD.yml', 'r') as config_file:
-                config = yaml.safe_load(config_file)
+            # Pool herdado de outro processo (fork): não fechar os sockets do pai
+            anterior = None
+
+        conexao = dict(cfg.conexao, **_timeouts(cfg))
+        breaker.limite = cfg.breaker['limite']
+        breaker.tempo_reset = cfg.breaker['tempo_reset']
+
+        def conectar():
             connection = psycopg2.connect(
-                user=config['user'],
-                password=config['password'],
-                host=config['host'],
-                port=config['port'],
-                database=config['database']
+                connection_factory=PooledConnection, cursor_factory=InstrumentedCursor, **conexao
             )
-        print("Connection to PostgreSQL DB successful")
-        return connection
+            print("Connection to PostgreSQL DB successful")
+            return connection
+
+        _pool = ConnectionPool(conectar, **cfg.pool)
+        _pool_config = cfg
+        if anterior is not None:
+            anterior.closeall()
+        return _pool
+
+
+def _get_replica_pools(cfg):
+    global _replica_pools, _replica_config
+    pools = _replica_pools
+    if _replica_config is cfg and all(p.pid == os.getpid() for p in pools.values()):
+        return pools
+    with _pool_lock:
+        if _replica_config is cfg and all(p.pid == os.getpid() for p in _replica_pools.values()):
+            return _replica_pools
+        anteriores = {dsn: p for dsn, p in _replica_pools.items() if p.pid == os.getpid()}
+        mesmos_parametros = (_replica_config is not None and _replica_config.pool == cfg.pool
+                             and _replica_config.timeouts == cfg.timeouts)
+        timeouts = _timeouts(cfg)
+        novos = {}
+        for dsn in cfg.replicas:
+            if mesmos_parametros and dsn in anteriores:
+                novos[dsn] = anteriores.pop(dsn)
+                continue
+
+            def conectar(dsn=dsn):
+                connection = psycopg2.connect(
+                    dsn, connection_factory=PooledConnection, cursor_factory=InstrumentedCursor,
+                    **timeouts
+                )
+                print("Connection to PostgreSQL replica successful")
+                return connection
+
+            novos[dsn] = ConnectionPool(conectar, **cfg.pool)
+        _replica_pools = novos
+        _replica_config = cfg
+        for pool in anteriores.values():
+            pool.closeall()
+        return novos
+
+
+def _replica_connection():
+    """
+    Borrow a connection from a replica whose lag is within replica_max_lag.
+    :return: Connection object or None to fall back to the primary
+    """
+    cfg = config.get_config()
+    if not cfg.replicas or replicas.leitura_exige_primario():
+        return None
+    pools = _get_replica_pools(cfg)
+    for dsn in replicas.ordem(cfg.replicas):
+        try:
+            conn = pools[dsn].getconn()
+        except Exception as e:
+            print(f"Replica unavailable, trying next: {e}")
+            replicas.marcar_indisponivel(dsn)
+            continue
+        if replicas.lag_aceitavel(dsn, conn, cfg.replica_max_lag, cfg.replica_lag_check_interval):
+            return conn
+        conn.close()
+    return None
+
+
+def create_connection(readonly=False):
+    """
+    Borrow a connection from the PostgreSQL pool.
+    Calling close() on it returns it to the pool.
+    :param readonly: route to a read replica when one is configured and not
+                     lagging; writes and read-your-writes requests use the primary
+    :return: Connection object or None
+    :raises CircuitOpenError: while the primary is considered down
+    """
+    if readonly:
+        try:
+            conn = _replica_connection()
+            if conn is not None:
+                return conn
+        except Exception as e:
+            print(f"Replica routing failed, using primary: {e}")
+    breaker.check()
+    try:
+        conn = get_pool().getconn()
+        breaker.sucesso()
+        return conn
     except OperationalError as e:
         print(f"Error connecting to PostgreSQL: {e}")
+        breaker.falha()
+        return None
+    except PoolTimeout as e:
+        print(f"Connection pool exhausted: {e}")
         return None
     except Exception as e:
         print(f"Unexpected error: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+@contextmanager
+def connection(readonly=False):
+    """
+    Borrow a pooled connection for a with-block and return it on exit.
+    :raises OperationalError: when no connection could be obtained
+    """
+    conn = create_connection(readonly=readonly)
+    if conn is None:
+        raise OperationalError("Connection to DB failed")
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def pool_stats():
+    """
+    Statistics of the process-wide pool.
+    :return: dict (empty when the pool was never used)
+    """
+    if _pool is None or _pool.pid != os.getpid():
+        return {}
+    stats = _pool.stats()
+    if _replica_pools:
+        atrasos = replicas.lags()
+        stats['replicas'] = [
+            dict(pool.stats(), lag=atrasos.get(dsn))
+            for dsn, pool in _replica_pools.items()
+            if pool.pid == os.getpid()
+        ]
+    return stats
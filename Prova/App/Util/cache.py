@@ -0,0 +1,186 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import Util.cache_compartilhado as cache_compartilhado
+from Util.metricas import CACHE_ACERTOS, CACHE_FALHAS, CACHE_REMOCOES, CACHE_TAMANHO
+
+# Entradas por cache e validade de cada uma (segundos)
+CAPACIDADE = int(os.getenv('CACHE_CAPACIDADE', 1024))
+TTL = float(os.getenv('CACHE_TTL', 300))
+
+
+class CacheLRU:
+    """
+    Bounded LRU cache with a TTL per entry, shared by the request threads.
+
+    Values are never None, so `get` returning None always means a miss.
+    Writers call `invalidar` after committing; a reader that loaded a row
+    before that invalidation passes the `geracao` it saw to `set`, and the
+    stale row is dropped instead of being cached.
+
+    With a shared tier configured (see configurar), this cache is the L1 of
+    the worker: misses fall through to the shared server, and invalidations
+    are broadcast so every worker drops its L1 copy.
+
+    :param nome: label of the metrics
+    :param capacidade: maximum number of entries (least recently used go first)
+    :param ttl: seconds an entry stays valid
+    """
+
+    def __init__(self, nome, capacidade=CAPACIDADE, ttl=TTL, relogio=time.monotonic):
+        self.nome = nome
+        self.capacidade = capacidade
+        self.ttl = ttl
+        self._relogio = relogio
+        self._entradas = OrderedDict()  # chave -> (expira_em, valor)
+        self._geracao = 0
+        self._lock = threading.Lock()
+        self.compartilhado = None
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+
+    def get(self, chave):
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and entrada[0] > self._relogio():
+                self._entradas.move_to_end(chave)
+                self.acertos += 1
+                CACHE_ACERTOS.labels(self.nome, 'l1').inc()
+                return entrada[1]
+            if entrada is not None:
+                del self._entradas[chave]
+                CACHE_TAMANHO.labels(self.nome).set(len(self._entradas))
+            geracao = self._geracao
+        compartilhado = self.compartilhado
+        if compartilhado is not None:
+            valor = compartilhado.get(self.nome, chave)
+            if valor is not None:
+                self._guardar(chave, valor, geracao)
+                with self._lock:
+                    self.acertos += 1
+                CACHE_ACERTOS.labels(self.nome, 'l2').inc()
+                return valor
+        with self._lock:
+            self.falhas += 1
+        CACHE_FALHAS.labels(self.nome).inc()
+        return None
+
+    def geracao(self):
+        """
+        Token to pass to `set` for a value read from the database after this
+        call: the invalidation counters of this worker and of the shared tier.
+        """
+        with self._lock:
+            local = self._geracao
+        compartilhado = self.compartilhado
+        return local, compartilhado.geracao(self.nome) if compartilhado is not None else None
+
+    def set(self, chave, valor, geracao=None):
+        """
+        Store a value, evicting the least recently used entry when full.
+        :param geracao: from `geracao()` before reading the value; if an
+                        invalidation happened since (in any worker, with a
+                        shared tier), the value is not stored
+        """
+        local, compartilhada = geracao if geracao is not None else (None, None)
+        if not self._guardar(chave, valor, local):
+            return
+        compartilhado = self.compartilhado
+        if compartilhado is None:
+            return
+        if geracao is None:
+            compartilhado.set(self.nome, chave, valor, self.ttl)
+        elif compartilhada is not None:
+            compartilhado.set(self.nome, chave, valor, self.ttl, geracao=compartilhada)
+
+    def _guardar(self, chave, valor, geracao):
+        with self._lock:
+            if geracao is not None and geracao != self._geracao:
+                return False
+            self._entradas[chave] = (self._relogio() + self.ttl, valor)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.capacidade:
+                self._entradas.popitem(last=False)
+                self.remocoes += 1
+                CACHE_REMOCOES.labels(self.nome).inc()
+            CACHE_TAMANHO.labels(self.nome).set(len(self._entradas))
+            return True
+
+    def invalidar(self, chave=None):
+        """Drop one entry (or every entry when chave is None), in every worker."""
+        self.invalidar_local(chave)
+        if self.compartilhado is not None:
+            self.compartilhado.invalidar(self.nome, chave)
+
+    def invalidar_local(self, chave=None):
+        """Drop the entry from this worker's L1 only (invalidation received from another worker)."""
+        with self._lock:
+            self._geracao += 1
+            if chave is None:
+                self._entradas.clear()
+            else:
+                self._entradas.pop(chave, None)
+            CACHE_TAMANHO.labels(self.nome).set(len(self._entradas))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entradas),
+                'capacity': self.capacidade,
+                'hits': self.acertos,
+                'misses': self.falhas,
+                'evictions': self.remocoes,
+            }
+
+
+# Entidades de referência, lidas por id com a linha de <entidade>_por_id (inclui versao)
+TURMAS = CacheLRU('turmas')
+PROFESSORES = CacheLRU('professores')
+ATIVIDADES = CacheLRU('atividades')
+# Arquivos gerados pelas exportações: (mimetype, conteúdo) por parâmetros
+EXPORTACOES = CacheLRU('exportacoes', capacidade=64)
+
+CACHES = {cache.nome: cache for cache in (TURMAS, PROFESSORES, ATIVIDADES, EXPORTACOES)}
+
+# Grupo (blueprint) cujas escritas invalidam caches inteiros, em todos os workers
+INVALIDACOES = {
+    'alunos': (EXPORTACOES,),
+    'pagamentos': (EXPORTACOES,),
+    'import_export': (EXPORTACOES,),
+}
+
+
+def configurar(compartilhado=None):
+    """
+    Put the shared tier behind every cache and subscribe to the invalidations
+    of the other workers. Called once per worker process.
+    :param compartilhado: Util.cache_compartilhado.Compartilhado
+                          (default: from CACHE_REDIS_URL, if set)
+    :return: the shared tier, or None when only the L1 caches are in use
+    """
+    compartilhado = compartilhado or cache_compartilhado.conectar()
+    for cache in CACHES.values():
+        cache.compartilhado = compartilhado
+    if compartilhado is not None:
+        compartilhado.assinar(_invalidacao_recebida)
+    return compartilhado
+
+
+def _invalidacao_recebida(nome, chave):
+    cache = CACHES.get(nome)
+    if cache is not None:
+        cache.invalidar_local(chave)
+
+
+def invalidar_grupo(grupo):
+    """Invalidate the caches derived from the tables written by an entity group."""
+    for cache in INVALIDACOES.get(grupo, ()):
+        cache.invalidar()
+
+
+def stats():
+    """:return: dict nome -> counters of each cache"""
+    return {nome: cache.stats() for nome, cache in CACHES.items()}
@@ -0,0 +1,330 @@
+import base64
+import datetime
+import decimal
+import fnmatch
+import json
+import os
+import threading
+import time
+import uuid
+
+try:
+    import redis
+    from redis.exceptions import WatchError
+except ImportError:
+    redis = None
+
+    class WatchError(Exception):
+        """Stand-in for redis.exceptions.WatchError when redis-py is not installed."""
+
+PREFIXO = 'escola:cache:'
+CANAL = 'escola:cache:invalidacao'
+# Contador de invalidações de cada cache (fora de PREFIXO: a invalidação do cache inteiro não o apaga)
+GERACOES = 'escola:cache-geracao:'
+
+# Identifica o processo nas mensagens de invalidação (o pid distingue os workers
+# mesmo quando o módulo foi importado antes do fork)
+_TOKEN = uuid.uuid4().hex
+
+
+def origem():
+    return f'{os.getpid()}:{_TOKEN}'
+
+
+# Tipos das linhas em cache que o JSON não representa, marcados como {"$tipo": texto}
+_TIPOS = {
+    '$datahora': datetime.datetime.fromisoformat,
+    '$data': datetime.date.fromisoformat,
+    '$decimal': decimal.Decimal,
+    '$bytes': base64.b64decode,
+}
+
+
+def _marcar(valor):
+    if isinstance(valor, datetime.datetime):
+        return {'$datahora': valor.isoformat()}
+    if isinstance(valor, datetime.date):
+        return {'$data': valor.isoformat()}
+    if isinstance(valor, decimal.Decimal):
+        return {'$decimal': str(valor)}
+    if isinstance(valor, bytes):
+        return {'$bytes': base64.b64encode(valor).decode('ascii')}
+    raise TypeError(f"Object of type {type(valor).__name__} is not JSON serializable")
+
+
+def _restaurar(valor):
+    if isinstance(valor, list):
+        return tuple(_restaurar(item) for item in valor)
+    if isinstance(valor, dict):
+        if len(valor) == 1:
+            ((tipo, texto),) = valor.items()
+            if tipo in _TIPOS:
+                return _TIPOS[tipo](texto)
+        return {chave: _restaurar(item) for chave, item in valor.items()}
+    return valor
+
+
+def codificar(valor):
+    """
+    JSON encoding of a cached value or invalidation message (never pickle: a
+    value read from the server must not be able to run code in the worker).
+    Dates, Decimal and bytes are tagged and sequences come back as tuples.
+    :return: bytes
+    """
+    return json.dumps(valor, default=_marcar, separators=(',', ':')).encode('utf-8')
+
+
+def decodificar(dados):
+    return _restaurar(json.loads(dados))
+
+
+class Memoria:
+    """
+    In-process stand-in for a Redis server, with the subset of the redis-py
+    client used here (get, set with ex, delete, incr, scan_iter, publish,
+    pubsub, and pipeline for WATCH/MULTI check-and-set).
+    Used by the tests and to exercise the shared tier without a server;
+    messages are delivered synchronously to every subscriber of the object.
+    """
+
+    def __init__(self, relogio=time.monotonic):
+        self._relogio = relogio
+        self._dados = {}  # chave -> (expira_em, valor)
+        self._versoes = {}  # chave -> modificações (para WATCH)
+        self._assinaturas = []
+        self._lock = threading.Lock()
+
+    def get(self, nome):
+        with self._lock:
+            entrada = self._dados.get(nome)
+            if entrada is None:
+                return None
+            if entrada[0] is not None and entrada[0] <= self._relogio():
+                del self._dados[nome]
+                return None
+            return entrada[1]
+
+    def set(self, nome, valor, ex=None):
+        with self._lock:
+            self._gravar(nome, valor, ex)
+        return True
+
+    def delete(self, *nomes):
+        with self._lock:
+            for nome in nomes:
+                self._versoes[nome] = self._versoes.get(nome, 0) + 1
+            return sum(self._dados.pop(nome, None) is not None for nome in nomes)
+
+    def incr(self, nome):
+        with self._lock:
+            entrada = self._dados.get(nome)
+            valor = int(entrada[1]) + 1 if entrada is not None else 1
+            self._gravar(nome, str(valor).encode(), None)
+            return valor
+
+    def pipeline(self):
+        return _TransacaoMemoria(self)
+
+    def _gravar(self, nome, valor, ex):
+        self._dados[nome] = (self._relogio() + ex if ex else None, valor)
+        self._versoes[nome] = self._versoes.get(nome, 0) + 1
+
+    def scan_iter(self, match='*'):
+        with self._lock:
+            nomes = list(self._dados)
+        return iter([nome for nome in nomes if fnmatch.fnmatchcase(nome, match)])
+
+    def publish(self, canal, mensagem):
+        with self._lock:
+            assinaturas = list(self._assinaturas)
+        entregues = 0
+        for assinatura in assinaturas:
+            entregues += assinatura.entregar(canal, mensagem)
+        return entregues
+
+    def pubsub(self, **kwargs):
+        return _AssinaturaMemoria(self)
+
+
+class _TransacaoMemoria:
+    """The part of a redis-py pipeline used for check-and-set: watch, get, multi, set, execute."""
+
+    def __init__(self, servidor):
+        self.servidor = servidor
+        self._observadas = {}
+        self._comandos = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        self.reset()
+        return False
+
+    def reset(self):
+        self._observadas = {}
+        self._comandos = None
+
+    def watch(self, *nomes):
+        with self.servidor._lock:
+            for nome in nomes:
+                self._observadas[nome] = self.servidor._versoes.get(nome, 0)
+
+    def get(self, nome):
+        return self.servidor.get(nome)
+
+    def multi(self):
+        self._comandos = []
+
+    def set(self, nome, valor, ex=None):
+        self._comandos.append((nome, valor, ex))
+        return self
+
+    def execute(self):
+        with self.servidor._lock:
+            if any(self.servidor._versoes.get(nome, 0) != versao for nome, versao in self._observadas.items()):
+                self.reset()
+                raise WatchError("Watched variable changed.")
+            for nome, valor, ex in self._comandos or ():
+                self.servidor._gravar(nome, valor, ex)
+            resultado = [True] * len(self._comandos or ())
+        self.reset()
+        return resultado
+
+
+class _AssinaturaMemoria:
+    def __init__(self, servidor):
+        self.servidor = servidor
+        self.handlers = {}
+
+    def subscribe(self, **handlers):
+        self.handlers.update(handlers)
+        with self.servidor._lock:
+            self.servidor._assinaturas.append(self)
+
+    def entregar(self, canal, mensagem):
+        handler = self.handlers.get(canal)
+        if handler is None:
+            return 0
+        handler({'type': 'message', 'channel': canal, 'data': mensagem})
+        return 1
+
+    def run_in_thread(self, **kwargs):
+        return None
+
+
+class Compartilhado:
+    """
+    Shared cache tier (L2) in a Redis-protocol server, in front of which each
+    worker keeps its CacheLRU (L1). Values and messages are JSON (codificar).
+    Server errors count as misses: the database is the source of truth.
+
+    Every invalidation bumps a per-cache counter before deleting; a value read
+    from the database is only stored if the counter it saw before the read is
+    unchanged, so a slow reader cannot put back a row another worker has
+    just invalidated.
+
+    :param cliente: redis.Redis, or Memoria in tests
+    """
+
+    def __init__(self, cliente):
+        self.cliente = cliente
+        self.erros = 0
+        self.descartados = 0
+        self._assinatura = None
+
+    def _chave(self, cache, chave):
+        return f'{PREFIXO}{cache}:{chave!r}'
+
+    def get(self, cache, chave):
+        try:
+            valor = self.cliente.get(self._chave(cache, chave))
+            return None if valor is None else decodificar(valor)
+        except Exception as e:
+            self._falhou('get', e)
+            return None
+
+    def geracao(self, cache):
+        """
+        Invalidation counter of a cache, to read before loading a value and pass to `set`.
+        :return: int, or None when the server is unavailable
+        """
+        try:
+            return int(self.cliente.get(GERACOES + cache) or 0)
+        except Exception as e:
+            self._falhou('geracao', e)
+            return None
+
+    def set(self, cache, chave, valor, ttl, geracao=None):
+        """
+        Store a value. With `geracao`, only when the cache was not invalidated
+        since that counter was read (WATCH on the counter, then MULTI/SET).
+        """
+        try:
+            dados = codificar(valor)
+            ex = max(1, int(ttl))
+            if geracao is None:
+                self.cliente.set(self._chave(cache, chave), dados, ex=ex)
+                return
+            with self.cliente.pipeline() as transacao:
+                transacao.watch(GERACOES + cache)
+                if int(transacao.get(GERACOES + cache) or 0) != geracao:
+                    self.descartados += 1
+                    return
+                transacao.multi()
+                transacao.set(self._chave(cache, chave), dados, ex=ex)
+                transacao.execute()
+        except WatchError:
+            self.descartados += 1
+        except Exception as e:
+            self._falhou('set', e)
+
+    def invalidar(self, cache, chave=None):
+        """Delete the entry (or the whole cache) and tell the other workers to drop it from L1."""
+        try:
+            # Antes de apagar: um set que ainda não gravou vê o contador mudar
+            self.cliente.incr(GERACOES + cache)
+            if chave is None:
+                nomes = list(self.cliente.scan_iter(match=f'{PREFIXO}{cache}:*'))
+                if nomes:
+                    self.cliente.delete(*nomes)
+            else:
+                self.cliente.delete(self._chave(cache, chave))
+            self.cliente.publish(CANAL, codificar((origem(), cache, chave)))
+        except Exception as e:
+            self._falhou('invalidar', e)
+
+    def assinar(self, callback):
+        """
+        Listen for invalidations published by other processes.
+        :param callback: callback(cache, chave) — chave None means every entry
+        """
+        def receber(mensagem):
+            try:
+                de, cache, chave = decodificar(mensagem['data'])
+            except Exception:
+                return
+            if de != origem():
+                callback(cache, chave)
+
+        self._assinatura = self.cliente.pubsub(ignore_subscribe_messages=True)
+        self._assinatura.subscribe(**{CANAL: receber})
+        return self._assinatura.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def _falhou(self, operacao, erro):
+        self.erros += 1
+        print(f"Cache compartilhado indisponível ({operacao}): {erro}")
+
+
+def conectar(url=None):
+    """
+    Shared tier configured by CACHE_REDIS_URL.
+    :return: Compartilhado, or None when unset or the redis package is missing
+    """
+    url = url or os.getenv('CACHE_REDIS_URL')
+    if not url:
+        return None
+    if redis is None:
+        print("redis não instalado; cache compartilhado desativado")
+        return None
+    return Compartilhado(redis.Redis.from_url(url, socket_timeout=0.25, socket_connect_timeout=0.25))
@@ -0,0 +1,102 @@
+import math
+import threading
+import time
+
+from Util.metricas import CIRCUITO_ABERTURAS, CIRCUITO_ESTADO, CIRCUITO_REJEICOES
+
+FECHADO = 'closed'
+SEMI_ABERTO = 'half_open'
+ABERTO = 'open'
+
+_VALOR_ESTADO = {FECHADO: 0, SEMI_ABERTO: 1, ABERTO: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of connecting while the database circuit is open."""
+
+    def __init__(self, retry_after):
+        super().__init__("Banco de dados indisponível")
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class CircuitBreaker:
+    """
+    Fast-fail circuit breaker for database connections.
+
+    After `limite` consecutive connection failures the circuit opens and every
+    checkout fails immediately. A background thread probes the database every
+    `tempo_reset` seconds (half-open) and closes the circuit on success.
+
+    :param sonda: callable that raises when the database is still unreachable
+    """
+
+    def __init__(self, sonda, limite=5, tempo_reset=10.0):
+        self.sonda = sonda
+        self.limite = limite
+        self.tempo_reset = tempo_reset
+        self.estado = FECHADO
+        self.falhas = 0
+        self._proxima_sonda = 0.0
+        self._lock = threading.Lock()
+        self._sondando = False
+        CIRCUITO_ESTADO.set(_VALOR_ESTADO[FECHADO])
+
+    def check(self):
+        """
+        :raises CircuitOpenError: while the circuit is open or half-open
+        """
+        if self.estado != FECHADO:
+            CIRCUITO_REJEICOES.inc()
+            raise CircuitOpenError(self.retry_after())
+
+    def retry_after(self):
+        return max(0.0, self._proxima_sonda - time.monotonic())
+
+    def sucesso(self):
+        if self.falhas:
+            with self._lock:
+                if self.estado == FECHADO:
+                    self.falhas = 0
+
+    def falha(self):
+        with self._lock:
+            self.falhas += 1
+            if self.estado == FECHADO and self.falhas >= self.limite:
+                self._abrir()
+
+    def _mudar_estado(self, estado):
+        self.estado = estado
+        CIRCUITO_ESTADO.set(_VALOR_ESTADO[estado])
+
+    def _abrir(self):
+        # Chamado com o lock adquirido
+        self._mudar_estado(ABERTO)
+        self._proxima_sonda = time.monotonic() + self.tempo_reset
+        CIRCUITO_ABERTURAS.inc()
+        print(f"Circuito do banco aberto após {self.falhas} falhas consecutivas")
+        if not self._sondando:
+            self._sondando = True
+            threading.Thread(target=self._sondar, name='db-circuit-probe', daemon=True).start()
+
+    def _sondar(self):
+        while True:
+            espera = self.retry_after()
+            if espera > 0:
+                time.sleep(espera)
+            with self._lock:
+                self._mudar_estado(SEMI_ABERTO)
+            try:
+                self.sonda()
+                ok = True
+            except Exception as e:
+                print(f"Sonda do circuito falhou: {e}")
+                ok = False
+            with self._lock:
+                if ok:
+                    self.falhas = 0
+                    self._sondando = False
+                    self._mudar_estado(FECHADO)
+                    print("Circuito do banco fechado")
+                    return
+                self._mudar_estado(ABERTO)
+                self._proxima_sonda = time.monotonic() + self.tempo_reset
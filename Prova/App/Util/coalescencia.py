@@ -0,0 +1,167 @@
+import asyncio
+import functools
+import os
+import threading
+
+from flask import current_app, request
+
+import Util.replicas as replicas
+from Util.metricas import COALESCENCIA
+
+LIDER = 'leader'
+SEGUIDOR = 'follower'
+# Seguidor que desistiu de esperar o líder e fez a própria consulta
+DESISTENTE = 'timeout'
+
+# Segundos que um seguidor espera o líder antes de executar a consulta ele mesmo
+ESPERA = float(os.getenv('COALESCENCIA_ESPERA', 5.0))
+
+
+def chave(endpoint, params_rota, args, if_none_match=None, primario=False):
+    """
+    Identity of a GET for coalescing: endpoint, path parameters and query
+    string in a fixed order, plus what changes the answer for the same URL
+    (If-None-Match, and whether the read must go to the primary).
+    :param args: iterable of (name, value) pairs of the query string
+    """
+    return (endpoint, tuple(sorted(params_rota.items())), tuple(sorted(args)), if_none_match or '', primario)
+
+
+class _Voo:
+    def __init__(self):
+        self.pronto = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+
+class SingleFlight:
+    """
+    Runs a function once for every concurrent caller with the same key: the
+    first one (leader) executes it, the others (followers) wait and get the
+    same result. A follower only joins a flight that is still running, so it
+    never sees data older than a read it overlapped with. A follower waits at
+    most `espera` seconds; after that it runs the function itself, so a hung
+    leader does not pin the threads of its followers.
+    """
+
+    def __init__(self, espera=ESPERA):
+        self.espera = espera
+        self._voos = {}
+        self._lock = threading.Lock()
+        self.lideres = 0
+        self.seguidores = 0
+        self.desistencias = 0
+
+    def executar(self, chave, funcao, endpoint='none'):
+        with self._lock:
+            voo = self._voos.get(chave)
+            lider = voo is None
+            if lider:
+                voo = self._voos[chave] = _Voo()
+                self.lideres += 1
+            else:
+                self.seguidores += 1
+        COALESCENCIA.labels(endpoint, LIDER if lider else SEGUIDOR).inc()
+
+        if not lider:
+            if not voo.pronto.wait(self.espera):
+                return self._desistir(funcao, endpoint)
+            if voo.erro is not None:
+                raise voo.erro
+            return voo.resultado
+        try:
+            voo.resultado = funcao()
+        except Exception as e:
+            voo.erro = e
+            raise
+        finally:
+            with self._lock:
+                del self._voos[chave]
+            voo.pronto.set()
+        return voo.resultado
+
+    def _desistir(self, funcao, endpoint):
+        with self._lock:
+            self.desistencias += 1
+        COALESCENCIA.labels(endpoint, DESISTENTE).inc()
+        return funcao()
+
+    def stats(self):
+        total = self.lideres + self.seguidores
+        return {
+            "leaders": self.lideres,
+            "followers": self.seguidores,
+            "timeouts": self.desistencias,
+            "ratio": round(self.seguidores / total, 4) if total else 0.0,
+        }
+
+
+class SingleFlightAsync(SingleFlight):
+    """
+    SingleFlight for the event loop of the ASGI app (asgi.py).
+    The leader runs the function in its own task and awaits it shielded: if
+    the leader's request is cancelled (client gone), the task keeps running
+    for the followers instead of cancelling them.
+    """
+
+    async def executar(self, chave, funcao, endpoint='none'):
+        tarefa = self._voos.get(chave)
+        if tarefa is not None:
+            self.seguidores += 1
+            COALESCENCIA.labels(endpoint, SEGUIDOR).inc()
+            try:
+                return await asyncio.wait_for(asyncio.shield(tarefa), self.espera)
+            except asyncio.TimeoutError:
+                return await self._desistir(funcao, endpoint)
+            except asyncio.CancelledError:
+                if not tarefa.cancelled():
+                    raise  # o seguidor é que foi cancelado
+                return await self._desistir(funcao, endpoint)
+
+        tarefa = self._voos[chave] = asyncio.ensure_future(funcao())
+        tarefa.add_done_callback(functools.partial(self._pousar, chave))
+        self.lideres += 1
+        COALESCENCIA.labels(endpoint, LIDER).inc()
+        return await asyncio.shield(tarefa)
+
+    async def _desistir(self, funcao, endpoint):
+        self.desistencias += 1
+        COALESCENCIA.labels(endpoint, DESISTENTE).inc()
+        return await funcao()
+
+    def _pousar(self, chave, tarefa):
+        if self._voos.get(chave) is tarefa:
+            del self._voos[chave]
+        # Sem ninguém esperando (líder cancelado), a exceção não deve gerar aviso de "never retrieved"
+        if not tarefa.cancelled():
+            tarefa.exception()
+
+
+VOOS = SingleFlight()
+VOOS_ASYNC = SingleFlightAsync()
+
+
+def coalescer(view):
+    """
+    Decorator for Flask GET views: identical concurrent requests share one
+    execution of the view (one database round trip) and its serialized
+    response. Each caller gets its own copy of body, status and headers.
+    """
+    @functools.wraps(view)
+    def wrapper(**kwargs):
+        identidade = chave(
+            request.endpoint, kwargs, request.args.items(multi=True),
+            request.headers.get('If-None-Match'), replicas.leitura_exige_primario(),
+        )
+
+        def executar():
+            resposta = current_app.make_response(view(**kwargs))
+            return resposta.get_data(), resposta.status_code, list(resposta.headers)
+
+        corpo, status, cabecalhos = VOOS.executar(identidade, executar, request.endpoint)
+        return current_app.response_class(corpo, status=status, headers=cabecalhos)
+    return wrapper
+
+
+def stats():
+    return VOOS.stats()
@@ -0,0 +1,264 @@
+import os
+import time
+import zlib
+
+from werkzeug.http import parse_accept_header
+
+import Util.metricas as metricas
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Nível de compressão (gzip 1-9, brotli 0-11) e tamanho mínimo comprimido
+NIVEL_GZIP = int(os.getenv('COMPRESSAO_NIVEL_GZIP', 6))
+NIVEL_BROTLI = int(os.getenv('COMPRESSAO_NIVEL_BROTLI', 4))
+TAMANHO_MINIMO = int(os.getenv('COMPRESSAO_MINIMO', 1024))
+
+TIPOS = ('application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html')
+
+
+def codificacoes():
+    """Encodings this process can produce, in order of preference."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def escolher(accept_encoding):
+    """
+    Content coding negotiated from the Accept-Encoding header.
+    :return: 'br', 'gzip' or None (identity)
+    """
+    if not accept_encoding:
+        return None
+    aceitas = parse_accept_header(accept_encoding)
+    for codificacao in codificacoes():
+        if aceitas[codificacao] > 0:
+            return codificacao
+    return None
+
+
+def comprimivel(status, cabecalhos):
+    """
+    Whether a response may be compressed, from its status and headers
+    (a list of (name, value) pairs). Bodies with a Content-Length below
+    TAMANHO_MINIMO are skipped here; streamed ones are checked as they arrive.
+    """
+    if status < 200 or status in (204, 206, 304):
+        return False
+    nomes = {nome.lower(): valor for nome, valor in cabecalhos}
+    if 'content-encoding' in nomes:
+        return False
+    if nomes.get('content-type', '').split(';')[0].strip().lower() not in TIPOS:
+        return False
+    if 'no-transform' in nomes.get('cache-control', ''):
+        return False
+    tamanho = nomes.get('content-length')
+    return tamanho is None or int(tamanho) >= TAMANHO_MINIMO
+
+
+def cabecalhos_comprimidos(cabecalhos, codificacao):
+    """
+    Headers of the compressed representation: no Content-Length nor
+    Accept-Ranges (ranges of the original bytes do not apply), weak ETag, Vary.
+    """
+    resultado = []
+    for nome, valor in cabecalhos:
+        chave = nome.lower()
+        if chave in ('content-length', 'accept-ranges') or chave == 'vary' and valor.strip() == 'Accept-Encoding':
+            continue
+        if chave == 'etag' and not valor.startswith('W/'):
+            # A representação comprimida não é idêntica byte a byte à original
+            valor = 'W/' + valor
+        resultado.append((nome, valor))
+    resultado.append(('Content-Encoding', codificacao))
+    resultado.append(('Vary', 'Accept-Encoding'))
+    return resultado
+
+
+class Compressor:
+    """
+    Incremental encoder of one response body; records the bytes saved and
+    the CPU time spent in escola_compression_* when finished.
+    """
+
+    def __init__(self, codificacao, nivel=None):
+        self.codificacao = codificacao
+        if codificacao == 'br':
+            self._codificador = brotli.Compressor(quality=NIVEL_BROTLI if nivel is None else nivel)
+        else:
+            # wbits 31: formato gzip (cabeçalho e CRC)
+            self._codificador = zlib.compressobj(NIVEL_GZIP if nivel is None else nivel, zlib.DEFLATED, 31)
+        self.entrada = 0
+        self.saida = 0
+        self.cpu = 0.0
+
+    def comprimir(self, dados):
+        inicio = time.thread_time()
+        if self.codificacao == 'br':
+            resultado = self._codificador.process(dados)
+        else:
+            resultado = self._codificador.compress(dados)
+        self._contar(dados, resultado, inicio)
+        return resultado
+
+    def finalizar(self):
+        inicio = time.thread_time()
+        if self.codificacao == 'br':
+            resultado = self._codificador.finish()
+        else:
+            resultado = self._codificador.flush()
+        self._contar(b'', resultado, inicio)
+        metricas.COMPRESSAO_ECONOMIA.labels(self.codificacao).inc(max(0, self.entrada - self.saida))
+        metricas.COMPRESSAO_CPU.labels(self.codificacao).inc(self.cpu)
+        return resultado
+
+    def _contar(self, dados, resultado, inicio):
+        self.cpu += time.thread_time() - inicio
+        self.entrada += len(dados)
+        self.saida += len(resultado)
+
+
+class Compressao:
+    """
+    WSGI middleware that compresses responses with gzip or brotli (when the
+    brotli package is installed), negotiated with Accept-Encoding. Bodies are
+    encoded chunk by chunk as the application yields them, so the middleware
+    never holds a whole streamed or send_file body in memory; the headers are sent once
+    TAMANHO_MINIMO bytes arrived or the body ended, whichever comes first.
+    """
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        codificacao = escolher(environ.get('HTTP_ACCEPT_ENCODING'))
+        if codificacao is None or environ.get('REQUEST_METHOD') == 'HEAD':
+            return self.wsgi_app(environ, start_response)
+        resposta = _RespostaWSGI(start_response)
+        corpo = self.wsgi_app(environ, resposta.start_response)
+        return self._gerar(corpo, resposta, codificacao)
+
+    def _gerar(self, corpo, resposta, codificacao):
+        try:
+            pedacos = iter(corpo)
+            if not resposta.comprimivel:
+                resposta.enviar()
+                yield from pedacos
+                return
+
+            inicio = []
+            tamanho = 0
+            for pedaco in pedacos:
+                inicio.append(pedaco)
+                tamanho += len(pedaco)
+                if tamanho >= TAMANHO_MINIMO:
+                    break
+            else:
+                # Corpo inteiro abaixo do mínimo: não compensa comprimir
+                resposta.enviar()
+                yield b''.join(inicio)
+                return
+
+            compressor = Compressor(codificacao)
+            resposta.enviar(codificacao)
+            yield compressor.comprimir(b''.join(inicio))
+            for pedaco in pedacos:
+                dados = compressor.comprimir(pedaco)
+                if dados:
+                    yield dados
+            yield compressor.finalizar()
+        finally:
+            if hasattr(corpo, 'close'):
+                corpo.close()
+
+
+class _RespostaWSGI:
+    """Holds start_response until the middleware knows whether it compresses."""
+
+    def __init__(self, start_response):
+        self._start_response = start_response
+        self.status = None
+        self.cabecalhos = None
+        self.comprimivel = False
+
+    def start_response(self, status, cabecalhos, exc_info=None):
+        if exc_info is not None:
+            # Erro depois do início da resposta: repassa sem comprimir
+            self.comprimivel = False
+            return self._start_response(status, cabecalhos, exc_info)
+        self.status = status
+        self.cabecalhos = cabecalhos
+        self.comprimivel = comprimivel(int(status.split(' ', 1)[0]), cabecalhos)
+        return self._escrever
+
+    def enviar(self, codificacao=None):
+        if self.status is None:
+            return
+        cabecalhos = self.cabecalhos
+        if codificacao is not None:
+            cabecalhos = cabecalhos_comprimidos(cabecalhos, codificacao)
+        elif self.comprimivel:
+            cabecalhos = cabecalhos + [('Vary', 'Accept-Encoding')]
+        self._start_response(self.status, cabecalhos)
+        self.status = None
+
+    def _escrever(self, dados):
+        raise RuntimeError("write() não é suportado com compressão de respostas")
+
+
+class CompressaoASGI:
+    """ASGI counterpart of Compressao for the asyncpg/Starlette app (asgi.py)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] == 'HEAD':
+            return await self.app(scope, receive, send)
+        cabecalhos = {nome.decode('latin-1').lower(): valor.decode('latin-1') for nome, valor in scope['headers']}
+        codificacao = escolher(cabecalhos.get('accept-encoding'))
+        if codificacao is None:
+            return await self.app(scope, receive, send)
+
+        estado = {'inicio': None, 'buffer': [], 'tamanho': 0, 'compressor': None}
+
+        async def enviar(mensagem):
+            if mensagem['type'] == 'http.response.start':
+                lista = [(n.decode('latin-1'), v.decode('latin-1')) for n, v in mensagem.get('headers', [])]
+                if comprimivel(mensagem['status'], lista):
+                    estado['inicio'] = (mensagem, lista)
+                else:
+                    await send(mensagem)
+                return
+            if mensagem['type'] != 'http.response.body' or estado['inicio'] is None:
+                await send(mensagem)
+                return
+
+            corpo = mensagem.get('body', b'')
+            mais = mensagem.get('more_body', False)
+            compressor = estado['compressor']
+            if compressor is None:
+                estado['buffer'].append(corpo)
+                estado['tamanho'] += len(corpo)
+                if estado['tamanho'] < TAMANHO_MINIMO and mais:
+                    return
+                inicio, lista = estado['inicio']
+                corpo = b''.join(estado['buffer'])
+                if estado['tamanho'] < TAMANHO_MINIMO:
+                    await send({**inicio, 'headers': _bytes(lista + [('Vary', 'Accept-Encoding')])})
+                    await send({'type': 'http.response.body', 'body': corpo, 'more_body': False})
+                    return
+                compressor = estado['compressor'] = Compressor(codificacao)
+                await send({**inicio, 'headers': _bytes(cabecalhos_comprimidos(lista, codificacao))})
+            dados = compressor.comprimir(corpo)
+            if not mais:
+                dados += compressor.finalizar()
+            if dados or not mais:
+                await send({'type': 'http.response.body', 'body': dados, 'more_body': mais})
+
+        await self.app(scope, receive, enviar)
+
+
+def _bytes(cabecalhos):
+    return [(nome.lower().encode('latin-1'), valor.encode('latin-1')) for nome, valor in cabecalhos]
@@ -0,0 +1,169 @@
+import os
+import signal
+import threading
+import time
+
+import yaml
+
+CONFIG_FILE = os.getenv(
+    'DB_CONFIG_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'paramsBD.yml')
+)
+
+# Intervalo mínimo entre duas verificações do mtime do arquivo (segundos)
+INTERVALO_VERIFICACAO = 2.0
+
+
+class DatabaseConfig:
+    """
+    Immutable snapshot of the database configuration.
+    A reload builds a new object; requests holding the old one are unaffected.
+    """
+
+    def __init__(self, dados, origem, mtime=None, versao=1):
+        self.dados = dict(dados)
+        self.origem = origem
+        self.mtime = mtime
+        self.versao = versao
+        self.conexao = {
+            'user': dados['user'],
+            'password': dados['password'],
+            'host': dados['host'],
+            'port': dados['port'],
+            'database': dados['database'],
+        }
+        self.pool = {
+            'minconn': int(dados.get('pool_min', 1)),
+            'maxconn': int(dados.get('pool_max', 10)),
+            'max_lifetime': float(dados.get('pool_max_lifetime', 1800)),
+            'timeout': float(dados.get('pool_timeout', 5)),
+        }
+        # Timeouts: conexão em segundos, statement em milissegundos
+        self.timeouts = {
+            'connect_timeout': int(dados.get('connect_timeout', 3)),
+            'statement_timeout': int(dados.get('statement_timeout', 30000)),
+        }
+        self.breaker = {
+            'limite': int(dados.get('breaker_threshold', 5)),
+            'tempo_reset': float(dados.get('breaker_reset_timeout', 10)),
+        }
+        # Réplicas de leitura (DSNs libpq ou URIs postgresql://)
+        replicas = dados.get('replicas') or []
+        if isinstance(replicas, str):
+            replicas = [dsn.strip() for dsn in replicas.split(',')]
+        self.replicas = tuple(dsn for dsn in replicas if dsn)
+        self.replica_max_lag = float(dados.get('replica_max_lag', 5))
+        self.replica_lag_check_interval = float(dados.get('replica_lag_check_interval', 2))
+
+    def get(self, chave, padrao=None):
+        return self.dados.get(chave, padrao)
+
+
+_config = None
+_lock = threading.Lock()
+_ultima_verificacao = 0.0
+_recarregar = False
+
+
+def _ler_ambiente():
+    return {
+        'user': os.getenv('DB_USER', 'faat'),
+        'password': os.getenv('DB_PASSWORD', 'faat'),
+        'host': os.getenv('DB_HOST', 'db'),
+        'port': os.getenv('DB_PORT', '5432'),
+        'database': os.getenv('DB_NAME', 'escola'),
+        'pool_min': os.getenv('DB_POOL_MIN', 1),
+        'pool_max': os.getenv('DB_POOL_MAX', 10),
+        'pool_max_lifetime': os.getenv('DB_POOL_MAX_LIFETIME', 1800),
+        'pool_timeout': os.getenv('DB_POOL_TIMEOUT', 5),
+        'connect_timeout': os.getenv('DB_CONNECT_TIMEOUT', 3),
+        'statement_timeout': os.getenv('DB_STATEMENT_TIMEOUT', 30000),
+        'breaker_threshold': os.getenv('DB_BREAKER_THRESHOLD', 5),
+        'breaker_reset_timeout': os.getenv('DB_BREAKER_RESET_TIMEOUT', 10),
+        'replicas': os.getenv('DB_REPLICA_DSN', ''),
+        'replica_max_lag': os.getenv('DB_REPLICA_MAX_LAG', 5),
+        'replica_lag_check_interval': os.getenv('DB_REPLICA_LAG_CHECK_INTERVAL', 2),
+    }
+
+
+def _carregar(versao):
+    # Tentar usar variáveis de ambiente primeiro (Docker)
+    if os.getenv('DB_HOST'):
+        return DatabaseConfig(_ler_ambiente(), 'env', versao=versao)
+    # Usar arquivo de configuração (desenvolvimento local)
+    mtime = os.stat(CONFIG_FILE).st_mtime
+    with open(CONFIG_FILE, 'r') as config_file:
+        dados = yaml.safe_load(config_file)
+    return DatabaseConfig(dados, CONFIG_FILE, mtime=mtime, versao=versao)
+
+
+def _arquivo_alterado(config):
+    if config.mtime is None:
+        return False
+    try:
+        return os.stat(CONFIG_FILE).st_mtime != config.mtime
+    except OSError:
+        return False
+
+
+def get_config():
+    """
+    Return the current database configuration.
+    The file is only re-read when its mtime changed (checked at most every
+    INTERVALO_VERIFICACAO seconds) or after SIGHUP.
+    :return: DatabaseConfig
+    """
+    global _ultima_verificacao
+    config = _config
+    if config is None:
+        return reload()
+    agora = time.monotonic()
+    if _recarregar:
+        return reload()
+    if config.mtime is not None and agora - _ultima_verificacao >= INTERVALO_VERIFICACAO:
+        _ultima_verificacao = agora
+        if _arquivo_alterado(config):
+            return reload()
+    return config
+
+
+def reload():
+    """
+    Re-read the configuration now.
+    If the file is invalid the previous configuration stays active.
+    :return: DatabaseConfig
+    """
+    global _config, _recarregar, _ultima_verificacao
+    with _lock:
+        _recarregar = False
+        _ultima_verificacao = time.monotonic()
+        anterior = _config
+        versao = anterior.versao + 1 if anterior else 1
+        try:
+            _config = _carregar(versao)
+        except Exception as e:
+            if anterior is None:
+                raise
+            print(f"Erro ao recarregar configuração do banco, mantendo a anterior: {e}")
+        return _config
+
+
+def _sighup(signum, frame):
+    # Só marca; a releitura acontece na próxima chamada a get_config()
+    global _recarregar
+    _recarregar = True
+
+
+def install_sighup_handler():
+    """
+    Reload the configuration on SIGHUP.
+    :return: True when the handler was installed
+    """
+    if not hasattr(signal, 'SIGHUP'):
+        return False
+    try:
+        signal.signal(signal.SIGHUP, _sighup)
+        return True
+    except ValueError:
+        # signal.signal só funciona na thread principal
+        return False
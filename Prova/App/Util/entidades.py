@@ -0,0 +1,109 @@
+import datetime
+
+
+class ParametroInvalido(ValueError):
+    """Invalid query parameter (?fields=, filters, cursor, limit); handlers answer 400."""
+
+
+def _data(valor):
+    return datetime.date.fromisoformat(valor)
+
+
+class Entidade:
+    """
+    Column metadata of a table exposed by the read and list endpoints.
+
+    :param tabela: table name
+    :param chave: integer primary key, used as the keyset cursor
+    :param colunas: columns in table order (the JSON keys of the read handlers);
+                    every table also has a `versao` column bumped on each UPDATE
+    :param filtros: query parameter -> (column, operator, converter); every
+                    filtered column has an index ending in the primary key
+    """
+
+    def __init__(self, tabela, chave, colunas, filtros=None):
+        self.tabela = tabela
+        self.chave = chave
+        self.colunas = tuple(colunas)
+        self.filtros = filtros or {}
+
+    def projecao(self, campos):
+        """
+        Columns requested with ?fields=a,b, in table order.
+        The primary key is always included.
+        :return: tuple of columns, or None when no projection was requested
+        :raises ParametroInvalido: for an unknown column
+        """
+        if not campos:
+            return None
+        pedidos = {campo.strip() for campo in campos.split(',') if campo.strip()}
+        desconhecidos = pedidos - set(self.colunas)
+        if desconhecidos:
+            raise ParametroInvalido(f"Campos desconhecidos: {', '.join(sorted(desconhecidos))}")
+        return tuple(coluna for coluna in self.colunas if coluna == self.chave or coluna in pedidos)
+
+    def sql_por_chave(self, colunas, marcador='%s'):
+        """SELECT of the given columns, followed by versao, of one row by primary key."""
+        return f"SELECT {', '.join(colunas)}, versao FROM {self.tabela} WHERE {self.chave} = {marcador}"
+
+    def versao(self, linha, colunas=None):
+        """Row version of a row read with sql_por_chave or a *_por_id statement."""
+        return linha[len(colunas or self.colunas)]
+
+    def para_dict(self, linha, colunas=None):
+        return dict(zip(colunas or self.colunas, linha))
+
+
+ALUNOS = Entidade(
+    'alunos', 'id_aluno',
+    ('id_aluno', 'nome_completo', 'data_nascimento', 'id_turma', 'nome_responsavel',
+     'telefone_responsavel', 'email_responsavel', 'informacoes_adicionais'),
+    {'id_turma': ('id_turma', '=', int)},
+)
+
+PROFESSORES = Entidade(
+    'professor', 'id_professor',
+    ('id_professor', 'nome_completo', 'email', 'telefone'),
+)
+
+TURMAS = Entidade(
+    'turma', 'id_turma',
+    ('id_turma', 'nome_turma', 'id_professor', 'horario'),
+    {'id_professor': ('id_professor', '=', int)},
+)
+
+PAGAMENTOS = Entidade(
+    'pagamento', 'id_pagamento',
+    ('id_pagamento', 'id_aluno', 'data_pagamento', 'valor_pago', 'forma_pagamento', 'referencia', 'status'),
+    {
+        'id_aluno': ('id_aluno', '=', int),
+        'status': ('status', '=', str),
+        'forma_pagamento': ('forma_pagamento', '=', str),
+        'data_inicio': ('data_pagamento', '>=', _data),
+        'data_fim': ('data_pagamento', '<=', _data),
+    },
+)
+
+PRESENCAS = Entidade(
+    'presenca', 'id_presenca',
+    ('id_presenca', 'id_aluno', 'data_presenca', 'presente'),
+    {
+        'id_aluno': ('id_aluno', '=', int),
+        'data_inicio': ('data_presenca', '>=', _data),
+        'data_fim': ('data_presenca', '<=', _data),
+    },
+)
+
+USUARIOS = Entidade(
+    'usuario', 'id_usuario',
+    ('id_usuario', 'login', 'senha', 'nivel_acesso', 'id_professor'),
+)
+
+ATIVIDADES = Entidade(
+    'atividade', 'id_atividade',
+    ('id_atividade', 'descricao', 'data_realizacao'),
+    {
+        'data_inicio': ('data_realizacao', '>=', _data),
+        'data_fim': ('data_realizacao', '<=', _data),
+    },
+)
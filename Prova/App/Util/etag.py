@@ -0,0 +1,26 @@
+import zlib
+
+from werkzeug.http import parse_etags, quote_etag
+
+
+def etag(versao, campos=None):
+    """
+    Strong ETag of a row: its version, plus a checksum of the projected
+    columns when ?fields= changed the representation.
+    """
+    if not campos:
+        return str(versao)
+    return f"{versao}-{zlib.crc32(','.join(campos).encode()):08x}"
+
+
+def corresponde(if_none_match, versao, campos=None):
+    """
+    Whether the If-None-Match header matches the current version of the row
+    (weak comparison, as RFC 9110 requires for If-None-Match).
+    """
+    return parse_etags(if_none_match).contains_weak(etag(versao, campos))
+
+
+def cabecalhos(versao, campos=None):
+    """Headers of a read response (200 or 304); no-cache makes clients revalidate."""
+    return {'ETag': quote_etag(etag(versao, campos)), 'Cache-Control': 'no-cache'}
@@ -0,0 +1,303 @@
+import datetime
+import json
+import os
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from Util.entidades import ParametroInvalido
+
+# Máximo de linhas por requisição em POST /<entidade>/bulk
+MAX_LINHAS = int(os.getenv('API_MAX_BULK', 5000))
+# Linhas por INSERT ... VALUES (execute_values page_size)
+LINHAS_POR_INSERT = 500
+
+MODOS = ('atomico', 'parcial')
+
+
+class Modelo:
+    """
+    How the rows of a bulk create map to a table.
+
+    :param tabela: table name
+    :param colunas: inserted column -> SQL type, in VALUES order
+    :param obrigatorios: fields every row must have
+    :param padroes: column -> value used when the field is missing
+    :param referencias: column -> (table, key, error message) checked before inserting
+    :param retorno: columns returned for each inserted row
+    :param conflito: optional ON CONFLICT clause
+    :param serial: SERIAL primary key, drawn from its sequence before the insert
+    :param identidade: columns that tell the rows of one INSERT apart (default: serial)
+    """
+
+    def __init__(self, tabela, colunas, obrigatorios, padroes=None, referencias=None, retorno=(), conflito='',
+                 serial=None, identidade=()):
+        self.tabela = tabela
+        self.colunas = tuple(colunas)
+        self.tipos = dict(colunas)
+        self.obrigatorios = tuple(obrigatorios)
+        self.padroes = padroes or {}
+        self.referencias = referencias or {}
+        self.retorno = tuple(retorno)
+        self.conflito = conflito
+        self.serial = serial
+        self.identidade = tuple(identidade) or (serial,)
+
+    @property
+    def sql(self):
+        """
+        Multi-row INSERT (execute_values) that returns the input index of each
+        row. The order of RETURNING rows is not guaranteed, so the inserted
+        rows are joined back to the VALUES on `identidade`.
+        """
+        colunas = ', '.join(self.colunas)
+        inseridas = f"{self.serial}, {colunas}" if self.serial else colunas
+        chave = f"nextval(pg_get_serial_sequence('{self.tabela}', '{self.serial}')) AS {self.serial}, " if self.serial else ''
+        retorno = ', '.join(dict.fromkeys(self.retorno + self.identidade))
+        return (f"WITH dados AS MATERIALIZED (SELECT {chave}* FROM (VALUES %s) AS v (indice, {colunas})), "
+                f"novos AS (INSERT INTO {self.tabela} ({inseridas}) SELECT {inseridas} FROM dados "
+                f"{self.conflito + ' ' if self.conflito else ''}RETURNING {retorno}) "
+                f"SELECT dados.indice, {', '.join(f'novos.{coluna}' for coluna in self.retorno)} "
+                f"FROM novos JOIN dados USING ({', '.join(self.identidade)})")
+
+    @property
+    def modelo_valores(self):
+        # Fora de um INSERT ... VALUES os literais não tomam o tipo da coluna
+        return '(%s, ' + ', '.join(f'%s::{self.tipos[coluna]}' for coluna in self.colunas) + ')'
+
+    def valores(self, linha):
+        return tuple(linha.get(coluna, self.padroes.get(coluna)) for coluna in self.colunas)
+
+
+ALUNOS = Modelo(
+    'alunos',
+    {'nome_completo': 'varchar', 'data_nascimento': 'date', 'id_turma': 'int', 'nome_responsavel': 'varchar',
+     'telefone_responsavel': 'varchar', 'email_responsavel': 'varchar', 'informacoes_adicionais': 'text'},
+    ('nome_completo', 'data_nascimento', 'id_turma', 'nome_responsavel', 'telefone_responsavel',
+     'email_responsavel'),
+    padroes={'informacoes_adicionais': ''},
+    referencias={'id_turma': ('turma', 'id_turma', "Turma não encontrada")},
+    retorno=('id_aluno',),
+    serial='id_aluno',
+)
+
+PRESENCAS = Modelo(
+    'presenca',
+    {'id_aluno': 'int', 'data_presenca': 'date', 'presente': 'boolean'},
+    ('id_aluno', 'data_presenca', 'presente'),
+    referencias={'id_aluno': ('alunos', 'id_aluno', "Aluno não encontrado")},
+    retorno=('id_presenca',),
+    # Mesmo comportamento do POST /presencas: reenviar o dia atualiza a presença
+    # (e a linha atualizada mantém o id antigo, por isso a identidade é aluno e dia)
+    conflito='ON CONFLICT (id_aluno, data_presenca) DO UPDATE SET presente = EXCLUDED.presente',
+    identidade=('id_aluno', 'data_presenca'),
+)
+
+PAGAMENTOS = Modelo(
+    'pagamento',
+    {'id_aluno': 'int', 'data_pagamento': 'date', 'valor_pago': 'numeric', 'forma_pagamento': 'varchar',
+     'referencia': 'varchar', 'status': 'varchar'},
+    ('id_aluno', 'valor_pago', 'data_pagamento', 'forma_pagamento'),
+    padroes={'referencia': '', 'status': 'pendente'},
+    referencias={'id_aluno': ('alunos', 'id_aluno', "Aluno não encontrado")},
+    retorno=('id_pagamento',),
+    serial='id_pagamento',
+)
+
+ATIVIDADE_ALUNO = Modelo(
+    'atividade_aluno',
+    {'id_atividade': 'int', 'id_aluno': 'int'},
+    ('id_aluno', 'id_atividade'),
+    referencias={
+        'id_aluno': ('alunos', 'id_aluno', "Aluno não encontrado"),
+        'id_atividade': ('atividade', 'id_atividade', "Atividade não encontrada"),
+    },
+    retorno=('id_atividade', 'id_aluno'),
+    identidade=('id_atividade', 'id_aluno'),
+)
+
+
+def ler_linhas(request):
+    """
+    Rows of a bulk request: a JSON array, or NDJSON (one object per line)
+    when the Content-Type is application/x-ndjson.
+    :raises ParametroInvalido: for a malformed body or more than MAX_LINHAS rows
+    """
+    try:
+        if request.mimetype == 'application/x-ndjson':
+            linhas = [json.loads(texto) for texto in request.get_data(as_text=True).splitlines() if texto.strip()]
+        else:
+            linhas = request.get_json(force=True, silent=False)
+    except ValueError as e:
+        raise ParametroInvalido(f"Corpo inválido: {e}")
+    if not isinstance(linhas, list) or not linhas:
+        raise ParametroInvalido("O corpo deve ser uma lista não vazia de objetos")
+    if len(linhas) > MAX_LINHAS:
+        raise ParametroInvalido(f"No máximo {MAX_LINHAS} linhas por requisição")
+    return linhas
+
+
+def modo(args):
+    """
+    ?modo=atomico (default): nothing is written if any row fails.
+    ?modo=parcial: valid rows are written, failures are reported per row.
+    :raises ParametroInvalido: for an unknown mode
+    """
+    valor = args.get('modo', 'atomico')
+    if valor not in MODOS:
+        raise ParametroInvalido(f"modo deve ser um de: {', '.join(MODOS)}")
+    return valor
+
+
+class Resultado:
+    """Outcome of a bulk create: returned keys per inserted row and errors per row."""
+
+    def __init__(self, modelo, total, atomico):
+        self.modelo = modelo
+        self.total = total
+        self.atomico = atomico
+        self.inseridos = {}  # índice da linha de entrada -> colunas de retorno
+        self.erros = {}  # índice -> mensagem
+
+    @property
+    def gravado(self):
+        return bool(self.inseridos) and not (self.atomico and self.erros)
+
+    def resposta(self):
+        """
+        :return: (JSON body, HTTP status) — 201 when every row was inserted,
+                 207 when only some were (modo parcial), 400 when none was
+        """
+        resultados = []
+        for indice in range(self.total):
+            if indice in self.erros:
+                resultados.append({"linha": indice, "error": self.erros[indice]})
+            elif self.gravado:
+                resultados.append({"linha": indice, **dict(zip(self.modelo.retorno, self.inseridos[indice]))})
+            else:
+                resultados.append({"linha": indice, "error": "Não gravada: o lote tem erros (modo atomico)"})
+        inseridos = len(self.inseridos) if self.gravado else 0
+        corpo = {
+            "modo": "atomico" if self.atomico else "parcial",
+            "inseridos": inseridos,
+            "erros": len(self.erros),
+            "resultados": resultados,
+        }
+        if not self.erros:
+            return corpo, 201
+        return corpo, 207 if inseridos else 400
+
+
+def _validar(modelo, linhas, resultado):
+    """:return: índice -> row with the referenced ids converted to int"""
+    validas = {}
+    for indice, linha in enumerate(linhas):
+        if not isinstance(linha, dict):
+            resultado.erros[indice] = "A linha deve ser um objeto"
+            continue
+        faltando = [campo for campo in modelo.obrigatorios if linha.get(campo) is None]
+        if faltando:
+            resultado.erros[indice] = f"Campos obrigatórios não preenchidos: {', '.join(faltando)}"
+            continue
+        try:
+            validas[indice] = {**linha, **{coluna: int(linha[coluna]) for coluna in modelo.referencias}}
+        except (TypeError, ValueError):
+            resultado.erros[indice] = f"{', '.join(modelo.referencias)} deve ser um número inteiro"
+    return validas
+
+
+def _verificar_referencias(cursor, modelo, validas, resultado):
+    # Uma consulta por tabela referenciada, com todos os ids do lote
+    for coluna, (tabela, chave, mensagem) in modelo.referencias.items():
+        if not validas:
+            break
+        cursor.execute(f"SELECT {chave} FROM {tabela} WHERE {chave} = ANY(%s)",
+                       (sorted({linha[coluna] for linha in validas.values()}),))
+        existentes = {linha[0] for linha in cursor.fetchall()}
+        for indice, linha in list(validas.items()):
+            if linha[coluna] not in existentes:
+                resultado.erros[indice] = mensagem
+                del validas[indice]
+
+
+def _inserir(cursor, modelo, lote, resultado):
+    """
+    Multi-row INSERT of (índice, valores) inside a savepoint; on error the
+    batch is rolled back and split in halves until the failing rows are isolated.
+    """
+    try:
+        cursor.execute('SAVEPOINT lote')
+        retornos = execute_values(cursor, modelo.sql, [(indice, *valores) for indice, valores in lote],
+                                  template=modelo.modelo_valores, page_size=LINHAS_POR_INSERT, fetch=True)
+        cursor.execute('RELEASE SAVEPOINT lote')
+    except psycopg2.Error as e:
+        if cursor.connection.closed:
+            raise
+        cursor.execute('ROLLBACK TO SAVEPOINT lote; RELEASE SAVEPOINT lote')
+        if len(lote) == 1:
+            resultado.erros[lote[0][0]] = str(e).strip()
+            return
+        meio = len(lote) // 2
+        _inserir(cursor, modelo, lote[:meio], resultado)
+        _inserir(cursor, modelo, lote[meio:], resultado)
+        return
+    for indice, *retorno in retornos:
+        resultado.inseridos[indice] = tuple(retorno)
+
+
+def gravar(cursor, modelo, linhas, atomico=True):
+    """
+    Validate every row, check the referenced ids with one query per table and
+    insert the valid rows with multi-row VALUES, all in the caller's transaction.
+    In atomic mode nothing is inserted once a row fails validation; the caller
+    commits when `resultado.gravado` and rolls back otherwise.
+    :param cursor: psycopg2 cursor
+    :param modelo: Modelo
+    :param linhas: list of dicts (see ler_linhas)
+    :return: Resultado
+    """
+    resultado = Resultado(modelo, len(linhas), atomico)
+    validas = _validar(modelo, linhas, resultado)
+    _verificar_referencias(cursor, modelo, validas, resultado)
+    if validas and not (atomico and resultado.erros):
+        _inserir(cursor, modelo, [(indice, modelo.valores(linha)) for indice, linha in validas.items()], resultado)
+    return resultado
+
+
+def chamada(data):
+    """
+    Body of a whole-class roll call: data_presenca plus exactly one of
+    ausentes (everybody else is present) or presentes (everybody else is absent).
+    :return: (list of id_aluno, True when the list holds the present ones, data_presenca)
+    :raises ParametroInvalido: for a malformed body or a data_presenca that is not an ISO date
+    """
+    if not isinstance(data, dict) or not data.get('data_presenca'):
+        raise ParametroInvalido("Campos obrigatórios não preenchidos: data_presenca")
+    try:
+        datetime.date.fromisoformat(data['data_presenca'])
+    except (TypeError, ValueError):
+        raise ParametroInvalido("data_presenca deve estar no formato AAAA-MM-DD")
+    listas = [campo for campo in ('ausentes', 'presentes') if campo in data]
+    if len(listas) != 1:
+        raise ParametroInvalido("Informe ausentes ou presentes (apenas um dos dois)")
+    valores = data[listas[0]]
+    if not isinstance(valores, list):
+        raise ParametroInvalido(f"{listas[0]} deve ser uma lista de id_aluno")
+    try:
+        ids = [int(valor) for valor in valores]
+    except (TypeError, ValueError):
+        raise ParametroInvalido(f"{listas[0]} deve ser uma lista de id_aluno")
+    return ids, listas[0] == 'presentes', data['data_presenca']
+
+
+def resposta_chamada(id_turma, data_presenca, linha):
+    """JSON body of a roll call from the presenca_chamada row (turma already checked)."""
+    _, presentes, ausentes, alterados, ignorados = linha
+    return {
+        "id_turma": id_turma,
+        "data_presenca": data_presenca,
+        "presentes": presentes,
+        "ausentes": ausentes,
+        "alterados": alterados,
+        "ignorados": list(ignorados),
+    }
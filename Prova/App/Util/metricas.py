@@ -0,0 +1,209 @@
+import os
+import re
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+import psycopg2.extensions
+from flask import has_request_context, request
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+
+# Latência, linhas e erros por statement (fingerprint) e endpoint
+QUERY_DURACAO = Histogram(
+    'escola_db_query_duration_seconds',
+    'Tempo de execução dos statements SQL',
+    ['fingerprint', 'endpoint'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+QUERY_LINHAS = Histogram(
+    'escola_db_query_rows',
+    'Linhas retornadas ou afetadas pelos statements SQL',
+    ['fingerprint', 'endpoint'],
+    buckets=(0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000),
+)
+QUERY_ERROS = Counter(
+    'escola_db_query_errors_total',
+    'Statements SQL que terminaram em erro',
+    ['fingerprint', 'endpoint'],
+)
+
+# Circuit breaker do banco
+CIRCUITO_ESTADO = Gauge(
+    'escola_db_circuit_state',
+    'Estado do circuit breaker do banco (0 fechado, 1 semi-aberto, 2 aberto)',
+    multiprocess_mode='livemax',
+)
+CIRCUITO_ABERTURAS = Counter(
+    'escola_db_circuit_opened_total',
+    'Vezes que o circuit breaker do banco abriu',
+)
+CIRCUITO_REJEICOES = Counter(
+    'escola_db_circuit_rejections_total',
+    'Requisições rejeitadas com 503 enquanto o circuito estava aberto',
+)
+
+# Cache em processo dos dados de referência (Util/cache.py)
+CACHE_ACERTOS = Counter(
+    'escola_cache_hits_total',
+    'Leituras respondidas pelo cache (l1 em processo, l2 compartilhado)',
+    ['cache', 'nivel'],
+)
+CACHE_FALHAS = Counter(
+    'escola_cache_misses_total',
+    'Leituras que não estavam em nenhum nível do cache (ou tinham expirado)',
+    ['cache'],
+)
+CACHE_REMOCOES = Counter(
+    'escola_cache_evictions_total',
+    'Entradas removidas do cache por capacidade',
+    ['cache'],
+)
+CACHE_TAMANHO = Gauge(
+    'escola_cache_entries',
+    'Entradas no cache',
+    ['cache'],
+    multiprocess_mode='livesum',
+)
+
+# Compressão de respostas (Util/compressao.py)
+COMPRESSAO_ECONOMIA = Counter(
+    'escola_compression_bytes_saved_total',
+    'Bytes economizados pela compressão das respostas',
+    ['encoding'],
+)
+COMPRESSAO_CPU = Counter(
+    'escola_compression_cpu_seconds_total',
+    'Tempo de CPU gasto comprimindo respostas',
+    ['encoding'],
+)
+
+# Controle de admissão (Util/admissao.py)
+ADMISSAO_ATIVAS = Gauge(
+    'escola_admission_in_flight',
+    'Requisições em andamento por classe de endpoint',
+    ['classe'],
+    multiprocess_mode='livesum',
+)
+ADMISSAO_FILA = Gauge(
+    'escola_admission_queued',
+    'Requisições esperando vaga por classe de endpoint',
+    ['classe'],
+    multiprocess_mode='livesum',
+)
+ADMISSAO_REJEICOES = Counter(
+    'escola_admission_rejected_total',
+    'Requisições rejeitadas com 503 (fila cheia ou prazo de espera esgotado)',
+    ['classe', 'motivo'],
+)
+
+# Coalescência de GETs idênticos simultâneos (Util/coalescencia.py)
+COALESCENCIA = Counter(
+    'escola_coalescing_requests_total',
+    'GETs por papel: leader executa a consulta, follower reaproveita a resposta de um leader em andamento, '
+    'timeout é o follower que cansou de esperar e fez a própria consulta',
+    ['endpoint', 'role'],
+)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMERO = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_PARAMETRO = re.compile(r"%s|%\(\w+\)s|\$\d+")
+_LISTA = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_PREPARE = re.compile(r"^PREPARE (\w+) AS .*", re.S | re.I)
+_ESPACOS = re.compile(r"\s+")
+
+TAMANHO_MAXIMO = 200
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(sql):
+    """
+    Normalize a statement so executions with different values share a label:
+    literals and placeholders become ?, value lists collapse, whitespace folds.
+    Cached, so it must only see statement templates; text with bound values
+    (mogrify) is labeled with `rotulado` instead.
+    """
+    if isinstance(sql, bytes):
+        sql = sql.decode('utf-8', 'replace')
+    texto = _ESPACOS.sub(' ', sql).strip()
+    texto = _PREPARE.sub(r"PREPARE \1", texto)
+    texto = _STRING.sub('?', texto)
+    texto = _PARAMETRO.sub('?', texto)
+    texto = _NUMERO.sub('?', texto)
+    texto = _LISTA.sub('(?)', texto)
+    return texto[:TAMANHO_MAXIMO]
+
+
+def registro():
+    """
+    Registry served by /metrics. Under gunicorn (PROMETHEUS_MULTIPROC_DIR set
+    by gunicorn.conf.py) each worker writes its samples to that directory and
+    a scrape merges the files of all workers; otherwise the process registry.
+    """
+    if not os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        return REGISTRY
+    agregado = CollectorRegistry()
+    multiprocess.MultiProcessCollector(agregado)
+    return agregado
+
+
+def endpoint_atual():
+    if has_request_context() and request.endpoint:
+        return request.endpoint
+    return 'none'
+
+
+def observe(sql, duracao, linhas=None, erro=False, endpoint=None, rotulo=None):
+    """
+    Record one statement execution.
+    :param rotulo: label to use instead of the fingerprint of `sql`
+    """
+    chave = rotulo or fingerprint(sql)
+    endpoint = endpoint or endpoint_atual()
+    QUERY_DURACAO.labels(chave, endpoint).observe(duracao)
+    if erro:
+        QUERY_ERROS.labels(chave, endpoint).inc()
+    elif linhas is not None and linhas >= 0:
+        QUERY_LINHAS.labels(chave, endpoint).observe(linhas)
+
+
+class InstrumentedCursor(psycopg2.extensions.cursor):
+    """psycopg2 cursor that records latency, row count and errors of each statement."""
+
+    # Rótulo dos statements executados dentro de rotulado()
+    rotulo = None
+
+    def execute(self, query, vars=None):
+        inicio = time.perf_counter()
+        try:
+            resultado = super().execute(query, vars)
+        except Exception:
+            observe(query, time.perf_counter() - inicio, erro=True, rotulo=self.rotulo)
+            raise
+        observe(query, time.perf_counter() - inicio, self.rowcount, rotulo=self.rotulo)
+        return resultado
+
+    def executemany(self, query, vars_list):
+        inicio = time.perf_counter()
+        try:
+            resultado = super().executemany(query, vars_list)
+        except Exception:
+            observe(query, time.perf_counter() - inicio, erro=True, rotulo=self.rotulo)
+            raise
+        observe(query, time.perf_counter() - inicio, self.rowcount, rotulo=self.rotulo)
+        return resultado
+
+
+@contextmanager
+def rotulado(cursor, rotulo):
+    """
+    Record the statements run on `cursor` inside the block under `rotulo`
+    instead of their fingerprint (no-op for cursors that are not instrumented).
+    """
+    if not isinstance(cursor, InstrumentedCursor):
+        yield
+        return
+    cursor.rotulo = rotulo[:TAMANHO_MAXIMO]
+    try:
+        yield
+    finally:
+        cursor.rotulo = None
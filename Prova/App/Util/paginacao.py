@@ -0,0 +1,180 @@
+import base64
+import json
+import os
+
+from Util.entidades import ParametroInvalido
+
+# Tamanho de página padrão e máximo aceito em ?limit=
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 200
+# Máximo de ids aceitos em ?ids= (busca de vários registros numa consulta)
+MAX_IDS = int(os.getenv('API_MAX_IDS', 100))
+
+
+class Consulta:
+    """
+    Query of a list endpoint: either a keyset page (fetches limite + 1 rows to
+    detect a next page) or, when ids is set, a multi-get of those ids.
+    :param ordem: column that precedes the primary key in the page order (the
+                  column of a range filter), or None for primary key order
+    """
+
+    def __init__(self, entidade, sql, params, limite, colunas, ids=None, ordem=None):
+        self.entidade = entidade
+        self.sql = sql
+        self.params = params
+        self.limite = limite
+        self.colunas = colunas
+        self.ids = ids
+        self.ordem = ordem
+
+
+def codificar_cursor(chave, ordem=None):
+    """Opaque next-page token for the last row of a page: its primary key and, in (ordem, chave) order, its ordem value."""
+    dados = {'k': chave} if ordem is None else {'o': str(ordem), 'k': chave}
+    return base64.urlsafe_b64encode(json.dumps(dados).encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(token, conversor=None):
+    """
+    :param conversor: converter of the ordem value, for a page in (ordem, chave) order
+    :return: primary key encoded in the token, or (ordem, chave) with a conversor
+    :raises ParametroInvalido: for a malformed token, or one from a page in another order
+    """
+    try:
+        dados = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        chave = dados['k']
+        ordem = conversor(dados['o']) if conversor else None
+    except (ValueError, KeyError, TypeError):
+        raise ParametroInvalido("Cursor inválido")
+    # bool é subclasse de int: {"k": true} não é uma chave
+    if isinstance(chave, bool) or not isinstance(chave, int) or (conversor is None and 'o' in dados):
+        raise ParametroInvalido("Cursor inválido")
+    return chave if conversor is None else (ordem, chave)
+
+
+def limite(args):
+    """
+    Page size from ?limit=, bounded by LIMITE_MAXIMO.
+    :raises ParametroInvalido: when out of range
+    """
+    try:
+        valor = int(args.get('limit', LIMITE_PADRAO))
+    except ValueError:
+        raise ParametroInvalido("limit deve ser um número inteiro")
+    if not 1 <= valor <= LIMITE_MAXIMO:
+        raise ParametroInvalido(f"limit deve estar entre 1 e {LIMITE_MAXIMO}")
+    return valor
+
+
+def ids(valor):
+    """
+    Ids of ?ids=1,2,3 in request order.
+    :raises ParametroInvalido: for a non-integer id, an empty list or more than MAX_IDS ids
+    """
+    try:
+        lista = [int(parte) for parte in valor.split(',') if parte.strip()]
+    except ValueError:
+        raise ParametroInvalido("ids deve ser uma lista de números inteiros separados por vírgula")
+    if not lista:
+        raise ParametroInvalido("ids não pode ser vazio")
+    if len(lista) > MAX_IDS:
+        raise ParametroInvalido(f"No máximo {MAX_IDS} ids por requisição")
+    return lista
+
+
+def consulta(entidade, args, marcador=None):
+    """
+    Build the query of one page of a list endpoint.
+    Rows come in primary key order and the cursor turns into `chave > último`,
+    so every page is an index range scan no matter how deep it is. With a
+    range filter (data_inicio/data_fim) rows come in (column, primary key)
+    order instead and the cursor turns into `(coluna, chave) > (...)`, so the
+    (column, primary key) index serves the filter, the cursor and the ORDER BY.
+    With ?ids= the query is a single `chave = ANY(...)` lookup instead and the
+    cursor, filters and limit are ignored.
+    :param entidade: Util.entidades.Entidade
+    :param args: query string (request.args)
+    :param marcador: placeholder for the n-th parameter (default psycopg2 %s)
+    :return: Consulta
+    :raises ParametroInvalido: for an invalid cursor, filter, limit or ?fields=
+    """
+    colunas = entidade.projecao(args.get('fields')) or entidade.colunas
+    marcador = marcador or (lambda n: '%s')
+
+    if args.get('ids') is not None:
+        lista = ids(args['ids'])
+        sql = f"SELECT {', '.join(colunas)} FROM {entidade.tabela} WHERE {entidade.chave} = ANY({marcador(1)})"
+        return Consulta(entidade, sql, [sorted(set(lista))], len(lista), colunas, ids=lista)
+    condicoes = []
+    params = []
+    ordem = None
+
+    for nome, (coluna, operador, conversor) in entidade.filtros.items():
+        valor = args.get(nome)
+        if valor is None or valor == '':
+            continue
+        try:
+            params.append(conversor(valor))
+        except ValueError:
+            raise ParametroInvalido(f"Valor inválido para {nome}: {valor}")
+        condicoes.append(f"{coluna} {operador} {marcador(len(params))}")
+        if operador != '=':
+            ordem = (coluna, conversor)
+
+    token = args.get('cursor')
+    if token and ordem:
+        params.extend(decodificar_cursor(token, ordem[1]))
+        condicoes.append(
+            f"({ordem[0]}, {entidade.chave}) > ({marcador(len(params) - 1)}, {marcador(len(params))})"
+        )
+    elif token:
+        params.append(decodificar_cursor(token))
+        condicoes.append(f"{entidade.chave} > {marcador(len(params))}")
+
+    tamanho = limite(args)
+    selecionadas = colunas
+    if ordem and ordem[0] not in colunas:
+        # O valor da coluna de ordem vai no cursor mesmo fora da projeção; para_dict ignora a coluna a mais
+        selecionadas = colunas + (ordem[0],)
+    sql = f"SELECT {', '.join(selecionadas)} FROM {entidade.tabela}"
+    if condicoes:
+        sql += " WHERE " + " AND ".join(condicoes)
+    ordenacao = f"{ordem[0]}, {entidade.chave}" if ordem else entidade.chave
+    sql += f" ORDER BY {ordenacao} LIMIT {tamanho + 1}"
+    return Consulta(entidade, sql, params, tamanho, colunas, ordem=ordem and ordem[0])
+
+
+def pagina(consulta, linhas):
+    """
+    JSON body of a page.
+    :param linhas: rows fetched with consulta.sql (up to limite + 1)
+    :return: dict with items and next_cursor (None on the last page); for a
+             multi-get, items in request order with None for each miss, and
+             the missing ids
+    """
+    entidade = consulta.entidade
+    if consulta.ids is not None:
+        return _por_ids(consulta, linhas)
+    proximo = None
+    if len(linhas) > consulta.limite:
+        linhas = linhas[:consulta.limite]
+        ultima = linhas[-1]
+        ordem = None
+        if consulta.ordem:
+            ordem = ultima[(consulta.colunas + (consulta.ordem,)).index(consulta.ordem)]
+        proximo = codificar_cursor(ultima[consulta.colunas.index(entidade.chave)], ordem)
+    return {
+        "items": [entidade.para_dict(linha, consulta.colunas) for linha in linhas],
+        "next_cursor": proximo,
+    }
+
+
+def _por_ids(consulta, linhas):
+    entidade = consulta.entidade
+    posicao = consulta.colunas.index(entidade.chave)
+    por_chave = {linha[posicao]: entidade.para_dict(linha, consulta.colunas) for linha in linhas}
+    return {
+        "items": [por_chave.get(chave) for chave in consulta.ids],
+        "missing": [chave for chave in dict.fromkeys(consulta.ids) if chave not in por_chave],
+    }
@@ -0,0 +1,122 @@
+import datetime
+import decimal
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+from flask.json.provider import DefaultJSONProvider
+
+import Util.serializacao as serializacao
+
+_LINHA = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+# Diretório App/, de onde main.py é importado
+DIRETORIO_APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(saida):
+    """
+    Parse the stderr of `python -X importtime`.
+    :return: list of dicts (modulo, self_us, cumulative_us, nivel) in import order
+    """
+    modulos = []
+    for linha in saida.splitlines():
+        encontrado = _LINHA.match(linha)
+        if encontrado:
+            proprio, acumulado, recuo, nome = encontrado.groups()
+            modulos.append({
+                'modulo': nome,
+                'self_us': int(proprio),
+                'cumulative_us': int(acumulado),
+                'nivel': (len(recuo) - 1) // 2,
+            })
+    return modulos
+
+
+def importtime(modulo='main', env=None):
+    """
+    Import `modulo` in a fresh interpreter with -X importtime.
+    The warmup is disabled so only import cost is measured.
+    :return: parsed entries (see parse_importtime)
+    """
+    ambiente = dict(os.environ, APP_WARMUP='0', **(env or {}))
+    processo = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+        cwd=DIRETORIO_APP, env=ambiente, capture_output=True, text=True,
+    )
+    if processo.returncode != 0:
+        raise RuntimeError(processo.stderr.strip().splitlines()[-1])
+    return parse_importtime(processo.stderr)
+
+
+def relatorio(modulos, top=20):
+    """
+    Text report: total import time and the slowest modules by cumulative time.
+    """
+    raiz = [m for m in modulos if m['nivel'] == 0]
+    total = sum(m['cumulative_us'] for m in raiz)
+    linhas = [
+        f"Tempo total de importação: {total / 1000:.1f} ms ({len(modulos)} módulos)",
+        "",
+        f"{'acumulado (ms)':>15} {'próprio (ms)':>13}  módulo",
+    ]
+    for m in sorted(modulos, key=lambda m: m['cumulative_us'], reverse=True)[:top]:
+        linhas.append(
+            f"{m['cumulative_us'] / 1000:>15.1f} {m['self_us'] / 1000:>13.1f}  {'  ' * m['nivel']}{m['modulo']}"
+        )
+    return '\n'.join(linhas)
+
+
+def _payloads(linhas):
+    """Bodies shaped like a payments list page and a students JSON export."""
+    pagina = {
+        "items": [
+            {"id_pagamento": i, "id_aluno": i % 300, "data_pagamento": datetime.date(2024, 1 + i % 12, 1 + i % 28),
+             "valor_pago": decimal.Decimal('150.00') + i, "forma_pagamento": "pix", "referencia": f"REF{i:06d}",
+             "status": "pago"}
+            for i in range(linhas)
+        ],
+        "next_cursor": "eyJrIjogMTAwMH0",
+    }
+    exportacao = [
+        {"id_aluno": i, "nome_completo": f"Aluno Número {i}", "data_nascimento": datetime.date(2018, 1 + i % 12, 1),
+         "nome_responsavel": f"Responsável {i}", "telefone_responsavel": "(11) 99999-0000",
+         "email_responsavel": f"resp{i}@exemplo.com", "informacoes_adicionais": ""}
+        for i in range(linhas)
+    ]
+    return {'listagem': pagina, 'exportacao': exportacao}
+
+
+def medir_json(linhas=1000, repeticoes=20):
+    """
+    Micro-benchmark of response serialization: Flask's default provider
+    (standard library encoder) against Util.serializacao.dumps.
+    :return: list of dicts (payload, encoder, ms, bytes), best of `repeticoes`
+    """
+    encoders = {'json': lambda dados: json.dumps(dados, default=DefaultJSONProvider.default).encode('utf-8')}
+    if serializacao.orjson is not None:
+        encoders['orjson'] = serializacao.dumps
+    resultados = []
+    for nome, dados in _payloads(linhas).items():
+        for encoder, dumps in encoders.items():
+            melhor = float('inf')
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                saida = dumps(dados)
+                melhor = min(melhor, time.perf_counter() - inicio)
+            resultados.append({'payload': nome, 'encoder': encoder, 'ms': melhor * 1000, 'bytes': len(saida)})
+    return resultados
+
+
+def relatorio_json(resultados):
+    """Text report of medir_json, with the speedup over the standard library."""
+    base = {r['payload']: r['ms'] for r in resultados if r['encoder'] == 'json'}
+    linhas = [f"{'payload':<12} {'encoder':<8} {'ms':>9} {'bytes':>10} {'ganho':>7}"]
+    for r in resultados:
+        linhas.append(
+            f"{r['payload']:<12} {r['encoder']:<8} {r['ms']:>9.2f} {r['bytes']:>10} {base[r['payload']] / r['ms']:>6.1f}x"
+        )
+    return '\n'.join(linhas)
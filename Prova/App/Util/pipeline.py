@@ -0,0 +1,94 @@
+import psycopg2
+
+from Util.metricas import fingerprint, rotulado
+
+# Statements enviados por round trip
+TAMANHO_LOTE = 100
+
+
+class Pipeline:
+    """
+    Send groups of independent write statements to the server in one round trip.
+
+    psycopg2 has no libpq pipeline mode, so statements are bound client side
+    (mogrify) and joined into a single multi-statement query wrapped in a
+    savepoint. When the batch fails it is rolled back to the savepoint and split
+    in halves until the failing statements are isolated; the other statements
+    are applied, so each one keeps the error semantics of running it alone.
+
+    The result of each statement is its outcome, in `resultados`: None when it
+    was applied, or the exception it raised. A multi-statement query only
+    returns the rows and rowcount of its last statement, so statements that
+    read rows (e.g. the queries of a report) cannot be batched here and keep
+    their own round trips.
+
+    Usage::
+
+        with bd.Pipeline(cursor) as lote:
+            for linha in linhas:
+                lote.add(sql, params, chave=linha)
+        lote.resultados, lote.sucessos, lote.erros
+
+    :param cursor: psycopg2 cursor inside the caller's transaction
+    :param tamanho: statements per round trip
+    """
+
+    def __init__(self, cursor, tamanho=TAMANHO_LOTE):
+        self.cursor = cursor
+        self.tamanho = tamanho
+        self.sucessos = 0
+        self.erros = []  # (chave, exceção)
+        self.resultados = {}  # chave -> None (aplicado) ou exceção, na ordem de add
+        self.round_trips = 0
+        self._pendentes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        if tipo is None:
+            self.flush()
+        return False
+
+    def add(self, sql, params=None, chave=None):
+        """
+        Queue one statement. Binding errors are raised here, immediately.
+        :param chave: identifies the statement in `resultados` and `erros`
+                      (e.g. the CSV line); default: its position in the pipeline
+        """
+        if chave is None:
+            chave = len(self.resultados) + len(self._pendentes)
+        self._pendentes.append((self.cursor.mogrify(sql, params), chave, sql))
+        if len(self._pendentes) >= self.tamanho:
+            self.flush()
+
+    def flush(self):
+        """Send the queued statements and wait for all of their results."""
+        pendentes, self._pendentes = self._pendentes, []
+        if pendentes:
+            self._enviar(pendentes)
+
+    def _enviar(self, lote):
+        corpo = b'; '.join(sql for sql, _, _ in lote)
+        # O texto do lote é único (valores embutidos); a métrica usa os templates
+        modelos = dict.fromkeys(fingerprint(modelo) for _, _, modelo in lote)
+        try:
+            self.round_trips += 1
+            with rotulado(self.cursor, 'PIPELINE ' + '; '.join(modelos)):
+                self.cursor.execute(b'SAVEPOINT pipeline; ' + corpo + b'; RELEASE SAVEPOINT pipeline')
+        except psycopg2.Error as e:
+            if self.cursor.connection.closed:
+                raise
+            self.round_trips += 1
+            self.cursor.execute('ROLLBACK TO SAVEPOINT pipeline; RELEASE SAVEPOINT pipeline')
+            if len(lote) == 1:
+                self.erros.append((lote[0][1], e))
+                self.resultados[lote[0][1]] = e
+                return
+            meio = len(lote) // 2
+            self._enviar(lote[:meio])
+            self._enviar(lote[meio:])
+            return
+        self.sucessos += len(lote)
+        for _, chave, _ in lote:
+            self.resultados[chave] = None
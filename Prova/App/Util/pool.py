@@ -0,0 +1,295 @@
+import threading
+import time
+import os
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2.extensions import (
+    TRANSACTION_STATUS_IDLE,
+    TRANSACTION_STATUS_UNKNOWN,
+)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the checkout timeout."""
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """
+    psycopg2 connection that returns itself to its pool on close().
+    Handlers keep calling conn.close() in their finally blocks; the physical
+    connection is only closed when the pool discards it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool = None
+        self._emprestada = False
+        self.preparados = set()  # statements já preparados nesta sessão
+        self.criada_em = time.monotonic()
+        self.ultimo_uso = self.criada_em
+
+    def close(self):
+        if self._pool is not None and not self.closed:
+            self._pool.putconn(self)
+        else:
+            super().close()
+
+    def _encerrar(self):
+        # Fecha a conexão física, ignorando o pool
+        self._pool = None
+        if not self.closed:
+            super().close()
+
+
+class ConnectionPool:
+    """
+    Thread-safe PostgreSQL connection pool.
+
+    :param conectar: callable returning a new PooledConnection
+    :param minconn: connections kept open even when idle
+    :param maxconn: hard limit of open connections
+    :param max_lifetime: seconds after which a connection is recycled
+    :param timeout: seconds a checkout waits for a free connection
+    :param ping_apos: idle seconds after which a checkout runs a pre-ping
+    """
+
+    def __init__(self, conectar, minconn=1, maxconn=10, max_lifetime=1800,
+                 timeout=5.0, ping_apos=30.0):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("Limites do pool inválidos")
+        self._conectar = conectar
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.ping_apos = ping_apos
+        self.pid = os.getpid()
+
+        self._cond = threading.Condition()
+        self._livres = deque()
+        self._abertas = 0
+        self._em_uso = 0
+        self._fechado = False
+
+        self._esperas = 0
+        self._tempo_espera_total = 0.0
+        self._tempo_espera_max = 0.0
+        self._criadas = 0
+        self._recicladas = 0
+        self._descartadas = 0
+        self._timeouts = 0
+
+    # ------------------------------------------------------------------
+    # Checkout / devolução
+    # ------------------------------------------------------------------
+    def getconn(self, timeout=None):
+        """
+        Borrow a connection from the pool.
+        :param timeout: seconds to wait; defaults to the pool timeout
+        :return: PooledConnection
+        """
+        timeout = self.timeout if timeout is None else timeout
+        inicio = time.monotonic()
+        prazo = inicio + timeout
+        esperou = False
+
+        while True:
+            conn = None
+            criar = False
+            with self._cond:
+                if self._fechado:
+                    raise PoolTimeout("Pool encerrado")
+                while not self._livres and self._abertas >= self.maxconn:
+                    restante = prazo - time.monotonic()
+                    if restante <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f"Nenhuma conexão livre após {timeout:.1f}s "
+                            f"({self._em_uso}/{self.maxconn} em uso)"
+                        )
+                    esperou = True
+                    self._cond.wait(restante)
+                if self._livres:
+                    conn = self._livres.pop()
+                else:
+                    # Reserva a vaga antes de conectar fora do lock
+                    self._abertas += 1
+                    criar = True
+                self._em_uso += 1
+
+            if criar:
+                try:
+                    conn = self._criar()
+                except Exception:
+                    with self._cond:
+                        self._abertas -= 1
+                        self._em_uso -= 1
+                        self._cond.notify()
+                    raise
+            elif self._expirada(conn):
+                self._descartar(conn, em_uso=True, reciclada=True)
+                continue
+            elif not self._saudavel(conn):
+                self._descartar(conn, em_uso=True)
+                continue
+
+            if esperou:
+                self._registrar_espera(time.monotonic() - inicio)
+            conn._emprestada = True
+            conn.ultimo_uso = time.monotonic()
+            return conn
+
+    def putconn(self, conn):
+        """Return a borrowed connection to the pool."""
+        # close() repetido no mesmo empréstimo não devolve a conexão duas vezes
+        if not conn._emprestada:
+            return
+        conn._emprestada = False
+        if conn.closed or not self._limpar(conn):
+            self._descartar(conn, em_uso=True)
+            return
+        if self._expirada(conn):
+            self._descartar(conn, em_uso=True, reciclada=True)
+            return
+        with self._cond:
+            self._em_uso -= 1
+            if self._fechado:
+                self._abertas -= 1
+                conn._encerrar()
+                return
+            conn.ultimo_uso = time.monotonic()
+            self._livres.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Borrow a connection for the duration of a with-block."""
+        conn = self.getconn(timeout)
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def preencher(self, quantidade=None):
+        """
+        Open idle connections until `quantidade` (default minconn) exist.
+        :return: number of connections opened
+        """
+        alvo = self.minconn if quantidade is None else min(quantidade, self.maxconn)
+        abertas = 0
+        while True:
+            with self._cond:
+                if self._fechado or self._abertas >= alvo:
+                    return abertas
+                self._abertas += 1
+            try:
+                conn = self._criar()
+            except Exception:
+                with self._cond:
+                    self._abertas -= 1
+                raise
+            with self._cond:
+                self._livres.append(conn)
+                self._cond.notify()
+            abertas += 1
+
+    def closeall(self):
+        """Close every idle connection and refuse new checkouts."""
+        with self._cond:
+            self._fechado = True
+            livres = list(self._livres)
+            self._livres.clear()
+            self._abertas -= len(livres)
+            self._cond.notify_all()
+        for conn in livres:
+            conn._encerrar()
+
+    def stats(self):
+        """
+        Pool statistics.
+        :return: dict with in_use, idle, open, waits and wait times (seconds)
+        """
+        with self._cond:
+            return {
+                "min": self.minconn,
+                "max": self.maxconn,
+                "in_use": self._em_uso,
+                "idle": len(self._livres),
+                "open": self._abertas,
+                "created": self._criadas,
+                "recycled": self._recicladas,
+                "discarded": self._descartadas,
+                "waits": self._esperas,
+                "wait_time_total": round(self._tempo_espera_total, 6),
+                "wait_time_max": round(self._tempo_espera_max, 6),
+                "timeouts": self._timeouts,
+            }
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+    def _criar(self):
+        conn = self._conectar()
+        conn._pool = self
+        with self._cond:
+            self._criadas += 1
+        return conn
+
+    def _expirada(self, conn):
+        return (self.max_lifetime is not None
+                and time.monotonic() - conn.criada_em > self.max_lifetime)
+
+    def _saudavel(self, conn):
+        """Health check executed on checkout."""
+        if conn.closed:
+            return False
+        if conn.info.transaction_status == TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if self.ping_apos is not None and time.monotonic() - conn.ultimo_uso > self.ping_apos:
+            try:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute("SELECT 1")
+                finally:
+                    cursor.close()
+                conn.rollback()
+            except psycopg2.Error:
+                return False
+        return True
+
+    def _limpar(self, conn):
+        # Descarta transações esquecidas abertas pelo handler
+        try:
+            status = conn.info.transaction_status
+            if status == TRANSACTION_STATUS_UNKNOWN:
+                return False
+            if status != TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _descartar(self, conn, em_uso=False, reciclada=False):
+        with self._cond:
+            self._abertas -= 1
+            if em_uso:
+                self._em_uso -= 1
+            if reciclada:
+                self._recicladas += 1
+            else:
+                self._descartadas += 1
+            self._cond.notify()
+        try:
+            conn._encerrar()
+        except Exception:
+            pass
+
+    def _registrar_espera(self, duracao):
+        with self._cond:
+            self._esperas += 1
+            self._tempo_espera_total += duracao
+            if duracao > self._tempo_espera_max:
+                self._tempo_espera_max = duracao
@@ -0,0 +1,114 @@
+import itertools
+import threading
+import time
+
+import psycopg2
+from flask import has_request_context, request
+
+# Cookie/cabeçalho usados para ler as próprias escritas
+COOKIE_LEITURA_PRIMARIO = 'escola_rw'
+HEADER_LEITURA_PRIMARIO = 'X-Read-Your-Writes'
+
+METODOS_ESCRITA = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+SQL_LAG = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+_lock = threading.Lock()
+_lags = {}  # dsn -> (verificado_em, atraso em segundos)
+_rodizio = itertools.count()
+
+
+def ordem(replicas):
+    """
+    Replicas in round-robin order, starting at a different one on each call.
+    :param replicas: tuple of DSNs
+    :return: list of DSNs
+    """
+    inicio = next(_rodizio) % len(replicas)
+    return list(replicas[inicio:]) + list(replicas[:inicio])
+
+
+def lag_aceitavel(dsn, conn, max_lag, intervalo):
+    """
+    Check the replication lag of the replica behind `conn`.
+    The measured value is cached for `intervalo` seconds per replica.
+    :return: True when the replica may serve the read
+    """
+    agora = time.monotonic()
+    with _lock:
+        cache = _lags.get(dsn)
+    if cache is None or agora - cache[0] >= intervalo:
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(SQL_LAG)
+                atraso = float(cursor.fetchone()[0])
+            finally:
+                cursor.close()
+            conn.rollback()
+        except psycopg2.Error as e:
+            print(f"Erro ao medir atraso da réplica: {e}")
+            atraso = float('inf')
+        with _lock:
+            _lags[dsn] = (agora, atraso)
+    else:
+        atraso = cache[1]
+    return atraso <= max_lag
+
+
+def marcar_indisponivel(dsn):
+    """Keep an unreachable replica out of rotation until its next lag check."""
+    with _lock:
+        _lags[dsn] = (time.monotonic(), float('inf'))
+
+
+def lags():
+    """
+    Last measured lag per replica.
+    :return: dict dsn -> seconds (None when unreachable)
+    """
+    with _lock:
+        return {
+            dsn: None if atraso == float('inf') else atraso
+            for dsn, (_, atraso) in _lags.items()
+        }
+
+
+def leitura_exige_primario():
+    """
+    True when the current request asked to read its own writes, either with
+    the X-Read-Your-Writes header or through the cookie set after a write.
+    """
+    if not has_request_context():
+        return False
+    if request.headers.get(HEADER_LEITURA_PRIMARIO, '').lower() in ('1', 'true', 'yes'):
+        return True
+    valor = request.cookies.get(COOKIE_LEITURA_PRIMARIO)
+    if valor:
+        try:
+            return float(valor) > time.time()
+        except ValueError:
+            return False
+    return False
+
+
+def marcar_escrita(response, janela):
+    """
+    after_request hook: after a successful write, route this client's reads
+    to the primary for `janela` seconds (the maximum tolerated replica lag).
+    """
+    if request.method in METODOS_ESCRITA and response.status_code < 400 and janela > 0:
+        response.set_cookie(
+            COOKIE_LEITURA_PRIMARIO,
+            f"{time.time() + janela:.3f}",
+            max_age=int(janela) + 1,
+            httponly=True,
+            samesite='Lax',
+        )
+    return response
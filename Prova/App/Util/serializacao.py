@@ -0,0 +1,96 @@
+import datetime
+import decimal
+import json
+import os
+from functools import lru_cache
+
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Formato das datas nas respostas: 'http' (RFC 822, o padrão histórico do Flask) ou 'iso' (ISO 8601)
+FORMATO_DATA = os.getenv('API_FORMATO_DATA', 'http')
+
+
+@lru_cache(maxsize=4096)
+def _data_http(data):
+    # Datas se repetem muito entre linhas (nascimento, pagamento, presença); http_date é lento
+    return http_date(data)
+
+
+def padrao(o):
+    """
+    Encoding of the types the JSON encoders do not handle: dates (see
+    FORMATO_DATA) and Decimal values (as strings, keeping the cents exact).
+    """
+    if isinstance(o, datetime.date):
+        return _data_http(o) if FORMATO_DATA == 'http' else o.isoformat()
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def _opcoes(indentar=False, ordenar=False):
+    opcoes = orjson.OPT_NON_STR_KEYS
+    if FORMATO_DATA == 'http':
+        # orjson escreveria ISO 8601; as datas passam por padrao()
+        opcoes |= orjson.OPT_PASSTHROUGH_DATETIME
+    if indentar:
+        opcoes |= orjson.OPT_INDENT_2
+    if ordenar:
+        opcoes |= orjson.OPT_SORT_KEYS
+    return opcoes
+
+
+def dumps(dados, indentar=False, ordenar=False):
+    """
+    Serialize to UTF-8 JSON with the C encoder (orjson), or the standard
+    library when orjson is not installed; both write the same values.
+    :return: bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(dados, default=padrao, option=_opcoes(indentar, ordenar))
+    return json.dumps(dados, default=padrao, ensure_ascii=False, sort_keys=ordenar,
+                      indent=2 if indentar else None).encode('utf-8')
+
+
+def loads(dados):
+    if orjson is not None:
+        return orjson.loads(dados)
+    return json.loads(dados)
+
+
+class ProvedorJSON(DefaultJSONProvider):
+    """
+    Flask JSON provider (app.json) backed by dumps/loads above, so jsonify and
+    request.get_json use orjson. Keys keep the order the handlers built them
+    (table column order) instead of being sorted.
+    """
+
+    sort_keys = False
+    default = staticmethod(padrao)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, ordenar=self.sort_keys).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        dados = self._prepare_response_obj(args, kwargs)
+        indentar = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(
+            dumps(dados, indentar=indentar, ordenar=self.sort_keys) + b'\n', mimetype=self.mimetype
+        )
@@ -0,0 +1,41 @@
+import os
+
+import Util.aquecimento as aquecimento
+import Util.cache as cache
+import Util.config as config
+
+# Conexões que os workers da API podem abrir no PostgreSQL ao todo
+# (max_connections do servidor menos as reservadas a manutenção e ao exporter)
+MAX_CONEXOES_BANCO = int(os.getenv('DB_MAX_CONEXOES', 90))
+
+
+def dimensionar(cpus=None, pool_max=None, max_conexoes=MAX_CONEXOES_BANCO):
+    """
+    Default worker and thread counts of the production server.
+    One thread per pool connection, so a request never waits for a connection
+    its own worker cannot hand out; two workers per core (requests spend most
+    of their time waiting on PostgreSQL) as long as workers * pool_max fits
+    in max_conexoes.
+    :return: (workers, threads)
+    """
+    cpus = cpus or os.cpu_count() or 1
+    if pool_max is None:
+        try:
+            pool_max = config.get_config().pool['maxconn']
+        except Exception:
+            pool_max = 10
+    workers = max(1, min(cpus * 2, max_conexoes // pool_max))
+    return workers, pool_max
+
+
+def iniciar_worker(app, aquecer=True):
+    """
+    Per-worker setup after the fork of a preloaded app (gunicorn post_fork).
+    The master imported the application without warming it up; threads and
+    subscriptions do not survive fork, and a reload (SIGHUP to the master)
+    must pick up a new database configuration.
+    """
+    config.reload()
+    cache.configurar()
+    if aquecer:
+        aquecimento.iniciar(app)
@@ -0,0 +1,305 @@
+import re
+import threading
+import time
+
+import psycopg2
+import psycopg2.errors
+
+from Util.pool import PooledConnection
+
+# Consultas quentes dos módulos CRUD, preparadas uma vez por conexão do pool
+STATEMENTS = {
+    # alunos
+    # Escritas com chave estrangeira checam o pai no mesmo statement:
+    # nenhuma linha retornada significa pai inexistente (404)
+    'aluno_inserir': """
+        INSERT INTO alunos (nome_completo, data_nascimento, id_turma, nome_responsavel, telefone_responsavel,
+        email_responsavel, informacoes_adicionais)
+        SELECT %s, %s, id_turma, %s, %s, %s, %s
+        FROM turma WHERE id_turma = %s
+        RETURNING id_aluno
+    """,
+    'aluno_por_id': """
+        SELECT id_aluno, nome_completo, data_nascimento, id_turma, nome_responsavel, telefone_responsavel,
+        email_responsavel, informacoes_adicionais, versao
+        FROM alunos WHERE id_aluno = %s
+    """,
+    'aluno_versao': "SELECT versao FROM alunos WHERE id_aluno = %s",
+    'aluno_atualizar': """
+        UPDATE alunos
+        SET nome_completo = %s, data_nascimento = %s, id_turma = %s, nome_responsavel = %s, telefone_responsavel = %s,
+        email_responsavel = %s, informacoes_adicionais = %s
+        WHERE id_aluno = %s
+    """,
+    'aluno_remover': "DELETE FROM alunos WHERE id_aluno = %s",
+
+    # professor
+    'professor_inserir': """
+        INSERT INTO professor (nome_completo, email, telefone)
+        VALUES (%s, %s, %s)
+    """,
+    'professor_por_id': """
+        SELECT id_professor, nome_completo, email, telefone, versao
+        FROM professor WHERE id_professor = %s
+    """,
+    'professor_versao': "SELECT versao FROM professor WHERE id_professor = %s",
+    'professor_por_nome': "SELECT id_professor FROM professor WHERE nome_completo = %s",
+    'professor_atualizar': """
+        UPDATE professor
+        SET nome_completo = %s, email = %s, telefone = %s
+        WHERE id_professor = %s
+    """,
+    'professor_remover': "DELETE FROM professor WHERE id_professor = %s",
+
+    # turma
+    'turma_inserir': """
+        INSERT INTO turma (nome_turma, id_professor, horario)
+        SELECT %s, id_professor, %s
+        FROM professor WHERE nome_completo = %s
+        ORDER BY id_professor LIMIT 1
+        RETURNING id_turma
+    """,
+    'turma_por_id': "SELECT id_turma, nome_turma, id_professor, horario, versao FROM turma WHERE id_turma = %s",
+    'turma_versao': "SELECT versao FROM turma WHERE id_turma = %s",
+    'turma_atualizar': """
+        UPDATE turma
+        SET nome_turma = %s, id_professor = %s, horario = %s
+        WHERE id_turma = %s
+    """,
+    'turma_remover': "DELETE FROM turma WHERE id_turma = %s",
+
+    # pagamento
+    'pagamento_inserir': """
+        INSERT INTO pagamento (id_aluno, data_pagamento, valor_pago, forma_pagamento, referencia, status)
+        SELECT id_aluno, %s, %s, %s, %s, %s
+        FROM alunos WHERE id_aluno = %s
+        RETURNING id_pagamento
+    """,
+    'pagamento_por_id': """
+        SELECT id_pagamento, id_aluno, data_pagamento, valor_pago, forma_pagamento, referencia, status, versao
+        FROM pagamento WHERE id_pagamento = %s
+    """,
+    'pagamento_versao': "SELECT versao FROM pagamento WHERE id_pagamento = %s",
+    'pagamento_atualizar': """
+        UPDATE pagamento
+        SET id_aluno = %s, data_pagamento = %s, valor_pago = %s, forma_pagamento = %s, referencia = %s, status = %s
+        WHERE id_pagamento = %s
+    """,
+    'pagamento_remover': "DELETE FROM pagamento WHERE id_pagamento = %s RETURNING id_pagamento",
+
+    # presenca
+    'presenca_inserir': """
+        INSERT INTO presenca (id_aluno, data_presenca, presente)
+        SELECT id_aluno, %s, %s
+        FROM alunos WHERE id_aluno = %s
+        ON CONFLICT (id_aluno, data_presenca) DO UPDATE SET presente = EXCLUDED.presente
+        RETURNING id_presenca
+    """,
+    # Chamada da turma inteira: uma linha por aluno da turma, presente conforme a
+    # lista (presentes ou ausentes); reenviar a mesma chamada não altera nada
+    'presenca_chamada': """
+        WITH alvo AS (
+            SELECT id_turma FROM turma WHERE id_turma = %s
+        ), lista AS (
+            SELECT DISTINCT unnest(%s::int[]) AS id_aluno
+        ), chamada AS (
+            SELECT a.id_aluno, (a.id_aluno IN (SELECT id_aluno FROM lista)) = %s::boolean AS presente
+            FROM alunos a JOIN alvo ON a.id_turma = alvo.id_turma
+        ), gravadas AS (
+            INSERT INTO presenca (id_aluno, data_presenca, presente)
+            SELECT id_aluno, %s::date, presente FROM chamada
+            ON CONFLICT (id_aluno, data_presenca) DO UPDATE SET presente = EXCLUDED.presente
+            WHERE presenca.presente IS DISTINCT FROM EXCLUDED.presente
+            RETURNING id_aluno
+        )
+        SELECT EXISTS (SELECT 1 FROM alvo),
+               (SELECT count(*) FROM chamada WHERE presente),
+               (SELECT count(*) FROM chamada WHERE NOT presente),
+               (SELECT count(*) FROM gravadas),
+               ARRAY(SELECT id_aluno FROM lista EXCEPT SELECT id_aluno FROM chamada ORDER BY 1)
+    """,
+    'presenca_por_id': """
+        SELECT id_presenca, id_aluno, data_presenca, presente, versao
+        FROM presenca WHERE id_presenca = %s
+    """,
+    'presenca_versao': "SELECT versao FROM presenca WHERE id_presenca = %s",
+    'presenca_atualizar': """
+        UPDATE presenca SET id_aluno = %s, data_presenca = %s, presente = %s
+        WHERE id_presenca = %s
+    """,
+    'presenca_remover': "DELETE FROM presenca WHERE id_presenca = %s",
+
+    # atividade
+    'atividade_inserir': """
+        INSERT INTO atividade (descricao, data_realizacao)
+        VALUES (%s, %s)
+    """,
+    'atividade_por_id': """
+        SELECT id_atividade, descricao, data_realizacao, versao
+        FROM atividade WHERE id_atividade = %s
+    """,
+    'atividade_versao': "SELECT versao FROM atividade WHERE id_atividade = %s",
+    'atividade_atualizar': """
+        UPDATE atividade
+        SET descricao = %s, data_realizacao = %s
+        WHERE id_atividade = %s
+    """,
+    'atividade_remover': "DELETE FROM atividade WHERE id_atividade = %s",
+
+    # atividade_aluno
+    # Retorna (aluno existe, atividade existe); só insere quando os dois existem
+    'atividade_aluno_inserir': """
+        WITH pais AS (
+            SELECT (SELECT id_aluno FROM alunos WHERE id_aluno = %s) AS id_aluno,
+                   (SELECT id_atividade FROM atividade WHERE id_atividade = %s) AS id_atividade
+        ), inserida AS (
+            INSERT INTO atividade_aluno (id_atividade, id_aluno)
+            SELECT id_atividade, id_aluno FROM pais
+            WHERE id_aluno IS NOT NULL AND id_atividade IS NOT NULL
+            RETURNING id_atividade
+        )
+        SELECT id_aluno IS NOT NULL, id_atividade IS NOT NULL FROM pais
+    """,
+    'atividade_aluno_detalhe': """
+        SELECT aa.id_atividade, aa.id_aluno, at.descricao, at.data_realizacao, al.nome_completo
+        FROM atividade_aluno aa
+        JOIN atividade at ON aa.id_atividade = at.id_atividade
+        JOIN alunos al ON aa.id_aluno = al.id_aluno
+        WHERE aa.id_atividade = %s AND aa.id_aluno = %s
+    """,
+    'atividade_aluno_remover': """
+        DELETE FROM atividade_aluno WHERE id_atividade = %s AND id_aluno = %s
+        RETURNING id_atividade
+    """,
+    'atividade_aluno_por_aluno': """
+        SELECT aa.id_atividade, aa.id_aluno, at.descricao, at.data_realizacao
+        FROM atividade_aluno aa
+        JOIN atividade at ON aa.id_atividade = at.id_atividade
+        WHERE aa.id_aluno = %s
+    """,
+
+    # usuario
+    'usuario_inserir': """
+        INSERT INTO usuario (login, senha, nivel_acesso, id_professor)
+        VALUES (%s, %s, %s, %s)
+    """,
+    'usuario_por_id': """
+        SELECT id_usuario, login, senha, nivel_acesso, id_professor, versao
+        FROM usuario WHERE id_usuario = %s
+    """,
+    'usuario_versao': "SELECT versao FROM usuario WHERE id_usuario = %s",
+    'usuario_atualizar': """
+        UPDATE usuario
+        SET login = %s, senha = %s, nivel_acesso = %s, id_professor = %s
+        WHERE id_usuario = %s
+    """,
+    'usuario_remover': "DELETE FROM usuario WHERE id_usuario = %s",
+}
+
+_PLACEHOLDER = re.compile(r'%s')
+
+
+def _para_prepare(sql):
+    """
+    Convert psycopg2 %s placeholders to $1..$n.
+    :return: (sql, number of parameters)
+    """
+    contador = iter(range(1, 1000))
+    convertido = _PLACEHOLDER.sub(lambda m: f'${next(contador)}', sql)
+    return convertido.replace('%%', '%').strip(), next(contador) - 1
+
+
+def _preparar(cursor, conn, nome):
+    try:
+        cursor.execute(f"PREPARE {nome} AS {_PREPARADOS[nome][0]}")
+    except psycopg2.errors.DuplicatePreparedStatement:
+        # Já existia na sessão; a transação abortou, mas a próxima chamada usa EXECUTE
+        conn.preparados.add(nome)
+        raise
+    conn.preparados.add(nome)
+
+
+# Formas PREPARE de cada statement, calculadas uma vez
+_PREPARADOS = {nome: _para_prepare(sql) for nome, sql in STATEMENTS.items()}
+
+_lock = threading.Lock()
+_estatisticas = {nome: [0, 0.0, 0] for nome in STATEMENTS}  # chamadas, tempo, erros
+
+
+def execute(cursor, nome, params=()):
+    """
+    Execute a registered statement by name.
+    On pooled connections the statement is PREPAREd the first time it runs on
+    that connection and EXECUTEd by name afterwards;
+    any other connection runs the plain SQL.
+    :param cursor: psycopg2 cursor
+    :param nome: key of STATEMENTS
+    :param params: sequence of parameters
+    """
+    total = _PREPARADOS[nome][1]
+    conn = getattr(cursor, 'connection', None)
+    inicio = time.perf_counter()
+    erro = False
+    try:
+        if isinstance(conn, PooledConnection):
+            if nome not in conn.preparados:
+                _preparar(cursor, conn, nome)
+            args = f" ({', '.join(['%s'] * total)})" if total else ""
+            try:
+                cursor.execute(f"EXECUTE {nome}{args}", params)
+            except psycopg2.errors.InvalidSqlStatementName:
+                # Sessão perdeu o statement (ex.: DISCARD); prepara de novo na próxima chamada
+                conn.preparados.discard(nome)
+                raise
+        else:
+            cursor.execute(STATEMENTS[nome], params)
+    except Exception:
+        erro = True
+        raise
+    finally:
+        record(nome, time.perf_counter() - inicio, erro)
+
+
+def preparar_todos(cursor):
+    """
+    PREPARE every registered statement not yet prepared on the cursor's
+    pooled connection, all in one round trip (used by the startup warmup).
+    :return: number of statements prepared
+    """
+    conn = cursor.connection
+    nomes = [nome for nome in _PREPARADOS if nome not in conn.preparados]
+    if nomes:
+        cursor.execute('; '.join(f"PREPARE {nome} AS {_PREPARADOS[nome][0]}" for nome in nomes))
+        conn.preparados.update(nomes)
+    return len(nomes)
+
+
+def record(nome, duracao, erro=False):
+    """Account one execution of a registered statement."""
+    with _lock:
+        estatistica = _estatisticas[nome]
+        estatistica[0] += 1
+        estatistica[1] += duracao
+        if erro:
+            estatistica[2] += 1
+
+
+def prepared_sql(nome):
+    """
+    SQL of a registered statement with $1..$n placeholders
+    (the form used by PREPARE and by asyncpg).
+    """
+    return _PREPARADOS[nome][0]
+
+
+def stats():
+    """
+    Per-statement call count, cumulative time (seconds) and errors.
+    :return: dict nome -> {calls, total_time, errors}
+    """
+    with _lock:
+        return {
+            nome: {'calls': chamadas, 'total_time': round(tempo, 6), 'errors': erros}
+            for nome, (chamadas, tempo, erros) in _estatisticas.items()
+            if chamadas
+        }
@@ -0,0 +1,815 @@
+# asgi.py - modo assíncrono da API (asyncpg + Starlette)
+#
+# Mesmas URLs e mesmos JSON dos módulos crud*.py, mas cada requisição aguardando
+# o PostgreSQL não prende uma thread. Executar com:
+#   uvicorn asgi:app --host 0.0.0.0 --port 5000
+import asyncio
+import contextvars
+import datetime
+import decimal
+import time
+from contextlib import asynccontextmanager
+
+import asyncpg
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import Response
+from starlette.routing import Route
+
+import Util.admissao as admissao
+import Util.aquecimento as aquecimento
+import Util.cache as cache
+import Util.coalescencia as coalescencia
+import Util.compressao as compressao
+import Util.config as config
+import Util.entidades as entidades
+import Util.etag as etag
+import Util.lote as lote
+from Util.bd import breaker
+from Util.circuito import CircuitOpenError
+import Util.metricas as metricas
+import Util.paginacao as paginacao
+import Util.serializacao as serializacao
+import Util.statements as statements
+
+_pool = None
+# Criados no lifespan, dentro do event loop do servidor (no Python 3.9 as
+# primitivas do asyncio se prendem ao loop corrente quando são criadas)
+_pool_lock = None
+_pronto = None
+_endpoint = contextvars.ContextVar('endpoint', default='none')
+
+CAMPOS_DATA = {'data_nascimento', 'data_pagamento', 'data_presenca', 'data_realizacao'}
+CAMPOS_INTEIROS = {'id_turma', 'id_aluno', 'id_professor', 'id_atividade'}
+
+
+def jsonify(dados, status=200, headers=None):
+    # Mesmo encoder e formato de datas/Decimal do modo Flask (Util/serializacao.py)
+    return Response(
+        serializacao.dumps(dados),
+        status_code=status,
+        headers=headers,
+        media_type='application/json',
+    )
+
+
+class _NaoModificado(Exception):
+    """If-None-Match matched: rota answers 304 with these headers."""
+
+    def __init__(self, cabecalhos):
+        self.cabecalhos = cabecalhos
+
+
+def _param(data, campo):
+    """
+    Read a field from the request body converting it to the type asyncpg
+    expects (psycopg2 accepted the raw JSON value as a literal).
+    """
+    valor = data[campo]
+    if valor is None:
+        return None
+    if campo in CAMPOS_DATA and isinstance(valor, str):
+        return datetime.date.fromisoformat(valor)
+    if campo in CAMPOS_INTEIROS:
+        return int(valor)
+    if campo == 'valor_pago':
+        return decimal.Decimal(str(valor))
+    return valor
+
+
+async def _get_pool():
+    global _pool, _pool_lock
+    if _pool is None:
+        if _pool_lock is None:
+            # Sem lifespan (ex.: TestClient fora de um bloco with)
+            _pool_lock = asyncio.Lock()
+        async with _pool_lock:
+            if _pool is None:
+                cfg = config.get_config()
+                _pool = await asyncpg.create_pool(
+                    min_size=cfg.pool['minconn'],
+                    max_size=cfg.pool['maxconn'],
+                    max_inactive_connection_lifetime=cfg.pool['max_lifetime'],
+                    timeout=cfg.timeouts['connect_timeout'],
+                    command_timeout=cfg.timeouts['statement_timeout'] / 1000,
+                    server_settings={'statement_timeout': str(cfg.timeouts['statement_timeout'])},
+                    **cfg.conexao,
+                )
+    return _pool
+
+
+async def _sql(conn, metodo, nome, *params):
+    # asyncpg prepara e guarda o statement por conexão automaticamente
+    sql = statements.prepared_sql(nome)
+    inicio = time.perf_counter()
+    erro = False
+    linhas = None
+    try:
+        resultado = await getattr(conn, metodo)(sql, *params)
+        if metodo == 'fetch':
+            linhas = len(resultado)
+        elif metodo in ('fetchrow', 'fetchval'):
+            linhas = 0 if resultado is None else 1
+        else:
+            linhas = _linhas_afetadas(resultado)
+        return resultado
+    except Exception:
+        erro = True
+        raise
+    finally:
+        duracao = time.perf_counter() - inicio
+        statements.record(nome, duracao, erro)
+        metricas.observe(sql, duracao, linhas, erro, endpoint=_endpoint.get())
+
+
+def _linhas_afetadas(status):
+    # asyncpg devolve o comando, ex.: "DELETE 1"
+    try:
+        return int(status.split()[-1])
+    except (AttributeError, ValueError, IndexError):
+        return None
+
+
+def _indisponivel(erro):
+    resposta = jsonify({"error": "Banco de dados indisponível"}, 503)
+    resposta.headers['Retry-After'] = str(erro.retry_after)
+    return resposta
+
+
+def rota(func):
+    """Borrow a connection for the handler and map errors like the sync modules."""
+    async def endpoint(request):
+        _endpoint.set(func.__name__)
+        limitador = admissao.LIMITADORES_ASYNC[admissao.classe(request.method, request.url.path)]
+        try:
+            await limitador.entrar()
+        except admissao.Sobrecarga as e:
+            return jsonify({"error": str(e)}, 503, headers={"Retry-After": str(e.retry_after)})
+        try:
+            return await _executar(func, request)
+        finally:
+            await limitador.sair()
+    endpoint.__name__ = func.__name__
+    return endpoint
+
+
+def coalescido(endpoint):
+    """Identical concurrent GETs share one execution of the endpoint (see Util/coalescencia.py)."""
+    async def compartilhado(request):
+        identidade = coalescencia.chave(
+            endpoint.__name__, request.path_params, request.query_params.multi_items(),
+            request.headers.get('if-none-match'),
+        )
+
+        async def executar():
+            resposta = await endpoint(request)
+            return resposta.body, resposta.status_code, resposta.raw_headers
+
+        corpo, status, cabecalhos = await coalescencia.VOOS_ASYNC.executar(identidade, executar, endpoint.__name__)
+        resposta = Response(corpo, status_code=status)
+        resposta.raw_headers = list(cabecalhos)
+        return resposta
+    compartilhado.__name__ = endpoint.__name__
+    return compartilhado
+
+
+async def _executar(func, request):
+    # Circuito, conexão do pool e mapeamento de erros de um endpoint já admitido
+    try:
+        breaker.check()
+    except CircuitOpenError as e:
+        return _indisponivel(e)
+    try:
+        pool = await _get_pool()
+        conn = await pool.acquire(timeout=config.get_config().pool['timeout'])
+    except asyncio.TimeoutError as e:
+        # Pool esgotado não indica banco fora do ar
+        print(f"Error connecting to PostgreSQL: {e}")
+        return jsonify({"error": "Connection to DB failed"}, 500)
+    except (OSError, asyncpg.PostgresError) as e:
+        print(f"Error connecting to PostgreSQL: {e}")
+        breaker.falha()
+        return jsonify({"error": "Connection to DB failed"}, 500)
+    except Exception as e:
+        print(f"Error connecting to PostgreSQL: {e}")
+        return jsonify({"error": "Connection to DB failed"}, 500)
+    breaker.sucesso()
+    try:
+        resposta = await func(request, conn, **request.path_params)
+        if request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and resposta.status_code < 400:
+            # Mesmos grupos dos blueprints do Flask: /alunos/... -> alunos
+            cache.invalidar_grupo(request.url.path.split('/')[1])
+        return resposta
+    except entidades.ParametroInvalido as e:
+        return jsonify({"error": str(e)}, 400)
+    except _NaoModificado as e:
+        return Response(status_code=304, headers=e.cabecalhos)
+    except Exception as e:
+        return jsonify({"error": str(e)}, 500)
+    finally:
+        await pool.release(conn)
+
+
+async def _corpo(request):
+    return await request.json()
+
+
+async def _por_chave(request, conn, entidade, prefixo, chave, memoria=None):
+    """
+    Row by primary key honouring ?fields=, pushed down into the column list,
+    and If-None-Match, checked against the row version before reading the row.
+    :param prefixo: statement prefix (aluno -> aluno_por_id, aluno_versao)
+    :param memoria: Util.cache.CacheLRU of the full rows (reference entities)
+    :return: (row or None, projected columns or None, ETag headers or None)
+    :raises entidades.ParametroInvalido: for an unknown field
+    :raises _NaoModificado: when If-None-Match matches the current version
+    """
+    campos = entidade.projecao(request.query_params.get('fields'))
+    if_none_match = request.headers.get('if-none-match')
+    usar_cache = memoria is not None and not campos
+    if usar_cache:
+        linha = memoria.get(chave)
+        if linha is not None:
+            versao = entidade.versao(linha)
+            if if_none_match and etag.corresponde(if_none_match, versao):
+                raise _NaoModificado(etag.cabecalhos(versao))
+            return linha, None, etag.cabecalhos(versao)
+        geracao = memoria.geracao()
+    if if_none_match:
+        versao = await _sql(conn, 'fetchval', f'{prefixo}_versao', chave)
+        if versao is not None and etag.corresponde(if_none_match, versao, campos):
+            raise _NaoModificado(etag.cabecalhos(versao, campos))
+    if not campos:
+        linha = await _sql(conn, 'fetchrow', f'{prefixo}_por_id', chave)
+    else:
+        sql = entidade.sql_por_chave(campos, marcador='$1')
+        inicio = time.perf_counter()
+        linha = await conn.fetchrow(sql, chave)
+        metricas.observe(sql, time.perf_counter() - inicio, 0 if linha is None else 1, endpoint=_endpoint.get())
+    if linha is None:
+        return None, campos, None
+    if usar_cache:
+        memoria.set(chave, tuple(linha), geracao)
+    return linha, campos, etag.cabecalhos(entidade.versao(linha, campos), campos)
+
+
+def _listagem(entidade, nome):
+    """List endpoint with keyset pagination (see Util/paginacao.py)."""
+    async def listar(request, conn):
+        try:
+            consulta = paginacao.consulta(entidade, request.query_params, marcador=lambda n: f'${n}')
+        except paginacao.ParametroInvalido as e:
+            return jsonify({"error": str(e)}, 400)
+        inicio = time.perf_counter()
+        linhas = await conn.fetch(consulta.sql, *consulta.params)
+        metricas.observe(consulta.sql, time.perf_counter() - inicio, len(linhas), endpoint=nome)
+        return jsonify(paginacao.pagina(consulta, linhas))
+    listar.__name__ = nome
+    return coalescido(rota(listar))
+
+
+listar_alunos = _listagem(entidades.ALUNOS, 'listar_alunos')
+listar_professores = _listagem(entidades.PROFESSORES, 'listar_professores')
+listar_turmas = _listagem(entidades.TURMAS, 'listar_turmas')
+listar_pagamentos = _listagem(entidades.PAGAMENTOS, 'listar_pagamentos')
+listar_presencas = _listagem(entidades.PRESENCAS, 'listar_presencas')
+listar_atividades = _listagem(entidades.ATIVIDADES, 'listar_atividades')
+
+
+# ---------------------------------------------------------------------------
+# Alunos
+# ---------------------------------------------------------------------------
+@rota
+async def adicionar_aluno(request, conn):
+    data = await _corpo(request)
+    required_fields = ['nome_completo', 'data_nascimento', 'id_turma', 'nome_responsavel',
+                       'telefone_responsavel', 'email_responsavel']
+    missing_fields = [field for field in required_fields if field not in data]
+    if missing_fields:
+        return jsonify({"error": f"Campos obrigatórios não preenchidos: {', '.join(missing_fields)}"}, 400)
+
+    try:
+        aluno = await _sql(
+            conn, 'fetchrow', 'aluno_inserir',
+            data['nome_completo'], _param(data, 'data_nascimento'),
+            data['nome_responsavel'], data['telefone_responsavel'], data['email_responsavel'],
+            data.get('informacoes_adicionais', ''), _param(data, 'id_turma')
+        )
+    except asyncpg.ForeignKeyViolationError:
+        aluno = None
+    if aluno is None:
+        return jsonify({"error": "Turma não encontrada"}, 404)
+    return jsonify({"message": "Aluno adicionado"}, 201)
+
+
+@coalescido
+@rota
+async def read_aluno(request, conn, id_aluno):
+    aluno, campos, cabecalhos = await _por_chave(request, conn, entidades.ALUNOS, 'aluno', id_aluno)
+    if aluno is None:
+        return jsonify({"error": "Aluno não encontrado"}, 404)
+    if campos:
+        return jsonify(entidades.ALUNOS.para_dict(aluno, campos), headers=cabecalhos)
+    return jsonify({
+        "id_aluno": aluno[0],
+        "nome_completo": aluno[1],
+        "data_nascimento": aluno[2],
+        "id_turma": aluno[3],
+        "nome_responsavel": aluno[4],
+        "telefone_responsavel": aluno[5],
+        "email_responsavel": aluno[6],
+        "informacoes_adicionais": aluno[7],
+    }, headers=cabecalhos)
+
+
+@rota
+async def update_aluno(request, conn, id_aluno):
+    data = await _corpo(request)
+    await _sql(
+        conn, 'execute', 'aluno_atualizar',
+        data['nome_completo'], _param(data, 'data_nascimento'), _param(data, 'id_turma'),
+        data['nome_responsavel'], data['telefone_responsavel'], data['email_responsavel'],
+        data['informacoes_adicionais'], id_aluno
+    )
+    return jsonify({"message": "Aluno atualizado"})
+
+
+@rota
+async def delete_aluno(request, conn, id_aluno):
+    await _sql(conn, 'execute', 'aluno_remover', id_aluno)
+    return jsonify({"message": "Aluno deletado"})
+
+
+# ---------------------------------------------------------------------------
+# Professores
+# ---------------------------------------------------------------------------
+@rota
+async def adicionar_professor(request, conn):
+    data = await _corpo(request)
+    if not all([field in data for field in ['nome_completo', 'email', 'telefone']]):
+        return jsonify({"error": "Campos obrigatórios não preenchidos"}, 400)
+    await _sql(conn, 'execute', 'professor_inserir', data['nome_completo'], data['email'], data['telefone'])
+    return jsonify({"message": "Professor adicionado"}, 201)
+
+
+@coalescido
+@rota
+async def read_professor(request, conn, id_professor):
+    professor, campos, cabecalhos = await _por_chave(
+        request, conn, entidades.PROFESSORES, 'professor', id_professor, memoria=cache.PROFESSORES
+    )
+    if professor is None:
+        return jsonify({"error": "Professor não encontrado"}, 404)
+    if campos:
+        return jsonify(entidades.PROFESSORES.para_dict(professor, campos), headers=cabecalhos)
+    return jsonify({
+        "id_professor": professor[0],
+        "nome_completo": professor[1],
+        "email": professor[2],
+        "telefone": professor[3],
+    }, headers=cabecalhos)
+
+
+@rota
+async def update_professor(request, conn, id_professor):
+    data = await _corpo(request)
+    await _sql(
+        conn, 'execute', 'professor_atualizar',
+        data['nome_completo'], data['email'], data['telefone'], id_professor
+    )
+    cache.PROFESSORES.invalidar(id_professor)
+    return jsonify({"message": "Professor atualizado"})
+
+
+@rota
+async def delete_professor(request, conn, id_professor):
+    await _sql(conn, 'execute', 'professor_remover', id_professor)
+    cache.PROFESSORES.invalidar(id_professor)
+    return jsonify({"message": "Professor deletado"})
+
+
+# ---------------------------------------------------------------------------
+# Turmas
+# ---------------------------------------------------------------------------
+@rota
+async def adicionar_turma(request, conn):
+    data = await _corpo(request)
+    if not all([field in data for field in ['nome_completo', 'nome_turma', 'horario']]):
+        return jsonify({"error": "Campos obrigatórios não preenchidos"}, 400)
+    try:
+        turma = await _sql(conn, 'fetchrow', 'turma_inserir', data['nome_turma'], data['horario'], data['nome_completo'])
+    except asyncpg.ForeignKeyViolationError:
+        turma = None
+    if turma is None:
+        return jsonify({"error": "Professor não encontrado"}, 404)
+    return jsonify({"message": "Turma adicionada com sucesso"}, 201)
+
+
+@coalescido
+@rota
+async def read_turma(request, conn, id_turma):
+    turma, campos, cabecalhos = await _por_chave(
+        request, conn, entidades.TURMAS, 'turma', id_turma, memoria=cache.TURMAS
+    )
+    if turma is None:
+        return jsonify({"error": "Turma não encontrada"}, 404)
+    if campos:
+        return jsonify(entidades.TURMAS.para_dict(turma, campos), headers=cabecalhos)
+    return jsonify({
+        "id_turma": turma[0],
+        "nome_turma": turma[1],
+        "id_professor": turma[2],
+        "horario": turma[3],
+    }, headers=cabecalhos)
+
+
+@rota
+async def update_turma(request, conn, id_turma):
+    data = await _corpo(request)
+    await _sql(
+        conn, 'execute', 'turma_atualizar',
+        data['nome_turma'], _param(data, 'id_professor'), data['horario'], id_turma
+    )
+    cache.TURMAS.invalidar(id_turma)
+    return jsonify({"message": "Turma atualizada com sucesso"})
+
+
+@rota
+async def delete_turma(request, conn, id_turma):
+    await _sql(conn, 'execute', 'turma_remover', id_turma)
+    cache.TURMAS.invalidar(id_turma)
+    return jsonify({"message": "Turma deletada com sucesso"})
+
+
+# ---------------------------------------------------------------------------
+# Pagamentos
+# ---------------------------------------------------------------------------
+@rota
+async def adicionar_pagamento(request, conn):
+    data = await _corpo(request)
+    required_fields = ['id_aluno', 'valor_pago', 'data_pagamento', 'forma_pagamento']
+    if not all([field in data for field in required_fields]):
+        return jsonify({"error": "Campos obrigatórios não preenchidos"}, 400)
+    try:
+        pagamento = await _sql(
+            conn, 'fetchrow', 'pagamento_inserir',
+            _param(data, 'data_pagamento'), _param(data, 'valor_pago'), data['forma_pagamento'],
+            data.get('referencia', ''), data.get('status', 'pendente'), _param(data, 'id_aluno')
+        )
+    except asyncpg.ForeignKeyViolationError:
+        pagamento = None
+    if pagamento is None:
+        return jsonify({"error": "Aluno não encontrado"}, 404)
+    return jsonify({"message": "Pagamento adicionado", "id_pagamento": pagamento[0]}, 201)
+
+
+@coalescido
+@rota
+async def read_pagamento(request, conn, id_pagamento):
+    pagamento, campos, cabecalhos = await _por_chave(request, conn, entidades.PAGAMENTOS, 'pagamento', id_pagamento)
+    if pagamento is None:
+        return jsonify({"error": "Pagamento não encontrado"}, 404)
+    if campos:
+        return jsonify(entidades.PAGAMENTOS.para_dict(pagamento, campos), headers=cabecalhos)
+    return jsonify({
+        "id_pagamento": pagamento[0],
+        "id_aluno": pagamento[1],
+        "data_pagamento": pagamento[2],
+        "valor_pago": pagamento[3],
+        "forma_pagamento": pagamento[4],
+        "referencia": pagamento[5],
+        "status": pagamento[6],
+    }, headers=cabecalhos)
+
+
+@rota
+async def update_pagamento(request, conn, id_pagamento):
+    data = await _corpo(request)
+    await _sql(
+        conn, 'execute', 'pagamento_atualizar',
+        _param(data, 'id_aluno'), _param(data, 'data_pagamento'), _param(data, 'valor_pago'),
+        data['forma_pagamento'], data['referencia'], data['status'], id_pagamento
+    )
+    return jsonify({"message": "Pagamento atualizado"})
+
+
+@rota
+async def delete_pagamento(request, conn, id_pagamento):
+    if await _sql(conn, 'fetchrow', 'pagamento_remover', id_pagamento) is None:
+        return jsonify({"error": "Pagamento não encontrado"}, 404)
+    return jsonify({"message": "Pagamento deletado"})
+
+
+# ---------------------------------------------------------------------------
+# Presenças
+# ---------------------------------------------------------------------------
+@rota
+async def adicionar_presenca(request, conn):
+    data = await _corpo(request)
+    if not all([field in data for field in ['id_aluno', 'data_presenca', 'presente']]):
+        return jsonify({"error": "Campos obrigatórios não preenchidos"}, 400)
+    try:
+        presenca = await _sql(
+            conn, 'fetchrow', 'presenca_inserir',
+            _param(data, 'data_presenca'), data['presente'], _param(data, 'id_aluno')
+        )
+    except asyncpg.ForeignKeyViolationError:
+        presenca = None
+    if presenca is None:
+        return jsonify({"error": "Aluno não encontrado"}, 404)
+    return jsonify({"message": "Presença adicionada"}, 201)
+
+
+@rota
+async def chamada_turma(request, conn, id_turma):
+    ids, sao_presentes, data_presenca = lote.chamada(await _corpo(request))
+    linha = await _sql(
+        conn, 'fetchrow', 'presenca_chamada',
+        id_turma, ids, sao_presentes, datetime.date.fromisoformat(data_presenca)
+    )
+    if not linha[0]:
+        return jsonify({"error": "Turma não encontrada"}, 404)
+    return jsonify(lote.resposta_chamada(id_turma, data_presenca, linha))
+
+
+@coalescido
+@rota
+async def read_presenca(request, conn, id_presenca):
+    presenca, campos, cabecalhos = await _por_chave(request, conn, entidades.PRESENCAS, 'presenca', id_presenca)
+    if presenca is None:
+        return jsonify({"error": "Presença não encontrada"}, 404)
+    if campos:
+        return jsonify(entidades.PRESENCAS.para_dict(presenca, campos), headers=cabecalhos)
+    return jsonify({
+        "id_presenca": presenca[0],
+        "id_aluno": presenca[1],
+        "data_presenca": presenca[2],
+        "presente": presenca[3],
+    }, headers=cabecalhos)
+
+
+@rota
+async def update_presenca(request, conn, id_presenca):
+    data = await _corpo(request)
+    await _sql(
+        conn, 'execute', 'presenca_atualizar',
+        _param(data, 'id_aluno'), _param(data, 'data_presenca'), data['presente'], id_presenca
+    )
+    return jsonify({"message": "Presença atualizada"})
+
+
+@rota
+async def delete_presenca(request, conn, id_presenca):
+    await _sql(conn, 'execute', 'presenca_remover', id_presenca)
+    return jsonify({"message": "Presença deletada"})
+
+
+# ---------------------------------------------------------------------------
+# Atividades
+# ---------------------------------------------------------------------------
+@rota
+async def adicionar_atividade(request, conn):
+    data = await _corpo(request)
+    if not all([field in data for field in ['descricao', 'data_realizacao']]):
+        return jsonify({"error": "Campos obrigatórios não preenchidos"}, 400)
+    await _sql(conn, 'execute', 'atividade_inserir', data['descricao'], _param(data, 'data_realizacao'))
+    return jsonify({"message": "Atividade adicionada"}, 201)
+
+
+@coalescido
+@rota
+async def read_atividade(request, conn, id_atividade):
+    atividade, campos, cabecalhos = await _por_chave(
+        request, conn, entidades.ATIVIDADES, 'atividade', id_atividade, memoria=cache.ATIVIDADES
+    )
+    if atividade is None:
+        return jsonify({"error": "Atividade não encontrada"}, 404)
+    if campos:
+        return jsonify(entidades.ATIVIDADES.para_dict(atividade, campos), headers=cabecalhos)
+    return jsonify({
+        "id_atividade": atividade[0],
+        "descricao": atividade[1],
+        "data_realizacao": atividade[2]
+    }, headers=cabecalhos)
+
+
+@rota
+async def update_atividade(request, conn, id_atividade):
+    data = await _corpo(request)
+    if not all([field in data for field in ['descricao', 'data_realizacao']]):
+        return jsonify({"error": "Campos obrigatórios não preenchidos"}, 400)
+    await _sql(
+        conn, 'execute', 'atividade_atualizar',
+        data['descricao'], _param(data, 'data_realizacao'), id_atividade
+    )
+    cache.ATIVIDADES.invalidar(id_atividade)
+    return jsonify({"message": "Atividade atualizada"})
+
+
+@rota
+async def delete_atividade(request, conn, id_atividade):
+    await _sql(conn, 'execute', 'atividade_remover', id_atividade)
+    cache.ATIVIDADES.invalidar(id_atividade)
+    return jsonify({"message": "Atividade deletada"})
+
+
+# ---------------------------------------------------------------------------
+# Atividade do aluno
+# ---------------------------------------------------------------------------
+@rota
+async def adicionar_atividade_aluno(request, conn):
+    data = await _corpo(request)
+    if not all([field in data for field in ['id_aluno', 'id_atividade']]):
+        return jsonify({"error": "Campos obrigatórios não preenchidos"}, 400)
+    try:
+        aluno_existe, atividade_existe = await _sql(
+            conn, 'fetchrow', 'atividade_aluno_inserir',
+            _param(data, 'id_aluno'), _param(data, 'id_atividade')
+        )
+    except asyncpg.ForeignKeyViolationError as e:
+        aluno_existe = 'id_aluno' not in (e.constraint_name or '')
+        atividade_existe = not aluno_existe
+    if not aluno_existe:
+        return jsonify({"error": "Aluno não encontrado"}, 404)
+    if not atividade_existe:
+        return jsonify({"error": "Atividade não encontrada"}, 404)
+    return jsonify({"message": "Atividade do aluno adicionada"}, 201)
+
+
+@coalescido
+@rota
+async def read_atividade_aluno(request, conn, id_atividade, id_aluno):
+    atividade_aluno = await _sql(conn, 'fetchrow', 'atividade_aluno_detalhe', id_atividade, id_aluno)
+    if atividade_aluno is None:
+        return jsonify({"error": "Atividade do aluno não encontrada"}, 404)
+    return jsonify({
+        "id_atividade": atividade_aluno[0],
+        "id_aluno": atividade_aluno[1],
+        "descricao_atividade": atividade_aluno[2],
+        "data_realizacao": atividade_aluno[3],
+        "nome_aluno": atividade_aluno[4]
+    })
+
+
+@rota
+async def delete_atividade_aluno(request, conn, id_atividade, id_aluno):
+    if await _sql(conn, 'fetchrow', 'atividade_aluno_remover', id_atividade, id_aluno) is None:
+        return jsonify({"error": "Atividade do aluno não encontrada"}, 404)
+    return jsonify({"message": "Atividade do aluno atualizada"})
+
+
+@coalescido
+@rota
+async def listar_atividades_aluno(request, conn, id_aluno):
+    atividades = await _sql(conn, 'fetch', 'atividade_aluno_por_aluno', id_aluno)
+    return jsonify([
+        {
+            "id_atividade": atividade[0],
+            "id_aluno": atividade[1],
+            "descricao": atividade[2],
+            "data_realizacao": atividade[3]
+        }
+        for atividade in atividades
+    ])
+
+
+# ---------------------------------------------------------------------------
+# Usuários
+# ---------------------------------------------------------------------------
+@rota
+async def adicionar_usuario(request, conn):
+    data = await _corpo(request)
+    if not all([field in data for field in ['login', 'senha', 'nivel_acesso', 'id_professor']]):
+        return jsonify({"error": "Campos obrigatórios não preenchidos"}, 400)
+    await _sql(
+        conn, 'execute', 'usuario_inserir',
+        data['login'], data['senha'], data['nivel_acesso'], _param(data, 'id_professor')
+    )
+    return jsonify({"message": "Usuário adicionado"}, 201)
+
+
+@coalescido
+@rota
+async def read_usuario(request, conn, id_usuario):
+    usuario, campos, cabecalhos = await _por_chave(request, conn, entidades.USUARIOS, 'usuario', id_usuario)
+    if usuario is None:
+        return jsonify({"error": "Usuário não encontrado"}, 404)
+    if campos:
+        return jsonify(entidades.USUARIOS.para_dict(usuario, campos), headers=cabecalhos)
+    return jsonify({
+        "id_usuario": usuario[0],
+        "login": usuario[1],
+        "senha": usuario[2],
+        "nivel_acesso": usuario[3],
+        "id_professor": usuario[4]
+    }, headers=cabecalhos)
+
+
+@rota
+async def update_usuario(request, conn, id_usuario):
+    data = await _corpo(request)
+    await _sql(
+        conn, 'execute', 'usuario_atualizar',
+        data['login'], data['senha'], data['nivel_acesso'], _param(data, 'id_professor'), id_usuario
+    )
+    return jsonify({"message": "Usuario atualizado"})
+
+
+@rota
+async def delete_usuario(request, conn, id_usuario):
+    await _sql(conn, 'execute', 'usuario_remover', id_usuario)
+    return jsonify({"message": "Usuario deletado"})
+
+
+async def home(request):
+    return jsonify({"message": "API Sistema Escolar", "status": "running"})
+
+
+async def metrics(request):
+    return Response(generate_latest(metricas.registro()), media_type=CONTENT_TYPE_LATEST)
+
+
+async def _aquecer():
+    # Abre o mínimo do pool, faz o pre-ping e carrega os dados de referência no cache
+    while True:
+        try:
+            pool = await _get_pool()
+            async with pool.acquire() as conn:
+                await conn.fetchval("SELECT 1")
+                for sql, destino in aquecimento.DADOS_REFERENCIA.values():
+                    geracao = destino.geracao()
+                    for linha in await conn.fetch(sql + f" ORDER BY 1 LIMIT {destino.capacidade}"):
+                        destino.set(linha[0], tuple(linha), geracao)
+            _pronto.set()
+            return
+        except Exception as e:
+            print(f"Aquecimento falhou, nova tentativa em {aquecimento.INTERVALO_TENTATIVA}s: {e}")
+            await asyncio.sleep(aquecimento.INTERVALO_TENTATIVA)
+
+
+async def ready(request):
+    if _pronto is not None and _pronto.is_set():
+        return jsonify({"status": "ready"})
+    return jsonify({"status": "warming"}, 503)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global _pool_lock, _pronto
+    _pool_lock = asyncio.Lock()
+    _pronto = asyncio.Event()
+    cache.configurar()
+    tarefa = asyncio.create_task(_aquecer())
+    yield
+    tarefa.cancel()
+    if _pool is not None:
+        await _pool.close()
+
+
+routes = [
+    Route('/', home),
+    Route('/metrics', metrics),
+    Route('/ready', ready),
+    Route('/alunos', adicionar_aluno, methods=['POST']),
+    Route('/alunos', listar_alunos, methods=['GET']),
+    Route('/alunos/{id_aluno:int}', read_aluno, methods=['GET']),
+    Route('/alunos/{id_aluno:int}', update_aluno, methods=['PUT']),
+    Route('/alunos/{id_aluno:int}', delete_aluno, methods=['DELETE']),
+    Route('/professores', adicionar_professor, methods=['POST']),
+    Route('/professores', listar_professores, methods=['GET']),
+    Route('/professores/{id_professor:int}', read_professor, methods=['GET']),
+    Route('/professores/{id_professor:int}', update_professor, methods=['PUT']),
+    Route('/professores/{id_professor:int}', delete_professor, methods=['DELETE']),
+    Route('/turmas', adicionar_turma, methods=['POST']),
+    Route('/turmas', listar_turmas, methods=['GET']),
+    Route('/turmas/{id_turma:int}', read_turma, methods=['GET']),
+    Route('/turmas/{id_turma:int}', update_turma, methods=['PUT']),
+    Route('/turmas/{id_turma:int}', delete_turma, methods=['DELETE']),
+    Route('/turmas/{id_turma:int}/presencas', chamada_turma, methods=['POST']),
+    Route('/pagamentos', adicionar_pagamento, methods=['POST']),
+    Route('/pagamentos', listar_pagamentos, methods=['GET']),
+    Route('/pagamentos/{id_pagamento:int}', read_pagamento, methods=['GET']),
+    Route('/pagamentos/{id_pagamento:int}', update_pagamento, methods=['PUT']),
+    Route('/pagamentos/{id_pagamento:int}', delete_pagamento, methods=['DELETE']),
+    Route('/presencas', adicionar_presenca, methods=['POST']),
+    Route('/presencas', listar_presencas, methods=['GET']),
+    Route('/presencas/{id_presenca:int}', read_presenca, methods=['GET']),
+    Route('/presencas/{id_presenca:int}', update_presenca, methods=['PUT']),
+    Route('/presencas/{id_presenca:int}', delete_presenca, methods=['DELETE']),
+    Route('/atividade', adicionar_atividade, methods=['POST']),
+    Route('/atividade', listar_atividades, methods=['GET']),
+    Route('/atividade/{id_atividade:int}', read_atividade, methods=['GET']),
+    Route('/atividade/{id_atividade:int}', update_atividade, methods=['PUT']),
+    Route('/atividade/{id_atividade:int}', delete_atividade, methods=['DELETE']),
+    Route('/atividade_aluno', adicionar_atividade_aluno, methods=['POST']),
+    Route('/atividade_aluno/{id_atividade:int}/{id_aluno:int}', read_atividade_aluno, methods=['GET']),
+    Route('/atividade_aluno/{id_atividade:int}/{id_aluno:int}', delete_atividade_aluno, methods=['DELETE']),
+    Route('/atividade_aluno/aluno/{id_aluno:int}', listar_atividades_aluno, methods=['GET']),
+    Route('/usuarios', adicionar_usuario, methods=['POST']),
+    Route('/usuarios/{id_usuario:int}', read_usuario, methods=['GET']),
+    Route('/usuarios/{id_usuario:int}', update_usuario, methods=['PUT']),
+    Route('/usuarios/{id_usuario:int}', delete_usuario, methods=['DELETE']),
+]
+
+app = Starlette(routes=routes, lifespan=lifespan, middleware=[Middleware(compressao.CompressaoASGI)])
@@ -1,9 +1,14 @@
-from flask import Flask, request, jsonify
+from flask import Blueprint, request, jsonify
 import Util.bd as bd
+import Util.cache as cache
+import Util.entidades as entidades
+import Util.etag as etag
+import Util.paginacao as paginacao
+from Util.coalescencia import coalescer
 
-app = Flask(__name__)
+professores_bp = Blueprint('professores', __name__)
 
-@app.route('/professores', methods=['POST'])
+@professores_bp.route('/professores', methods=['POST'])
 def adicionar_professor():
     data = request.get_json()
     
@@ -17,13 +22,7 @@ def adicionar_professor():
     cursor = conn.cursor()
     try:
         
-        cursor.execute(
-            """
-            INSERT INTO professor (nome_completo, email, telefone)
-            VALUES (%s, %s, %s)
-            """,
-            (data['nome_completo'], data['email'], data['telefone'])
-        )
+        bd.execute(cursor, 'professor_inserir', (data['nome_completo'], data['email'], data['telefone']))
         conn.commit()
         return jsonify({"message": "Professor adicionado"}), 201
     except Exception as e:
@@ -33,35 +32,85 @@ def adicionar_professor():
         cursor.close()
         conn.close()
         
-@app.route('/professores/<int:id_professor>', methods=['GET'])
+@professores_bp.route('/professores', methods=['GET'])
+@coalescer
+def listar_professores():
+    try:
+        consulta = paginacao.consulta(entidades.PROFESSORES, request.args)
+    except paginacao.ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = bd.create_connection(readonly=True)
+    if conn is None:
+        return jsonify({"error": "Connection to DB failed"}), 500
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(consulta.sql, consulta.params)
+        return jsonify(paginacao.pagina(consulta, cursor.fetchall())), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+def _resposta_professor(professor, campos=None):
+    cabecalhos = etag.cabecalhos(entidades.PROFESSORES.versao(professor, campos), campos)
+    if campos:
+        return jsonify(entidades.PROFESSORES.para_dict(professor, campos)), 200, cabecalhos
+    return jsonify({
+        "id_professor": professor[0],
+        "nome_completo": professor[1],
+        "email": professor[2],
+        "telefone": professor[3],
+    }), 200, cabecalhos
+
+@professores_bp.route('/professores/<int:id_professor>', methods=['GET'])
+@coalescer
 def read_professor(id_professor):
-    conn = bd.create_connection()
+    try:
+        campos = entidades.PROFESSORES.projecao(request.args.get('fields'))
+    except entidades.ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+    if not campos:
+        # Dado de referência: um acerto no cache responde sem abrir conexão
+        professor = cache.PROFESSORES.get(id_professor)
+        if professor is not None:
+            versao = entidades.PROFESSORES.versao(professor)
+            if etag.corresponde(request.headers.get('If-None-Match', ''), versao):
+                return '', 304, etag.cabecalhos(versao)
+            return _resposta_professor(professor)
+        geracao = cache.PROFESSORES.geracao()
+    conn = bd.create_connection(readonly=True)
     if conn is None:
         return jsonify({"error": "Connection to DB failed"}), 500
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            SELECT * FROM professor WHERE id_professor = %s
-            """,
-            (id_professor,)
-        )
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            # Só a versão, por index-only scan: o 304 não lê nem serializa a linha
+            bd.execute(cursor, 'professor_versao', (id_professor,))
+            atual = cursor.fetchone()
+            if atual is not None and etag.corresponde(if_none_match, atual[0], campos):
+                return '', 304, etag.cabecalhos(atual[0], campos)
+        if campos:
+            # ?fields=: só as colunas pedidas saem do banco
+            cursor.execute(entidades.PROFESSORES.sql_por_chave(campos), (id_professor,))
+        else:
+            bd.execute(cursor, 'professor_por_id', (id_professor,))
         professor = cursor.fetchone()
         if professor is None:
             return jsonify({"error": "Professor não encontrado"}), 404
-        return jsonify({
-            "id_professor": professor[0],
-            "nome_completo": professor[1],
-            "email": professor[2],
-            "telefone": professor[3],
-        })
+        if not campos:
+            cache.PROFESSORES.set(id_professor, professor, geracao)
+        return _resposta_professor(professor, campos)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     finally:
         cursor.close()
         conn.close()
         
-@app.route('/professores/<int:id_professor>', methods=['PUT'])
+@professores_bp.route('/professores/<int:id_professor>', methods=['PUT'])
 def update_professor(id_professor):
     data = request.get_json()
     conn = bd.create_connection()
@@ -69,16 +118,13 @@ def update_professor(id_professor):
         return jsonify({"error": "Connection to DB failed"}), 500
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            UPDATE professor
-            SET nome_completo = %s, email = %s, telefone = %s
-            WHERE id_professor = %s
-            """,
+        bd.execute(
+            cursor, 'professor_atualizar',
             (data['nome_completo'], data['email'], data['telefone'],
              id_professor)
         )
         conn.commit()
+        cache.PROFESSORES.invalidar(id_professor)
         return jsonify({"message": "Professor atualizado"}), 200
     except Exception as e:
         conn.rollback()
@@ -87,20 +133,16 @@ def update_professor(id_professor):
         cursor.close()
         conn.close()
         
-@app.route('/professores/<int:id_professor>', methods=['DELETE'])
+@professores_bp.route('/professores/<int:id_professor>', methods=['DELETE'])
 def delete_professor(id_professor):
     conn = bd.create_connection()
     if conn is None:
         return jsonify({"error": "Connection to DB failed"}), 500
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            DELETE FROM professor WHERE id_professor = %s
-            """,
-            (id_professor,)
-        )
+        bd.execute(cursor, 'professor_remover', (id_professor,))
         conn.commit()
+        cache.PROFESSORES.invalidar(id_professor)
         return jsonify({"message": "Professor deletado"}), 200
     except Exception as e:
         conn.rollback()
@@ -110,4 +152,6 @@ def delete_professor(id_professor):
         conn.close()
         
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    import os
+    from factory import create_app
+    create_app(['professores']).run(host='0.0.0.0', port=5000, debug=os.getenv('FLASK_DEBUG') == '1')
\ No newline at end of file
@@ -1,9 +1,15 @@
-from flask import Flask, request, jsonify
+from flask import Blueprint, request, jsonify
+from psycopg2.errors import ForeignKeyViolation
 import Util.bd as bd
+import Util.lote as lote
+import Util.entidades as entidades
+import Util.etag as etag
+import Util.paginacao as paginacao
+from Util.coalescencia import coalescer
 
-app = Flask(__name__)
+alunos_bp = Blueprint('alunos', __name__)
 
-@app.route('/alunos', methods=['POST'])
+@alunos_bp.route('/alunos', methods=['POST'])
 def adicionar_aluno():
     data = request.get_json()
 
@@ -20,23 +26,21 @@ def adicionar_aluno():
 
     cursor = conn.cursor()
     try:
-        cursor.execute("SELECT * FROM turma WHERE id_turma = %s", (data['id_turma'],))
-        turma = cursor.fetchone()
-
-        if turma is None:
-            return jsonify({"error": "Turma não encontrada"}), 404
-
-        cursor.execute(
-            """
-            INSERT INTO alunos (nome_completo, data_nascimento, id_turma, nome_responsavel, telefone_responsavel,
-            email_responsavel, informacoes_adicionais)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """,
-            (data['nome_completo'], data['data_nascimento'], data['id_turma'], data['nome_responsavel'], data['telefone_responsavel'], 
-             data['email_responsavel'], data.get('informacoes_adicionais', ''))
+        # Insere só se a turma existir, em um único round trip
+        bd.execute(
+            cursor, 'aluno_inserir',
+            (data['nome_completo'], data['data_nascimento'], data['nome_responsavel'], data['telefone_responsavel'],
+             data['email_responsavel'], data.get('informacoes_adicionais', ''), data['id_turma'])
         )
+        if cursor.fetchone() is None:
+            conn.rollback()
+            return jsonify({"error": "Turma não encontrada"}), 404
         conn.commit()
         return jsonify({"message": "Aluno adicionado"}), 201
+    except ForeignKeyViolation:
+        # Turma removida entre o SELECT e o INSERT
+        conn.rollback()
+        return jsonify({"error": "Turma não encontrada"}), 404
     except Exception as e:
         conn.rollback()
         return jsonify({"error": str(e)}), 500
@@ -44,22 +48,86 @@ def adicionar_aluno():
         cursor.close()
         conn.close()
 
-@app.route('/alunos/<int:id_aluno>', methods=['GET'])
-def read_aluno(id_aluno):
+@alunos_bp.route('/alunos/bulk', methods=['POST'])
+def adicionar_alunos_lote():
+    try:
+        linhas = lote.ler_linhas(request)
+        atomico = lote.modo(request.args) == 'atomico'
+    except lote.ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+
     conn = bd.create_connection()
     if conn is None:
         return jsonify({"error": "Connection to DB failed"}), 500
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            SELECT * FROM alunos WHERE id_aluno = %s
-            """,
-            (id_aluno,)
-        )
+        # Valida tudo, confere as referências e insere com VALUES de várias linhas
+        resultado = lote.gravar(cursor, lote.ALUNOS, linhas, atomico)
+        if resultado.gravado:
+            conn.commit()
+        else:
+            conn.rollback()
+        corpo, status = resultado.resposta()
+        return jsonify(corpo), status
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+@alunos_bp.route('/alunos', methods=['GET'])
+@coalescer
+def listar_alunos():
+    try:
+        consulta = paginacao.consulta(entidades.ALUNOS, request.args)
+    except paginacao.ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = bd.create_connection(readonly=True)
+    if conn is None:
+        return jsonify({"error": "Connection to DB failed"}), 500
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(consulta.sql, consulta.params)
+        return jsonify(paginacao.pagina(consulta, cursor.fetchall())), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+@alunos_bp.route('/alunos/<int:id_aluno>', methods=['GET'])
+@coalescer
+def read_aluno(id_aluno):
+    try:
+        campos = entidades.ALUNOS.projecao(request.args.get('fields'))
+    except entidades.ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+    conn = bd.create_connection(readonly=True)
+    if conn is None:
+        return jsonify({"error": "Connection to DB failed"}), 500
+    cursor = conn.cursor()
+    try:
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            # Só a versão, por index-only scan: o 304 não lê nem serializa a linha
+            bd.execute(cursor, 'aluno_versao', (id_aluno,))
+            atual = cursor.fetchone()
+            if atual is not None and etag.corresponde(if_none_match, atual[0], campos):
+                return '', 304, etag.cabecalhos(atual[0], campos)
+        if campos:
+            # ?fields=: só as colunas pedidas saem do banco
+            cursor.execute(entidades.ALUNOS.sql_por_chave(campos), (id_aluno,))
+        else:
+            bd.execute(cursor, 'aluno_por_id', (id_aluno,))
         aluno = cursor.fetchone()
         if aluno is None:
             return jsonify({"error": "Aluno não encontrado"}), 404
+        cabecalhos = etag.cabecalhos(entidades.ALUNOS.versao(aluno, campos), campos)
+        if campos:
+            return jsonify(entidades.ALUNOS.para_dict(aluno, campos)), 200, cabecalhos
         return jsonify({
             "id_aluno": aluno[0],
             "nome_completo": aluno[1],
@@ -69,14 +137,14 @@ def read_aluno(id_aluno):
             "telefone_responsavel": aluno[5],
             "email_responsavel": aluno[6],
             "informacoes_adicionais": aluno[7],
-        }), 200
+        }), 200, cabecalhos
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     finally:
         cursor.close()
         conn.close()
 
-@app.route('/alunos/<int:id_aluno>', methods=['PUT'])
+@alunos_bp.route('/alunos/<int:id_aluno>', methods=['PUT'])
 def update_aluno(id_aluno):
     data = request.get_json()
     conn = bd.create_connection()
@@ -84,14 +152,9 @@ def update_aluno(id_aluno):
         return jsonify({"error": "Connection to DB failed"}), 500
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            UPDATE alunos
-            SET nome_completo = %s, data_nascimento = %s, id_turma = %s, nome_responsavel = %s, telefone_responsavel = %s, 
-            email_responsavel = %s, informacoes_adicionais = %s
-            WHERE id_aluno = %s
-            """,
-            (data['nome_completo'], data['data_nascimento'], data['id_turma'], data['nome_responsavel'], data['telefone_responsavel'], 
+        bd.execute(
+            cursor, 'aluno_atualizar',
+            (data['nome_completo'], data['data_nascimento'], data['id_turma'], data['nome_responsavel'], data['telefone_responsavel'],
              data['email_responsavel'], data['informacoes_adicionais'], id_aluno)
         )
         conn.commit()
@@ -103,19 +166,14 @@ def update_aluno(id_aluno):
         cursor.close()
         conn.close()
 
-@app.route('/alunos/<int:id_aluno>', methods=['DELETE'])
+@alunos_bp.route('/alunos/<int:id_aluno>', methods=['DELETE'])
 def delete_aluno(id_aluno):
     conn = bd.create_connection()
     if conn is None:
         return jsonify({"error": "Connection to DB failed"}), 500
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            DELETE FROM alunos WHERE id_aluno = %s
-            """,
-            (id_aluno,)
-        )
+        bd.execute(cursor, 'aluno_remover', (id_aluno,))
         conn.commit()
         return jsonify({"message": "Aluno deletado"}), 200
     except Exception as e:
@@ -126,4 +184,6 @@ def delete_aluno(id_aluno):
         conn.close()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    import os
+    from factory import create_app
+    create_app(['alunos']).run(host='0.0.0.0', port=5000, debug=os.getenv('FLASK_DEBUG') == '1')
@@ -1,10 +1,15 @@
-from flask import Flask, request, jsonify
+from flask import Blueprint, request, jsonify
 import Util.bd as bd
+import Util.cache as cache
+import Util.entidades as entidades
+import Util.etag as etag
+import Util.paginacao as paginacao
+from Util.coalescencia import coalescer
 import base64
 
-app = Flask(__name__)
+atividades_bp = Blueprint('atividades', __name__)
 
-@app.route('/atividade', methods=['POST'])
+@atividades_bp.route('/atividade', methods=['POST'])
 def adicionar_atividade():
     data = request.get_json()
 
@@ -17,13 +22,7 @@ def adicionar_atividade():
         return jsonify({"error": "Connection to DB failed"}), 500
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            INSERT INTO atividade (descricao, data_realizacao)
-            VALUES (%s, %s)
-            """,
-            (data['descricao'], data['data_realizacao'])
-        )
+        bd.execute(cursor, 'atividade_inserir', (data['descricao'], data['data_realizacao']))
         conn.commit()
         return jsonify({"message": "Atividade adicionada"}), 201
     except Exception as e:
@@ -33,35 +32,85 @@ def adicionar_atividade():
         cursor.close()
         conn.close()
 
-@app.route('/atividade/<int:id_atividade>', methods=['GET'])
+@atividades_bp.route('/atividade', methods=['GET'])
+@coalescer
+def listar_atividades():
+    try:
+        consulta = paginacao.consulta(entidades.ATIVIDADES, request.args)
+    except paginacao.ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = bd.create_connection(readonly=True)
+    if conn is None:
+        return jsonify({"error": "Connection to DB failed"}), 500
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(consulta.sql, consulta.params)
+        return jsonify(paginacao.pagina(consulta, cursor.fetchall())), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+def _resposta_atividade(atividade, campos=None):
+    cabecalhos = etag.cabecalhos(entidades.ATIVIDADES.versao(atividade, campos), campos)
+    if campos:
+        return jsonify(entidades.ATIVIDADES.para_dict(atividade, campos)), 200, cabecalhos
+    return jsonify({
+        "id_atividade": atividade[0],
+        "descricao": atividade[1],
+        "data_realizacao": atividade[2]
+    }), 200, cabecalhos
+
+@atividades_bp.route('/atividade/<int:id_atividade>', methods=['GET'])
+@coalescer
 def read_atividade(id_atividade):
-    conn = bd.create_connection()
+    try:
+        campos = entidades.ATIVIDADES.projecao(request.args.get('fields'))
+    except entidades.ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+    if not campos:
+        # Dado de referência: um acerto no cache responde sem abrir conexão
+        atividade = cache.ATIVIDADES.get(id_atividade)
+        if atividade is not None:
+            versao = entidades.ATIVIDADES.versao(atividade)
+            if etag.corresponde(request.headers.get('If-None-Match', ''), versao):
+                return '', 304, etag.cabecalhos(versao)
+            return _resposta_atividade(atividade)
+        geracao = cache.ATIVIDADES.geracao()
+    conn = bd.create_connection(readonly=True)
     if conn is None:
         return jsonify({"error": "Connection to DB failed"}), 500
     
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            SELECT * FROM atividade WHERE id_atividade = %s
-            """,
-            (id_atividade,)
-        )
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            # Só a versão, por index-only scan: o 304 não lê nem serializa a linha
+            bd.execute(cursor, 'atividade_versao', (id_atividade,))
+            atual = cursor.fetchone()
+            if atual is not None and etag.corresponde(if_none_match, atual[0], campos):
+                return '', 304, etag.cabecalhos(atual[0], campos)
+        if campos:
+            # ?fields=: só as colunas pedidas saem do banco
+            cursor.execute(entidades.ATIVIDADES.sql_por_chave(campos), (id_atividade,))
+        else:
+            bd.execute(cursor, 'atividade_por_id', (id_atividade,))
         atividade = cursor.fetchone()
         if atividade is None:
             return jsonify({"error": "Atividade não encontrada"}), 404
-        return jsonify({
-            "id_atividade": atividade[0],
-            "descricao": atividade[1],
-            "data_realizacao": atividade[2]
-        }), 200
+        if not campos:
+            cache.ATIVIDADES.set(id_atividade, atividade, geracao)
+        return _resposta_atividade(atividade, campos)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     finally:
         cursor.close()
         conn.close()
 
-@app.route('/atividade/<int:id_atividade>', methods=['PUT'])
+@atividades_bp.route('/atividade/<int:id_atividade>', methods=['PUT'])
 def update_atividade(id_atividade):
     data = request.get_json()
 
@@ -76,15 +125,9 @@ def update_atividade(id_atividade):
 
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            UPDATE atividade
-            SET descricao = %s, data_realizacao = %s
-            WHERE id_atividade = %s
-            """,
-            (data['descricao'], data['data_realizacao'], id_atividade)
-        )
+        bd.execute(cursor, 'atividade_atualizar', (data['descricao'], data['data_realizacao'], id_atividade))
         conn.commit()
+        cache.ATIVIDADES.invalidar(id_atividade)
         return jsonify({"message": "Atividade atualizada"}), 200
     except Exception as e:
         conn.rollback()
@@ -93,7 +136,7 @@ def update_atividade(id_atividade):
         cursor.close()
         conn.close()
 
-@app.route('/atividade/<int:id_atividade>', methods=['DELETE'])
+@atividades_bp.route('/atividade/<int:id_atividade>', methods=['DELETE'])
 def delete_atividade(id_atividade):
     conn = bd.create_connection()
     if conn is None:
@@ -101,13 +144,9 @@ def delete_atividade(id_atividade):
 
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            DELETE FROM atividade WHERE id_atividade = %s
-            """,
-            (id_atividade,)
-        )
+        bd.execute(cursor, 'atividade_remover', (id_atividade,))
         conn.commit()
+        cache.ATIVIDADES.invalidar(id_atividade)
         return jsonify({"message": "Atividade deletada"}), 200
     except Exception as e:
         conn.rollback()
@@ -117,4 +156,6 @@ def delete_atividade(id_atividade):
         conn.close()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    import os
+    from factory import create_app
+    create_app(['atividades']).run(host='0.0.0.0', port=5000, debug=os.getenv('FLASK_DEBUG') == '1')
\ No newline at end of file
@@ -1,10 +1,13 @@
-from flask import Flask, request, jsonify
+from flask import Blueprint, request, jsonify
+from psycopg2.errors import ForeignKeyViolation
 import Util.bd as bd
+import Util.lote as lote
+from Util.coalescencia import coalescer
 import base64
 
-app = Flask(__name__)
+atividade_aluno_bp = Blueprint('atividade_aluno', __name__)
 
-@app.route('/atividade_aluno', methods=['POST'])
+@atividade_aluno_bp.route('/atividade_aluno', methods=['POST'])
 def adicionar_atividade_aluno():
     data = request.get_json()
 
@@ -17,27 +20,22 @@ def adicionar_atividade_aluno():
         return jsonify({"error": "Connection to DB failed"}), 500
     cursor = conn.cursor()
     try:
-        # Verificar se aluno existe
-        cursor.execute("SELECT * FROM alunos WHERE id_aluno = %s", (data['id_aluno'],))
-        aluno = cursor.fetchone()
-        if aluno is None:
+        # Verifica aluno e atividade e insere no mesmo statement
+        bd.execute(cursor, 'atividade_aluno_inserir', (data['id_aluno'], data['id_atividade']))
+        aluno_existe, atividade_existe = cursor.fetchone()
+        if not aluno_existe:
+            conn.rollback()
             return jsonify({"error": "Aluno não encontrado"}), 404
-
-        # Verificar se atividade existe
-        cursor.execute("SELECT * FROM atividade WHERE id_atividade = %s", (data['id_atividade'],))
-        atividade = cursor.fetchone()
-        if atividade is None:
+        if not atividade_existe:
+            conn.rollback()
             return jsonify({"error": "Atividade não encontrada"}), 404
-
-        cursor.execute(
-            """
-            INSERT INTO atividade_aluno (id_atividade, id_aluno)
-            VALUES (%s, %s)
-            """,
-            (data['id_atividade'], data['id_aluno'])
-        )
         conn.commit()
         return jsonify({"message": "Atividade do aluno adicionada"}), 201
+    except ForeignKeyViolation as e:
+        conn.rollback()
+        if 'id_aluno' in (e.diag.constraint_name or ''):
+            return jsonify({"error": "Aluno não encontrado"}), 404
+        return jsonify({"error": "Atividade não encontrada"}), 404
     except Exception as e:
         conn.rollback()
         return jsonify({"error": str(e)}), 500
@@ -45,24 +43,44 @@ def adicionar_atividade_aluno():
         cursor.close()
         conn.close()
 
-@app.route('/atividade_aluno/<int:id_atividade>/<int:id_aluno>', methods=['GET'])
-def read_atividade_aluno(id_atividade, id_aluno):
+@atividade_aluno_bp.route('/atividade_aluno/bulk', methods=['POST'])
+def adicionar_atividades_aluno_lote():
+    try:
+        linhas = lote.ler_linhas(request)
+        atomico = lote.modo(request.args) == 'atomico'
+    except lote.ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+
     conn = bd.create_connection()
+    if conn is None:
+        return jsonify({"error": "Connection to DB failed"}), 500
+    cursor = conn.cursor()
+    try:
+        # Valida tudo, confere as referências e insere com VALUES de várias linhas
+        resultado = lote.gravar(cursor, lote.ATIVIDADE_ALUNO, linhas, atomico)
+        if resultado.gravado:
+            conn.commit()
+        else:
+            conn.rollback()
+        corpo, status = resultado.resposta()
+        return jsonify(corpo), status
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+@atividade_aluno_bp.route('/atividade_aluno/<int:id_atividade>/<int:id_aluno>', methods=['GET'])
+@coalescer
+def read_atividade_aluno(id_atividade, id_aluno):
+    conn = bd.create_connection(readonly=True)
     if conn is None:
         return jsonify({"error": "Connection to DB failed"}), 500
     
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            SELECT aa.id_atividade, aa.id_aluno, at.descricao, at.data_realizacao, al.nome_completo
-            FROM atividade_aluno aa
-            JOIN atividade at ON aa.id_atividade = at.id_atividade
-            JOIN alunos al ON aa.id_aluno = al.id_aluno
-            WHERE aa.id_atividade = %s AND aa.id_aluno = %s
-            """,
-            (id_atividade, id_aluno)
-        )
+        bd.execute(cursor, 'atividade_aluno_detalhe', (id_atividade, id_aluno))
         atividade_aluno = cursor.fetchone()
         if atividade_aluno is None:
             return jsonify({"error": "Atividade do aluno não encontrada"}), 404
@@ -79,7 +97,7 @@ def read_atividade_aluno(id_atividade, id_aluno):
         cursor.close()
         conn.close()
 
-@app.route('/atividade_aluno/<int:id_atividade>/<int:id_aluno>', methods=['DELETE'])
+@atividade_aluno_bp.route('/atividade_aluno/<int:id_atividade>/<int:id_aluno>', methods=['DELETE'])
 def delete_atividade_aluno(id_atividade, id_aluno):
     conn = bd.create_connection()
     if conn is None:
@@ -87,19 +105,10 @@ def delete_atividade_aluno(id_atividade, id_aluno):
     
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            "SELECT * FROM atividade_aluno WHERE id_atividade = %s AND id_aluno = %s", 
-            (id_atividade, id_aluno)
-        )
-        atividade_aluno = cursor.fetchone()
-
-        if atividade_aluno is None:
+        bd.execute(cursor, 'atividade_aluno_remover', (id_atividade, id_aluno))
+        if cursor.fetchone() is None:
+            conn.rollback()
             return jsonify({"error": "Atividade do aluno não encontrada"}), 404
-
-        cursor.execute(
-            "DELETE FROM atividade_aluno WHERE id_atividade = %s AND id_aluno = %s",
-            (id_atividade, id_aluno)
-        )
         conn.commit()
         return jsonify({"message": "Atividade do aluno atualizada"}), 200
     except Exception as e:
@@ -109,23 +118,16 @@ def delete_atividade_aluno(id_atividade, id_aluno):
         cursor.close()
         conn.close()
 
-@app.route('/atividade_aluno/aluno/<int:id_aluno>', methods=['GET'])
+@atividade_aluno_bp.route('/atividade_aluno/aluno/<int:id_aluno>', methods=['GET'])
+@coalescer
 def listar_atividades_aluno(id_aluno):
-    conn = bd.create_connection()
+    conn = bd.create_connection(readonly=True)
     if conn is None:
         return jsonify({"error": "Connection to DB failed"}), 500
     
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            SELECT aa.id_atividade, aa.id_aluno, at.descricao, at.data_realizacao
-            FROM atividade_aluno aa
-            JOIN atividade at ON aa.id_atividade = at.id_atividade
-            WHERE aa.id_aluno = %s
-            """,
-            (id_aluno,)
-        )
+        bd.execute(cursor, 'atividade_aluno_por_aluno', (id_aluno,))
         atividades = cursor.fetchall()
         
         result = []
@@ -145,4 +147,6 @@ def listar_atividades_aluno(id_aluno):
         conn.close()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    import os
+    from factory import create_app
+    create_app(['atividade_aluno']).run(host='0.0.0.0', port=5000, debug=os.getenv('FLASK_DEBUG') == '1')
\ No newline at end of file
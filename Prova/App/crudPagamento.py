@@ -1,9 +1,15 @@
-from flask import Flask, request, jsonify
+from flask import Blueprint, request, jsonify
+from psycopg2.errors import ForeignKeyViolation
 import Util.bd as bd
+import Util.lote as lote
+import Util.entidades as entidades
+import Util.etag as etag
+import Util.paginacao as paginacao
+from Util.coalescencia import coalescer
 
-app = Flask(__name__)
+pagamentos_bp = Blueprint('pagamentos', __name__)
 
-@app.route('/pagamentos', methods=['POST'])
+@pagamentos_bp.route('/pagamentos', methods=['POST'])
 def adicionar_pagamento():
     data = request.get_json()
 
@@ -16,44 +22,104 @@ def adicionar_pagamento():
         return jsonify({"error": "Connection to DB failed"}), 500
     cursor = conn.cursor()
     try:
-        cursor.execute("SELECT * FROM alunos WHERE id_aluno = %s", (data['id_aluno'],))
-        aluno = cursor.fetchone()
-
-        if aluno is None:
+        bd.execute(cursor, 'pagamento_inserir', (data['data_pagamento'], data['valor_pago'], data['forma_pagamento'], data.get('referencia', ''), data.get('status', 'pendente'), data['id_aluno']))
+        pagamento = cursor.fetchone()
+        if pagamento is None:
+            conn.rollback()
             return jsonify({"error": "Aluno não encontrado"}), 404
-
-        cursor.execute(
-            """
-            INSERT INTO pagamento (id_aluno, data_pagamento, valor_pago, forma_pagamento, referencia, status)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            """,
-            (data['id_aluno'], data['data_pagamento'], data['valor_pago'], data['forma_pagamento'], data.get('referencia', ''), data.get('status', 'pendente'))
-        )
         conn.commit()
-        return jsonify({"message": "Pagamento adicionado"}), 201
+        return jsonify({"message": "Pagamento adicionado", "id_pagamento": pagamento[0]}), 201
+    except ForeignKeyViolation:
+        conn.rollback()
+        return jsonify({"error": "Aluno não encontrado"}), 404
     except Exception as e:
         conn.rollback()
         return jsonify({"error": str(e)}), 500
     finally:
         cursor.close()
         conn.close()
-@app.route('/pagamentos/<int:id_pagamento>', methods=['GET'])
-def read_pagamento(id_pagamento):
+
+@pagamentos_bp.route('/pagamentos/bulk', methods=['POST'])
+def adicionar_pagamentos_lote():
+    try:
+        linhas = lote.ler_linhas(request)
+        atomico = lote.modo(request.args) == 'atomico'
+    except lote.ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+
     conn = bd.create_connection()
+    if conn is None:
+        return jsonify({"error": "Connection to DB failed"}), 500
+    cursor = conn.cursor()
+    try:
+        # Valida tudo, confere as referências e insere com VALUES de várias linhas
+        resultado = lote.gravar(cursor, lote.PAGAMENTOS, linhas, atomico)
+        if resultado.gravado:
+            conn.commit()
+        else:
+            conn.rollback()
+        corpo, status = resultado.resposta()
+        return jsonify(corpo), status
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+@pagamentos_bp.route('/pagamentos', methods=['GET'])
+@coalescer
+def listar_pagamentos():
+    try:
+        consulta = paginacao.consulta(entidades.PAGAMENTOS, request.args)
+    except paginacao.ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = bd.create_connection(readonly=True)
+    if conn is None:
+        return jsonify({"error": "Connection to DB failed"}), 500
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(consulta.sql, consulta.params)
+        return jsonify(paginacao.pagina(consulta, cursor.fetchall())), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+@pagamentos_bp.route('/pagamentos/<int:id_pagamento>', methods=['GET'])
+@coalescer
+def read_pagamento(id_pagamento):
+    try:
+        campos = entidades.PAGAMENTOS.projecao(request.args.get('fields'))
+    except entidades.ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+    conn = bd.create_connection(readonly=True)
     if conn is None:
         return jsonify({"error": "Connection to DB failed"}), 500
     
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            SELECT * FROM pagamento WHERE id_pagamento = %s
-            """,
-            (id_pagamento,)
-        )
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            # Só a versão, por index-only scan: o 304 não lê nem serializa a linha
+            bd.execute(cursor, 'pagamento_versao', (id_pagamento,))
+            atual = cursor.fetchone()
+            if atual is not None and etag.corresponde(if_none_match, atual[0], campos):
+                return '', 304, etag.cabecalhos(atual[0], campos)
+        if campos:
+            # ?fields=: só as colunas pedidas saem do banco
+            cursor.execute(entidades.PAGAMENTOS.sql_por_chave(campos), (id_pagamento,))
+        else:
+            bd.execute(cursor, 'pagamento_por_id', (id_pagamento,))
         pagamento = cursor.fetchone()
         if pagamento is None:
             return jsonify({"error": "Pagamento não encontrado"}), 404
+        cabecalhos = etag.cabecalhos(entidades.PAGAMENTOS.versao(pagamento, campos), campos)
+        if campos:
+            return jsonify(entidades.PAGAMENTOS.para_dict(pagamento, campos)), 200, cabecalhos
         return jsonify({
             "id_pagamento": pagamento[0],
             "id_aluno": pagamento[1],
@@ -62,7 +128,7 @@ def read_pagamento(id_pagamento):
             "forma_pagamento": pagamento[4],
             "referencia": pagamento[5],
             "status": pagamento[6],
-        })
+        }), 200, cabecalhos
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     finally:
@@ -70,7 +136,7 @@ def read_pagamento(id_pagamento):
         conn.close()
 
 
-@app.route('/pagamentos/<int:id_pagamento>', methods=['PUT'])
+@pagamentos_bp.route('/pagamentos/<int:id_pagamento>', methods=['PUT'])
 def update_pagamento(id_pagamento):
     data = request.get_json()
     conn = bd.create_connection()
@@ -79,14 +145,7 @@ def update_pagamento(id_pagamento):
     
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            UPDATE pagamento
-            SET id_aluno = %s, data_pagamento = %s, valor_pago = %s, forma_pagamento = %s, referencia = %s, status = %s
-            WHERE id_pagamento = %s
-            """,
-            (data['id_aluno'], data['data_pagamento'], data['valor_pago'], data['forma_pagamento'], data['referencia'], data['status'], id_pagamento)
-        )
+        bd.execute(cursor, 'pagamento_atualizar', (data['id_aluno'], data['data_pagamento'], data['valor_pago'], data['forma_pagamento'], data['referencia'], data['status'], id_pagamento))
         conn.commit()
         return jsonify({"message": "Pagamento atualizado"}), 200
     except Exception as e:
@@ -97,7 +156,7 @@ def update_pagamento(id_pagamento):
         conn.close()
 
 # Método para deletar um pagamento
-@app.route('/pagamentos/<int:id_pagamento>', methods=['DELETE'])
+@pagamentos_bp.route('/pagamentos/<int:id_pagamento>', methods=['DELETE'])
 def delete_pagamento(id_pagamento):
     conn = bd.create_connection()
     if conn is None:
@@ -105,12 +164,10 @@ def delete_pagamento(id_pagamento):
     
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            DELETE FROM pagamento WHERE id_pagamento = %s
-            """,
-            (id_pagamento,)
-        )
+        bd.execute(cursor, 'pagamento_remover', (id_pagamento,))
+        if cursor.fetchone() is None:
+            conn.rollback()
+            return jsonify({"error": "Pagamento não encontrado"}), 404
         conn.commit()
         return jsonify({"message": "Pagamento deletado"}), 200
     except Exception as e:
@@ -121,4 +178,6 @@ def delete_pagamento(id_pagamento):
         conn.close()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    import os
+    from factory import create_app
+    create_app(['pagamentos']).run(host='0.0.0.0', port=5000, debug=os.getenv('FLASK_DEBUG') == '1')
\ No newline at end of file
@@ -1,4 +1,5 @@
 from flask import Flask, request, jsonify, Blueprint
+from psycopg2.errors import ForeignKeyViolation
 import Util.bd as bd
 import base64
 import logging
@@ -28,25 +29,29 @@ def adicionar_pagamento():
     
     cursor = conn.cursor()
     try:
-        cursor.execute("SELECT * FROM alunos WHERE id_aluno = %s", (data['id_aluno'],))
-        aluno = cursor.fetchone()
-
-        if aluno is None:
-            logging.warning(f"CREATE: Aluno com ID {data['id_aluno']} não encontrado.")
-            return jsonify({"error": "Aluno não encontrado"}), 404
-
+        # Insere só se o aluno existir: um único round trip
         cursor.execute(
             """
             INSERT INTO pagamentos (id_aluno, valor, data_pagamento, metodo_pagamento)
-            VALUES (%s, %s, %s, %s)
+            SELECT id_aluno, %s, %s, %s FROM alunos WHERE id_aluno = %s
             RETURNING id_pagamento
             """,
-            (data['id_aluno'], data['valor'], data['data_pagamento'], data['metodo_pagamento'])
+            (data['valor'], data['data_pagamento'], data['metodo_pagamento'], data['id_aluno'])
         )
-        id_pagamento = cursor.fetchone()[0]
+        pagamento = cursor.fetchone()
+        if pagamento is None:
+            conn.rollback()
+            logging.warning(f"CREATE: Aluno com ID {data['id_aluno']} não encontrado.")
+            return jsonify({"error": "Aluno não encontrado"}), 404
+
+        id_pagamento = pagamento[0]
         conn.commit()
         logging.info(f"CREATE: Pagamento para aluno {data['id_aluno']} inserido com sucesso. ID gerado: {id_pagamento}")
         return jsonify({"message": "Pagamento adicionado", "id_pagamento": id_pagamento}), 201
+    except ForeignKeyViolation:
+        conn.rollback()
+        logging.warning(f"CREATE: Aluno com ID {data['id_aluno']} não encontrado.")
+        return jsonify({"error": "Aluno não encontrado"}), 404
     except Exception as e:
         conn.rollback()
         logging.error(f"CREATE: Erro ao inserir pagamento - {str(e)}")
@@ -57,7 +62,7 @@ def adicionar_pagamento():
 
 @pagamento_bp.route('/pagamentos/<int:id_pagamento>', methods=['GET'])
 def read_pagamento(id_pagamento):
-    conn = bd.create_connection()
+    conn = bd.create_connection(readonly=True)
     if conn is None:
         logging.error("READ: Falha ao conectar ao banco de dados.")
         return jsonify({"error": "Connection to DB failed"}), 500
@@ -102,24 +107,27 @@ def update_pagamento(id_pagamento):
     
     cursor = conn.cursor()
     try:
-        # Verificar se o pagamento existe
-        cursor.execute("SELECT * FROM pagamentos WHERE id_pagamento = %s", (id_pagamento,))
-        if cursor.fetchone() is None:
-            logging.warning(f"UPDATE: Pagamento com ID {id_pagamento} não encontrado.")
-            return jsonify({"error": "Pagamento não encontrado"}), 404
-            
         cursor.execute(
             """
             UPDATE pagamentos
             SET id_aluno = %s, data_pagamento = %s, valor = %s, metodo_pagamento = %s, referencia = %s, status = %s
             WHERE id_pagamento = %s
+            RETURNING id_pagamento
             """,
             (data['id_aluno'], data['data_pagamento'], data['valor'], data['metodo_pagamento'], 
              data.get('referencia', ''), data.get('status', 'pendente'), id_pagamento)
         )
+        if cursor.fetchone() is None:
+            conn.rollback()
+            logging.warning(f"UPDATE: Pagamento com ID {id_pagamento} não encontrado.")
+            return jsonify({"error": "Pagamento não encontrado"}), 404
         conn.commit()
         logging.info(f"UPDATE: Pagamento com ID {id_pagamento} atualizado com sucesso.")
         return jsonify({"message": "Pagamento atualizado"}), 200
+    except ForeignKeyViolation:
+        conn.rollback()
+        logging.warning(f"UPDATE: Aluno com ID {data['id_aluno']} não encontrado.")
+        return jsonify({"error": "Aluno não encontrado"}), 404
     except Exception as e:
         conn.rollback()
         logging.error(f"UPDATE: Erro ao atualizar pagamento com ID {id_pagamento} - {str(e)}")
@@ -137,17 +145,17 @@ def delete_pagamento(id_pagamento):
     
     cursor = conn.cursor()
     try:
-        cursor.execute("SELECT * FROM pagamentos WHERE id_pagamento = %s", (id_pagamento,))
-        if cursor.fetchone() is None:
-            logging.warning(f"DELETE: Pagamento com ID {id_pagamento} não encontrado.")
-            return jsonify({"error": "Pagamento não encontrado"}), 404
-            
         cursor.execute(
             """
             DELETE FROM pagamentos WHERE id_pagamento = %s
+            RETURNING id_pagamento
             """,
             (id_pagamento,)
         )
+        if cursor.fetchone() is None:
+            conn.rollback()
+            logging.warning(f"DELETE: Pagamento com ID {id_pagamento} não encontrado.")
+            return jsonify({"error": "Pagamento não encontrado"}), 404
         conn.commit()
         logging.info(f"DELETE: Pagamento com ID {id_pagamento} removido com sucesso.")
         return jsonify({"message": "Pagamento deletado"}), 200
@@ -1,10 +1,16 @@
-from flask import Flask, request, jsonify
+from flask import Blueprint, request, jsonify
+from psycopg2.errors import ForeignKeyViolation
 import Util.bd as bd
+import Util.lote as lote
+import Util.entidades as entidades
+import Util.etag as etag
+import Util.paginacao as paginacao
+from Util.coalescencia import coalescer
 import base64
 
-app = Flask(__name__)
+presencas_bp = Blueprint('presencas', __name__)
 
-@app.route('/presencas', methods=['POST'])
+@presencas_bp.route('/presencas', methods=['POST'])
 def adicionar_presenca():
     data = request.get_json()
 
@@ -17,21 +23,15 @@ def adicionar_presenca():
         return jsonify({"error": "Connection to DB failed"}), 500
     cursor = conn.cursor()
     try:
-        cursor.execute("SELECT * FROM alunos WHERE id_aluno = %s", (data['id_aluno'],))
-        aluno = cursor.fetchone()
-
-        if aluno is None:
+        bd.execute(cursor, 'presenca_inserir', (data['data_presenca'], data['presente'], data['id_aluno']))
+        if cursor.fetchone() is None:
+            conn.rollback()
             return jsonify({"error": "Aluno não encontrado"}), 404
-
-        cursor.execute(
-            """
-            INSERT INTO presenca (id_aluno, data_presenca, presente)
-            VALUES (%s, %s, %s)
-            """,
-            (data['id_aluno'], data['data_presenca'], data['presente'])
-        )
         conn.commit()
         return jsonify({"message": "Presença adicionada"}), 201
+    except ForeignKeyViolation:
+        conn.rollback()
+        return jsonify({"error": "Aluno não encontrado"}), 404
     except Exception as e:
         conn.rollback()
         return jsonify({"error": str(e)}), 500
@@ -39,36 +39,127 @@ def adicionar_presenca():
         cursor.close()
         conn.close()
 
-@app.route('/presencas/<int:id_presenca>', methods=['GET'])
-def read_presenca(id_presenca):
+@presencas_bp.route('/presencas/bulk', methods=['POST'])
+def adicionar_presencas_lote():
+    try:
+        linhas = lote.ler_linhas(request)
+        atomico = lote.modo(request.args) == 'atomico'
+    except lote.ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = bd.create_connection()
+    if conn is None:
+        return jsonify({"error": "Connection to DB failed"}), 500
+    cursor = conn.cursor()
+    try:
+        # Valida tudo, confere as referências e insere com VALUES de várias linhas
+        resultado = lote.gravar(cursor, lote.PRESENCAS, linhas, atomico)
+        if resultado.gravado:
+            conn.commit()
+        else:
+            conn.rollback()
+        corpo, status = resultado.resposta()
+        return jsonify(corpo), status
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+@presencas_bp.route('/turmas/<int:id_turma>/presencas', methods=['POST'])
+def chamada_turma(id_turma):
+    try:
+        ids, sao_presentes, data_presenca = lote.chamada(request.get_json(silent=True))
+    except lote.ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+
     conn = bd.create_connection()
+    if conn is None:
+        return jsonify({"error": "Connection to DB failed"}), 500
+    cursor = conn.cursor()
+    try:
+        # A turma inteira num único statement, derivado dos alunos da turma
+        bd.execute(cursor, 'presenca_chamada', (id_turma, ids, sao_presentes, data_presenca))
+        linha = cursor.fetchone()
+        if not linha[0]:
+            conn.rollback()
+            return jsonify({"error": "Turma não encontrada"}), 404
+        conn.commit()
+        return jsonify(lote.resposta_chamada(id_turma, data_presenca, linha)), 200
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+@presencas_bp.route('/presencas', methods=['GET'])
+@coalescer
+def listar_presencas():
+    try:
+        consulta = paginacao.consulta(entidades.PRESENCAS, request.args)
+    except paginacao.ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = bd.create_connection(readonly=True)
+    if conn is None:
+        return jsonify({"error": "Connection to DB failed"}), 500
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(consulta.sql, consulta.params)
+        return jsonify(paginacao.pagina(consulta, cursor.fetchall())), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+@presencas_bp.route('/presencas/<int:id_presenca>', methods=['GET'])
+@coalescer
+def read_presenca(id_presenca):
+    try:
+        campos = entidades.PRESENCAS.projecao(request.args.get('fields'))
+    except entidades.ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+    conn = bd.create_connection(readonly=True)
     if conn is None:
         return jsonify({"error": "Connection to DB failed"}), 500
     
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            SELECT * FROM presenca WHERE id_presenca = %s
-            """,
-            (id_presenca,)
-        )
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            # Só a versão, por index-only scan: o 304 não lê nem serializa a linha
+            bd.execute(cursor, 'presenca_versao', (id_presenca,))
+            atual = cursor.fetchone()
+            if atual is not None and etag.corresponde(if_none_match, atual[0], campos):
+                return '', 304, etag.cabecalhos(atual[0], campos)
+        if campos:
+            # ?fields=: só as colunas pedidas saem do banco
+            cursor.execute(entidades.PRESENCAS.sql_por_chave(campos), (id_presenca,))
+        else:
+            bd.execute(cursor, 'presenca_por_id', (id_presenca,))
         presenca = cursor.fetchone()
         if presenca is None:
             return jsonify({"error": "Presença não encontrada"}), 404
+        cabecalhos = etag.cabecalhos(entidades.PRESENCAS.versao(presenca, campos), campos)
+        if campos:
+            return jsonify(entidades.PRESENCAS.para_dict(presenca, campos)), 200, cabecalhos
         return jsonify({
             "id_presenca": presenca[0],
             "id_aluno": presenca[1],
             "data_presenca": presenca[2],
             "presente": presenca[3],
-        })
+        }), 200, cabecalhos
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     finally:
         cursor.close()
         conn.close()
 
-@app.route('/presencas/<int:id_presenca>', methods=['PUT'])
+@presencas_bp.route('/presencas/<int:id_presenca>', methods=['PUT'])
 def update_presenca(id_presenca):
     data = request.get_json()
     conn = bd.create_connection()
@@ -76,13 +167,7 @@ def update_presenca(id_presenca):
         return jsonify({"error": "Connection to DB failed"}), 500
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            UPDATE presenca SET id_aluno = %s, data_presenca = %s, presente = %s
-            WHERE id_presenca = %s
-            """,
-            (data['id_aluno'], data['data_presenca'], data['presente'], id_presenca)
-        )
+        bd.execute(cursor, 'presenca_atualizar', (data['id_aluno'], data['data_presenca'], data['presente'], id_presenca))
         conn.commit()
         return jsonify({"message": "Presença atualizada"}), 200
     except Exception as e:
@@ -92,19 +177,14 @@ def update_presenca(id_presenca):
         cursor.close()
         conn.close()
 
-@app.route('/presencas/<int:id_presenca>', methods=['DELETE'])
+@presencas_bp.route('/presencas/<int:id_presenca>', methods=['DELETE'])
 def delete_presenca(id_presenca):
     conn = bd.create_connection()
     if conn is None:
         return jsonify({"error": "Connection to DB failed"}), 500
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            DELETE FROM presenca WHERE id_presenca = %s
-            """,
-            (id_presenca,)
-        )
+        bd.execute(cursor, 'presenca_remover', (id_presenca,))
         conn.commit()
         return jsonify({"message": "Presença deletada"}), 200
     except Exception as e:
@@ -115,4 +195,6 @@ def delete_presenca(id_presenca):
         conn.close()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    import os
+    from factory import create_app
+    create_app(['presencas']).run(host='0.0.0.0', port=5000, debug=os.getenv('FLASK_DEBUG') == '1')
\ No newline at end of file
@@ -1,10 +1,16 @@
-from flask import Flask, request, jsonify
+from flask import Blueprint, request, jsonify
+from psycopg2.errors import ForeignKeyViolation
 import Util.bd as bd
+import Util.cache as cache
+import Util.entidades as entidades
+import Util.etag as etag
+import Util.paginacao as paginacao
+from Util.coalescencia import coalescer
 import base64
 
-app = Flask(__name__)
+turmas_bp = Blueprint('turmas', __name__)
 
-@app.route('/turmas', methods=['POST'])
+@turmas_bp.route('/turmas', methods=['POST'])
 def adicionar_turma():
     data = request.get_json()
     
@@ -18,23 +24,16 @@ def adicionar_turma():
         return jsonify({"error": "Connection to DB failed"}), 500
     cursor = conn.cursor()
     try:
-        cursor.execute("SELECT id_professor FROM professor WHERE nome_completo = %s", (data['nome_completo'],))
-        professor = cursor.fetchone()
-        
-        if professor is None:
+        # Resolve o professor pelo nome dentro do próprio INSERT
+        bd.execute(cursor, 'turma_inserir', (data['nome_turma'], data['horario'], data['nome_completo']))
+        if cursor.fetchone() is None:
+            conn.rollback()
             return jsonify({"error": "Professor não encontrado"}), 404
-        
-        id_professor = professor[0]
-        
-        cursor.execute(
-            """
-            INSERT INTO turma (nome_turma, id_professor, horario)
-            VALUES (%s, %s, %s)
-            """,
-            (data['nome_turma'], id_professor, data['horario'])
-        )
         conn.commit()
         return jsonify({"message": "Turma adicionada com sucesso"}), 201
+    except ForeignKeyViolation:
+        conn.rollback()
+        return jsonify({"error": "Professor não encontrado"}), 404
     except Exception as e:
         conn.rollback()
         return jsonify({"error": str(e)}), 500
@@ -42,35 +41,85 @@ def adicionar_turma():
         cursor.close()
         conn.close()
         
-@app.route('/turmas/<int:id_turma>', methods=['GET'])
+@turmas_bp.route('/turmas', methods=['GET'])
+@coalescer
+def listar_turmas():
+    try:
+        consulta = paginacao.consulta(entidades.TURMAS, request.args)
+    except paginacao.ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = bd.create_connection(readonly=True)
+    if conn is None:
+        return jsonify({"error": "Connection to DB failed"}), 500
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(consulta.sql, consulta.params)
+        return jsonify(paginacao.pagina(consulta, cursor.fetchall())), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+def _resposta_turma(turma, campos=None):
+    cabecalhos = etag.cabecalhos(entidades.TURMAS.versao(turma, campos), campos)
+    if campos:
+        return jsonify(entidades.TURMAS.para_dict(turma, campos)), 200, cabecalhos
+    return jsonify({
+        "id_turma": turma[0],
+        "nome_turma": turma[1],
+        "id_professor": turma[2],
+        "horario": turma[3],
+    }), 200, cabecalhos
+
+@turmas_bp.route('/turmas/<int:id_turma>', methods=['GET'])
+@coalescer
 def read_turma(id_turma):
-    conn = bd.create_connection()
+    try:
+        campos = entidades.TURMAS.projecao(request.args.get('fields'))
+    except entidades.ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+    if not campos:
+        # Dado de referência: um acerto no cache responde sem abrir conexão
+        turma = cache.TURMAS.get(id_turma)
+        if turma is not None:
+            versao = entidades.TURMAS.versao(turma)
+            if etag.corresponde(request.headers.get('If-None-Match', ''), versao):
+                return '', 304, etag.cabecalhos(versao)
+            return _resposta_turma(turma)
+        geracao = cache.TURMAS.geracao()
+    conn = bd.create_connection(readonly=True)
     if conn is None:
         return jsonify({"error": "Connection to DB failed"}), 500
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            SELECT * FROM turma WHERE id_turma = %s
-            """,
-            (id_turma,)
-        )
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            # Só a versão, por index-only scan: o 304 não lê nem serializa a linha
+            bd.execute(cursor, 'turma_versao', (id_turma,))
+            atual = cursor.fetchone()
+            if atual is not None and etag.corresponde(if_none_match, atual[0], campos):
+                return '', 304, etag.cabecalhos(atual[0], campos)
+        if campos:
+            # ?fields=: só as colunas pedidas saem do banco
+            cursor.execute(entidades.TURMAS.sql_por_chave(campos), (id_turma,))
+        else:
+            bd.execute(cursor, 'turma_por_id', (id_turma,))
         turma = cursor.fetchone()
         if turma is None:
             return jsonify({"error": "Turma não encontrada"}), 404
-        return jsonify({
-            "id_turma": turma[0],
-            "nome_turma": turma[1],
-            "id_professor": turma[2],
-            "horario": turma[3],
-        })
+        if not campos:
+            cache.TURMAS.set(id_turma, turma, geracao)
+        return _resposta_turma(turma, campos)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     finally:
         cursor.close()
         conn.close()
 
-@app.route('/turmas/<int:id_turma>', methods=['PUT'])
+@turmas_bp.route('/turmas/<int:id_turma>', methods=['PUT'])
 def update_turma(id_turma):
     data = request.get_json()
     conn = bd.create_connection()
@@ -78,16 +127,13 @@ def update_turma(id_turma):
         return jsonify({"error": "Connection to DB failed"}), 500
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            UPDATE turma
-            SET nome_turma = %s, id_professor = %s, horario = %s
-            WHERE id_turma = %s
-            """,
+        bd.execute(
+            cursor, 'turma_atualizar',
             (data['nome_turma'], data['id_professor'],
              data['horario'], id_turma)
         )
         conn.commit()
+        cache.TURMAS.invalidar(id_turma)
         return jsonify({"message": "Turma atualizada com sucesso"}), 200
     except Exception as e:
         conn.rollback()
@@ -96,20 +142,16 @@ def update_turma(id_turma):
         cursor.close()
         conn.close()
 
-@app.route('/turmas/<int:id_turma>', methods=['DELETE'])
+@turmas_bp.route('/turmas/<int:id_turma>', methods=['DELETE'])
 def delete_turma(id_turma):
     conn = bd.create_connection()
     if conn is None:
         return jsonify({"error": "Connection to DB failed"}), 500
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            DELETE FROM turma WHERE id_turma = %s
-            """,
-            (id_turma,)
-        )
+        bd.execute(cursor, 'turma_remover', (id_turma,))
         conn.commit()
+        cache.TURMAS.invalidar(id_turma)
         return jsonify({"message": "Turma deletada com sucesso"}), 200
     except Exception as e:
         conn.rollback()
@@ -119,4 +161,6 @@ def delete_turma(id_turma):
         conn.close()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    import os
+    from factory import create_app
+    create_app(['turmas']).run(host='0.0.0.0', port=5000, debug=os.getenv('FLASK_DEBUG') == '1')
\ No newline at end of file
@@ -1,9 +1,12 @@
-from flask import Flask, request, jsonify
+from flask import Blueprint, request, jsonify
 import Util.bd as bd
+import Util.entidades as entidades
+import Util.etag as etag
+from Util.coalescencia import coalescer
 
-app = Flask(__name__)
+usuarios_bp = Blueprint('usuarios', __name__)
 
-@app.route('/usuarios', methods=['POST'])
+@usuarios_bp.route('/usuarios', methods=['POST'])
 def adicionar_usuario():
     data = request.get_json()
     
@@ -17,13 +20,7 @@ def adicionar_usuario():
         return jsonify({"error": "Connection to DB failed"}), 500
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            INSERT INTO usuario (login, senha, nivel_acesso, id_professor)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (data['login'], data['senha'], data['nivel_acesso'], data['id_professor'])
-        )
+        bd.execute(cursor, 'usuario_inserir', (data['login'], data['senha'], data['nivel_acesso'], data['id_professor']))
         conn.commit()
         return jsonify({"message": "Usuário adicionado"}), 201
     except Exception as e:
@@ -33,36 +30,50 @@ def adicionar_usuario():
         cursor.close()
         conn.close()
 
-@app.route('/usuarios/<int:id_usuario>', methods=['GET'])
+@usuarios_bp.route('/usuarios/<int:id_usuario>', methods=['GET'])
+@coalescer
 def read_usuario(id_usuario):
-    conn = bd.create_connection()
+    try:
+        campos = entidades.USUARIOS.projecao(request.args.get('fields'))
+    except entidades.ParametroInvalido as e:
+        return jsonify({"error": str(e)}), 400
+    conn = bd.create_connection(readonly=True)
     if conn is None:
         return jsonify({"error": "Connection to DB failed"}), 500
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            SELECT * FROM usuario WHERE id_usuario = %s
-            """,
-            (id_usuario,)
-        )
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            # Só a versão, por index-only scan: o 304 não lê nem serializa a linha
+            bd.execute(cursor, 'usuario_versao', (id_usuario,))
+            atual = cursor.fetchone()
+            if atual is not None and etag.corresponde(if_none_match, atual[0], campos):
+                return '', 304, etag.cabecalhos(atual[0], campos)
+        if campos:
+            # ?fields=: só as colunas pedidas saem do banco
+            cursor.execute(entidades.USUARIOS.sql_por_chave(campos), (id_usuario,))
+        else:
+            bd.execute(cursor, 'usuario_por_id', (id_usuario,))
         usuario = cursor.fetchone()
         if usuario is None:
             return jsonify({"error": "Usuário não encontrado"}), 404
+        cabecalhos = etag.cabecalhos(entidades.USUARIOS.versao(usuario, campos), campos)
+        if campos:
+            return jsonify(entidades.USUARIOS.para_dict(usuario, campos)), 200, cabecalhos
         return jsonify({
             "id_usuario": usuario[0],
             "login": usuario[1],
             "senha": usuario[2],
             "nivel_acesso": usuario[3],
             "id_professor": usuario[4]
-        })
+        }), 200, cabecalhos
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     finally:
         cursor.close()
         conn.close()
 
-@app.route('/usuarios/<int:id_usuario>', methods=['PUT'])
+@usuarios_bp.route('/usuarios/<int:id_usuario>', methods=['PUT'])
 def update_usuario(id_usuario):
     data = request.get_json()
     conn = bd.create_connection()
@@ -70,12 +81,8 @@ def update_usuario(id_usuario):
         return jsonify({"error": "Connection to DB failed"}), 500
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            UPDATE usuario
-            SET login = %s, senha = %s, nivel_acesso = %s, id_professor = %s
-            WHERE id_usuario = %s
-            """,
+        bd.execute(
+            cursor, 'usuario_atualizar',
             (data['login'], data['senha'], data['nivel_acesso'], data['id_professor'],
              id_usuario)
         )
@@ -88,19 +95,14 @@ def update_usuario(id_usuario):
         cursor.close()
         conn.close()
 
-@app.route('/usuarios/<int:id_usuario>', methods=['DELETE'])
+@usuarios_bp.route('/usuarios/<int:id_usuario>', methods=['DELETE'])
 def delete_usuario(id_usuario):
     conn = bd.create_connection()
     if conn is None:
         return jsonify({"error": "Connection to DB failed"}), 500
     cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            DELETE FROM usuario WHERE id_usuario = %s
-            """,
-            (id_usuario,)
-        )
+        bd.execute(cursor, 'usuario_remover', (id_usuario,))
         conn.commit()
         return jsonify({"message": "Usuario deletado"}), 200
     except Exception as e:
@@ -111,4 +113,6 @@ def delete_usuario(id_usuario):
         conn.close()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    import os
+    from factory import create_app
+    create_app(['usuarios']).run(host='0.0.0.0', port=5000, debug=os.getenv('FLASK_DEBUG') == '1')
\ No newline at end of file
@@ -0,0 +1,256 @@
+# factory.py
+import importlib
+import os
+import threading
+
+import click
+from flask import Blueprint, Flask, Response, g, request
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+import Util.admissao as admissao
+import Util.aquecimento as aquecimento
+import Util.bd as bd
+import Util.cache as cache
+import Util.coalescencia as coalescencia
+import Util.compressao as compressao
+import Util.config as config
+import Util.metricas as metricas
+import Util.perfil as perfil
+import Util.replicas as replicas
+import Util.serializacao as serializacao
+from Util.circuito import CircuitOpenError
+
+# Grupo de entidades -> (módulo, blueprint)
+GRUPOS = {
+    'alunos': ('crudAlunos', 'alunos_bp'),
+    'professores': ('cruProf', 'professores_bp'),
+    'usuarios': ('crudUsuario', 'usuarios_bp'),
+    'turmas': ('crudTurma', 'turmas_bp'),
+    'pagamentos': ('crudPagamento', 'pagamentos_bp'),
+    'presencas': ('crudPresenca', 'presencas_bp'),
+    'atividades': ('crudAtividade', 'atividades_bp'),
+    'atividade_aluno': ('crudAtividade_aluno', 'atividade_aluno_bp'),
+    'import_export': ('importExport', 'import_export_bp'),
+}
+
+# Prefixos servidos pelo Flasgger (UI, especificação e arquivos estáticos)
+CAMINHOS_DOCUMENTACAO = ('/apidocs', '/apispec', '/flasgger_static')
+
+# Rotas de operação, presentes em qualquer deploy
+sistema_bp = Blueprint('sistema', __name__)
+
+
+@sistema_bp.route('/')
+def home():
+    return {"message": "API Sistema Escolar", "status": "running"}
+
+
+@sistema_bp.before_app_request
+def admitir():
+    # Limite de requisições simultâneas por classe (leitura, escrita, exportação)
+    nome = admissao.classe(request.method, request.path)
+    if nome is None:
+        return
+    limitador = admissao.LIMITADORES[nome]
+    limitador.entrar()
+    g.admissao = limitador
+
+
+@sistema_bp.teardown_app_request
+def liberar_admissao(exc):
+    limitador = g.pop('admissao', None)
+    if limitador is not None:
+        limitador.sair()
+
+
+@sistema_bp.app_errorhandler(admissao.Sobrecarga)
+def sobrecarga(e):
+    # Rejeita na hora em vez de enfileirar no pool até o cliente desistir
+    return {"error": str(e)}, 503, {"Retry-After": str(e.retry_after)}
+
+
+@sistema_bp.after_app_request
+def ler_proprias_escritas(response):
+    # Após uma escrita, as leituras deste cliente vão ao primário até a réplica alcançar
+    cfg = config.get_config()
+    if cfg.replicas:
+        replicas.marcar_escrita(response, cfg.replica_max_lag)
+    return response
+
+
+@sistema_bp.after_app_request
+def invalidar_caches(response):
+    # Escrita bem-sucedida: descarta os caches derivados das tabelas do grupo, em todos os workers
+    if request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and response.status_code < 400:
+        cache.invalidar_grupo(request.blueprint)
+    return response
+
+
+@sistema_bp.app_errorhandler(CircuitOpenError)
+def banco_indisponivel(e):
+    # Circuito aberto: responde na hora em vez de esperar o connect_timeout
+    return {"error": "Banco de dados indisponível"}, 503, {"Retry-After": str(e.retry_after)}
+
+
+@sistema_bp.route('/health')
+def health():
+    return {
+        "status": "ok",
+        "pool": bd.pool_stats(),
+        "statements": bd.statements.stats(),
+        "cache": cache.stats(),
+        "admission": admissao.stats(),
+        "coalescing": coalescencia.stats(),
+    }
+
+
+@sistema_bp.route('/ready')
+def ready():
+    # O balanceador só manda tráfego depois que o aquecimento terminou
+    estado = aquecimento.estado()
+    return {"status": "ready" if estado['ready'] else "warming", **estado}, 200 if estado['ready'] else 503
+
+
+@sistema_bp.route('/metrics')
+def metrics():
+    return Response(generate_latest(metricas.registro()), mimetype=CONTENT_TYPE_LATEST)
+
+
+def grupos_configurados():
+    """
+    Entity groups enabled for this deployment.
+    :return: names from APP_GRUPOS (comma-separated), or every group when unset
+    """
+    valor = os.getenv('APP_GRUPOS', '')
+    return [grupo.strip() for grupo in valor.split(',') if grupo.strip()] or list(GRUPOS)
+
+
+def _registrar_blueprints(app, grupos):
+    app.register_blueprint(sistema_bp)
+    for grupo in grupos:
+        modulo, blueprint = GRUPOS[grupo]
+        try:
+            app.register_blueprint(getattr(importlib.import_module(modulo), blueprint))
+        except ImportError as e:
+            print(f"Módulo {modulo} não encontrado: {e}")
+
+
+def _app_documentacao(grupos):
+    """
+    Flask app with the same blueprints plus Flasgger, serving only the docs.
+    :return: Flask app, or None when flasgger is not installed
+    """
+    try:
+        from flasgger import Swagger
+    except ImportError:
+        print("flasgger não instalado; documentação indisponível")
+        return None
+    app = Flask(__name__)
+    _registrar_blueprints(app, grupos)
+    Swagger(app, template={
+        "info": {
+            "title": "API Sistema Escolar",
+            "description": "API RESTful para gerenciar a escola infantil",
+            "version": "1.0.0"
+        }
+    })
+    return app
+
+
+class DocumentacaoSobDemanda:
+    """
+    WSGI middleware that imports flasgger and builds the Swagger app only when
+    the documentation is first requested, keeping it out of worker boot time
+    and memory. Every other path goes straight to the wrapped application.
+    """
+
+    def __init__(self, wsgi_app, grupos):
+        self.wsgi_app = wsgi_app
+        self.grupos = grupos
+        self._docs = None
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        if environ.get('PATH_INFO', '').startswith(CAMINHOS_DOCUMENTACAO):
+            docs = self._documentacao()
+            if docs is not None:
+                return docs(environ, start_response)
+        return self.wsgi_app(environ, start_response)
+
+    def _documentacao(self):
+        if self._docs is None:
+            with self._lock:
+                if self._docs is None:
+                    self._docs = _app_documentacao(self.grupos) or False
+        return self._docs or None
+
+    def especificacoes(self):
+        """
+        Build the documentation app now and generate every OpenAPI spec, as
+        the first /apispec request would (flasgger keeps the result).
+        :return: dict spec endpoint -> spec (empty when flasgger is not installed)
+        """
+        docs = self._documentacao()
+        if docs is None:
+            return {}
+        with docs.test_request_context():
+            return {spec['endpoint']: docs.swag.get_apispecs(spec['endpoint'])
+                    for spec in docs.swag.config.get('specs', [])}
+
+
+def create_app(grupos=None, aquecer=None):
+    """
+    Build the Flask application with the blueprints of the selected entity groups.
+    Only the modules of those groups are imported.
+    :param grupos: names from GRUPOS (default: grupos_configurados())
+    :param aquecer: start the background warmup that gates /ready
+                    (default: on unless APP_WARMUP=0)
+    :return: Flask app
+    :raises ValueError: for an unknown group
+    """
+    grupos = grupos_configurados() if grupos is None else list(grupos)
+    if aquecer is None:
+        aquecer = os.getenv('APP_WARMUP', '1') != '0'
+    desconhecidos = [grupo for grupo in grupos if grupo not in GRUPOS]
+    if desconhecidos:
+        raise ValueError(f"Grupos desconhecidos: {', '.join(desconhecidos)}")
+
+    app = Flask(__name__)
+    # jsonify/get_json com o encoder em C (orjson), datas e Decimal no mesmo formato do modo ASGI
+    app.json = serializacao.ProvedorJSON(app)
+
+    # Resolve a configuração do banco uma única vez; SIGHUP força a releitura
+    try:
+        config.get_config()
+    except Exception as e:
+        print(f"Configuração do banco indisponível: {e}")
+    config.install_sighup_handler()
+
+    # Cache compartilhado entre workers (CACHE_REDIS_URL), atrás do cache de cada processo
+    cache.configurar()
+
+    _registrar_blueprints(app, grupos)
+    # A etapa de aquecimento 'openapi' força a montagem da documentação
+    app.extensions['documentacao'] = DocumentacaoSobDemanda(app.wsgi_app, grupos)
+    app.wsgi_app = app.extensions['documentacao']
+    # gzip/brotli negociado por Accept-Encoding, comprimindo o corpo à medida que é gerado
+    app.wsgi_app = compressao.Compressao(app.wsgi_app)
+
+    @app.cli.command('importtime')
+    @click.option('--top', default=20, help='Quantidade de módulos listados.')
+    @click.option('--modulo', default='main', help='Módulo importado (a partir de App/).')
+    def importtime_command(top, modulo):
+        """Profile the import time of the application (python -X importtime)."""
+        click.echo(perfil.relatorio(perfil.importtime(modulo), top))
+
+    @app.cli.command('jsonbench')
+    @click.option('--linhas', default=1000, help='Linhas em cada payload.')
+    @click.option('--repeticoes', default=20, help='Repetições (vale a melhor).')
+    def jsonbench_command(linhas, repeticoes):
+        """Compare JSON serialization of list and export payloads (json vs orjson)."""
+        click.echo(perfil.relatorio_json(perfil.medir_json(linhas, repeticoes)))
+
+    if aquecer:
+        # Abre o pool, prepara os statements e aquece os dados de referência em segundo plano
+        aquecimento.iniciar(app)
+    return app
@@ -0,0 +1,54 @@
+# gunicorn.conf.py - servidor de produção da API (modo Flask)
+#
+#   gunicorn -c gunicorn.conf.py main:app
+#
+# SIGTERM: para de aceitar conexões e espera as requisições em andamento (graceful_timeout)
+# SIGHUP: recarrega a configuração e troca os workers sem derrubar conexões
+import os
+import tempfile
+
+# Métricas de todos os workers em /metrics: cada processo grava as suas amostras
+# neste diretório. Precisa estar definido antes de a aplicação importar o
+# prometheus_client; no SIGHUP a variável já existe e o diretório é mantido.
+# Um diretório fixado por variável deve ser esvaziado antes de cada início.
+if not os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = tempfile.mkdtemp(prefix='escola-metricas-')
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+import Util.servidor as servidor
+
+_workers, _threads = servidor.dimensionar()
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+worker_class = 'gthread'
+workers = int(os.getenv('GUNICORN_WORKERS', _workers))
+threads = int(os.getenv('GUNICORN_THREADS', _threads))
+
+# Importa a aplicação uma vez no master; os workers compartilham as páginas de memória
+preload_app = True
+
+# Recicla o worker depois de N requisições (com variação, para não reciclar todos juntos)
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 500))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+accesslog = os.getenv('GUNICORN_ACCESSLOG') or None
+errorlog = '-'
+
+# O master não abre conexões nem aquece: cada worker faz isso depois do fork
+_aquecer = os.getenv('APP_WARMUP', '1') != '0'
+os.environ['APP_WARMUP'] = '0'
+
+
+def post_fork(server, worker):
+    import main
+    servidor.iniciar_worker(main.app, aquecer=_aquecer)
+
+
+def child_exit(server, worker):
+    # Gauges "live*" deixam de contar o worker que saiu
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
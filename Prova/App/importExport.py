@@ -1,13 +1,20 @@
-from flask import Flask, request, jsonify, send_file, Blueprint
+from flask import request, jsonify, send_file, Blueprint, Response, stream_with_context
 import Util.bd as bd
+import Util.cache as cache
+import Util.serializacao as serializacao
 import csv
-import json
 import io
+import os
 from datetime import datetime
-import pandas as pd
 
 import_export_bp = Blueprint('import_export', __name__)
 
+# Linhas buscadas por ida ao banco nas exportações, bytes por pedaço enviado
+# e tamanho máximo de um arquivo guardado em cache
+LOTE_EXPORTACAO = int(os.getenv('EXPORTACAO_LOTE', 1000))
+PEDACO_EXPORTACAO = int(os.getenv('EXPORTACAO_PEDACO', 64 * 1024))
+CACHE_MAXIMO_EXPORTACAO = int(os.getenv('EXPORTACAO_CACHE_MAXIMO', 1024 * 1024))
+
 # IMPORTAÇÃO DE ALUNOS
 @import_export_bp.route('/alunos/import', methods=['POST'])
 def import_alunos():
@@ -23,7 +30,6 @@ def import_alunos():
         return jsonify({"error": "Falha na conexão com BD"}), 500
     
     cursor = conn.cursor()
-    sucessos = 0
     erros = []
     
     try:
@@ -31,21 +37,24 @@ def import_alunos():
         stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
         csv_input = csv.DictReader(stream)
         
-        for row_num, row in enumerate(csv_input, start=2):
-            try:
-                cursor.execute("""
-                    INSERT INTO alunos (nome_completo, data_nascimento, nome_responsavel, 
-                    telefone_responsavel, email_responsavel, informacoes_adicionais)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                """, (
-                    row['nome_completo'], row['data_nascimento'], row['nome_responsavel'],
-                    row['telefone_responsavel'], row['email_responsavel'], 
-                    row.get('informacoes_adicionais', '')
-                ))
-                sucessos += 1
-            except Exception as e:
-                erros.append(f"Linha {row_num}: {str(e)}")
+        # Linhas enviadas em lotes; o erro de uma linha não descarta as demais
+        with bd.Pipeline(cursor) as lote:
+            for row_num, row in enumerate(csv_input, start=2):
+                try:
+                    lote.add("""
+                        INSERT INTO alunos (nome_completo, data_nascimento, nome_responsavel, 
+                        telefone_responsavel, email_responsavel, informacoes_adicionais)
+                        VALUES (%s, %s, %s, %s, %s, %s)
+                    """, (
+                        row['nome_completo'], row['data_nascimento'], row['nome_responsavel'],
+                        row['telefone_responsavel'], row['email_responsavel'], 
+                        row.get('informacoes_adicionais', '')
+                    ), chave=row_num)
+                except Exception as e:
+                    erros.append((row_num, e))
         
+        sucessos = lote.sucessos
+        erros = [f"Linha {row_num}: {str(e)}" for row_num, e in sorted(erros + lote.erros, key=lambda erro: erro[0])]
         conn.commit()
         return jsonify({
             "message": f"Importação concluída: {sucessos} sucessos, {len(erros)} erros",
@@ -64,62 +73,54 @@ def import_alunos():
 @import_export_bp.route('/alunos/export', methods=['GET'])
 def export_alunos():
     formato = request.args.get('formato', 'csv')
+    if formato not in ('csv', 'json'):
+        return jsonify({"error": "Formato não suportado"}), 400
+    download_name = f'alunos_{datetime.now().strftime("%Y%m%d")}.{formato}'
+
+    # Arquivo já gerado por este ou outro worker desde a última escrita em alunos
+    chave = ('alunos', formato)
+    arquivo = cache.EXPORTACOES.get(chave)
+    if arquivo is not None:
+        return _enviar(arquivo, download_name)
+    geracao = cache.EXPORTACOES.geracao()
     
-    conn = bd.create_connection()
+    conn = bd.create_connection(readonly=True)
     if conn is None:
         return jsonify({"error": "Falha na conexão com BD"}), 500
     
-    cursor = conn.cursor()
+    # Cursor do lado do servidor: as linhas chegam em lotes enquanto o arquivo é enviado
+    cursor = conn.cursor(name='export_alunos')
     try:
-        cursor.execute("SELECT * FROM alunos")
-        alunos = cursor.fetchall()
-        
-        if formato == 'csv':
-            output = io.StringIO()
-            writer = csv.writer(output)
-            
-            # Cabeçalho
-            writer.writerow(['id_aluno', 'nome_completo', 'data_nascimento', 
-                           'nome_responsavel', 'telefone_responsavel', 'email_responsavel', 
-                           'informacoes_adicionais'])
-            
-            # Dados
-            for aluno in alunos:
-                writer.writerow(aluno)
-            
-            output.seek(0)
-            return send_file(
-                io.BytesIO(output.getvalue().encode('utf-8')),
-                mimetype='text/csv',
-                as_attachment=True,
-                download_name=f'alunos_{datetime.now().strftime("%Y%m%d")}.csv'
-            )
-            
-        elif formato == 'json':
-            alunos_dict = []
-            for aluno in alunos:
-                alunos_dict.append({
-                    'id_aluno': aluno[0],
-                    'nome_completo': aluno[1],
-                    'data_nascimento': str(aluno[2]),
-                    'nome_responsavel': aluno[3],
-                    'telefone_responsavel': aluno[4],
-                    'email_responsavel': aluno[5],
-                    'informacoes_adicionais': aluno[6]
-                })
-            
-            return send_file(
-                io.BytesIO(json.dumps(alunos_dict, indent=2).encode('utf-8')),
-                mimetype='application/json',
-                as_attachment=True,
-                download_name=f'alunos_{datetime.now().strftime("%Y%m%d")}.json'
-            )
-            
+        # Colunas explícitas, na ordem do cabeçalho (a tabela também tem id_turma e versao)
+        cursor.execute("""
+            SELECT id_aluno, nome_completo, data_nascimento, nome_responsavel, telefone_responsavel,
+            email_responsavel, informacoes_adicionais
+            FROM alunos
+        """)
     except Exception as e:
+        _fechar(conn, cursor)
         return jsonify({"error": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
+
+    linhas = _linhas(cursor)
+    if formato == 'csv':
+        # Cabeçalho
+        pedacos = _csv(['id_aluno', 'nome_completo', 'data_nascimento', 
+                        'nome_responsavel', 'telefone_responsavel', 'email_responsavel', 
+                        'informacoes_adicionais'], linhas)
+        mimetype = 'text/csv'
+    else:
+        pedacos = _json(({
+            'id_aluno': aluno[0],
+            'nome_completo': aluno[1],
+            'data_nascimento': str(aluno[2]),
+            'nome_responsavel': aluno[3],
+            'telefone_responsavel': aluno[4],
+            'email_responsavel': aluno[5],
+            'informacoes_adicionais': aluno[6]
+        } for aluno in linhas))
+        mimetype = 'application/json'
+
+    return _transmitir(pedacos, mimetype, download_name, conn, cursor, chave, geracao)
 
 # EXPORTAÇÃO DE RELATÓRIO DE PAGAMENTOS
 @import_export_bp.route('/pagamentos/export', methods=['GET'])
@@ -127,12 +128,21 @@ def export_pagamentos():
     mes = request.args.get('mes')
     ano = request.args.get('ano')
     formato = request.args.get('formato', 'csv')
+    if formato != 'csv':
+        return jsonify({"error": "Formato não suportado"}), 400
+    filename = f'pagamentos_{mes}_{ano}.csv' if mes and ano else f'pagamentos_{datetime.now().strftime("%Y%m%d")}.csv'
+
+    chave = ('pagamentos', formato, mes, ano) if mes and ano else ('pagamentos', formato)
+    arquivo = cache.EXPORTACOES.get(chave)
+    if arquivo is not None:
+        return _enviar(arquivo, filename)
+    geracao = cache.EXPORTACOES.geracao()
     
-    conn = bd.create_connection()
+    conn = bd.create_connection(readonly=True)
     if conn is None:
         return jsonify({"error": "Falha na conexão com BD"}), 500
     
-    cursor = conn.cursor()
+    cursor = conn.cursor(name='export_pagamentos')
     try:
         query = """
             SELECT p.id_pagamento, a.nome_completo, p.data_pagamento, 
@@ -147,33 +157,82 @@ def export_pagamentos():
             params = [mes, ano]
         
         cursor.execute(query, params)
-        pagamentos = cursor.fetchall()
-        
-        if formato == 'csv':
-            output = io.StringIO()
-            writer = csv.writer(output)
-            
-            writer.writerow(['ID', 'Aluno', 'Data', 'Valor', 'Forma Pagamento', 'Status'])
-            
-            for pag in pagamentos:
-                writer.writerow(pag)
-            
-            output.seek(0)
-            filename = f'pagamentos_{mes}_{ano}.csv' if mes and ano else f'pagamentos_{datetime.now().strftime("%Y%m%d")}.csv'
-            
-            return send_file(
-                io.BytesIO(output.getvalue().encode('utf-8')),
-                mimetype='text/csv',
-                as_attachment=True,
-                download_name=filename
-            )
-            
     except Exception as e:
+        _fechar(conn, cursor)
         return jsonify({"error": str(e)}), 500
-    finally:
+
+    pedacos = _csv(['ID', 'Aluno', 'Data', 'Valor', 'Forma Pagamento', 'Status'], _linhas(cursor))
+    return _transmitir(pedacos, 'text/csv', filename, conn, cursor, chave, geracao)
+
+
+def _linhas(cursor):
+    while True:
+        lote = cursor.fetchmany(LOTE_EXPORTACAO)
+        if not lote:
+            return
+        yield from lote
+
+
+def _csv(cabecalho, linhas):
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(cabecalho)
+    for linha in linhas:
+        writer.writerow(linha)
+        if output.tell() >= PEDACO_EXPORTACAO:
+            yield output.getvalue().encode('utf-8')
+            output.seek(0)
+            output.truncate()
+    yield output.getvalue().encode('utf-8')
+
+
+def _json(registros):
+    yield b'['
+    separador = b''
+    for registro in registros:
+        yield separador + serializacao.dumps(registro)
+        separador = b','
+    yield b']'
+
+
+def _transmitir(pedacos, mimetype, download_name, conn, cursor, chave, geracao):
+    """
+    Stream an export while it is read from the database. The file is kept in
+    cache.EXPORTACOES only when it ends up no larger than CACHE_MAXIMO_EXPORTACAO.
+    """
+    def gerar():
+        guardados = []
+        tamanho = 0
+        try:
+            for pedaco in pedacos:
+                if guardados is not None:
+                    tamanho += len(pedaco)
+                    if tamanho <= CACHE_MAXIMO_EXPORTACAO:
+                        guardados.append(pedaco)
+                    else:
+                        # Arquivo grande demais para o cache: só é transmitido
+                        guardados = None
+                yield pedaco
+        finally:
+            _fechar(conn, cursor)
+        if guardados is not None:
+            cache.EXPORTACOES.set(chave, (mimetype, b''.join(guardados)), geracao)
+
+    return Response(stream_with_context(gerar()), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={download_name}'})
+
+
+def _fechar(conn, cursor):
+    try:
         cursor.close()
+    finally:
         conn.close()
 
+
+def _enviar(arquivo, download_name):
+    mimetype, conteudo = arquivo
+    return send_file(io.BytesIO(conteudo), mimetype=mimetype, as_attachment=True, download_name=download_name)
+
 # IMPORTAÇÃO DE PROFESSORES
 @import_export_bp.route('/professores/import', methods=['POST'])
 def import_professores():
@@ -186,23 +245,24 @@ def import_professores():
         return jsonify({"error": "Falha na conexão com BD"}), 500
     
     cursor = conn.cursor()
-    sucessos = 0
     erros = []
     
     try:
         stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
         csv_input = csv.DictReader(stream)
         
-        for row_num, row in enumerate(csv_input, start=2):
-            try:
-                cursor.execute("""
-                    INSERT INTO professor (nome_completo, email, telefone)
-                    VALUES (%s, %s, %s)
-                """, (row['nome_completo'], row['email'], row['telefone']))
-                sucessos += 1
-            except Exception as e:
-                erros.append(f"Linha {row_num}: {str(e)}")
+        with bd.Pipeline(cursor) as lote:
+            for row_num, row in enumerate(csv_input, start=2):
+                try:
+                    lote.add("""
+                        INSERT INTO professor (nome_completo, email, telefone)
+                        VALUES (%s, %s, %s)
+                    """, (row['nome_completo'], row['email'], row['telefone']), chave=row_num)
+                except Exception as e:
+                    erros.append((row_num, e))
         
+        sucessos = lote.sucessos
+        erros = [f"Linha {row_num}: {str(e)}" for row_num, e in sorted(erros + lote.erros, key=lambda erro: erro[0])]
         conn.commit()
         return jsonify({
             "message": f"Importação concluída: {sucessos} sucessos, {len(erros)} erros",
@@ -12,7 +12,8 @@ CREATE TABLE professor (
   id_professor SERIAL PRIMARY KEY,
   nome_completo VARCHAR(255),
   email VARCHAR(100),
-  telefone VARCHAR(20)
+  telefone VARCHAR(20),
+  versao BIGINT NOT NULL DEFAULT 1
 );
 
 CREATE TABLE turma (
@@ -20,6 +21,7 @@ CREATE TABLE turma (
   nome_turma VARCHAR(50),
   id_professor INT,
   horario VARCHAR(100),
+  versao BIGINT NOT NULL DEFAULT 1,
   FOREIGN KEY (id_professor) REFERENCES professor(id_professor)
 );
 
@@ -32,6 +34,7 @@ CREATE TABLE alunos (
     telefone_responsavel VARCHAR(20) NOT NULL,
     email_responsavel VARCHAR(100) NOT NULL,
     informacoes_adicionais TEXT,
+    versao BIGINT NOT NULL DEFAULT 1,
     FOREIGN KEY (id_turma) REFERENCES turma(id_turma)
 );
 
@@ -44,6 +47,7 @@ CREATE TABLE pagamento (
   forma_pagamento VARCHAR(50),
   referencia VARCHAR(100),
   status VARCHAR(20),
+  versao BIGINT NOT NULL DEFAULT 1,
   FOREIGN KEY (id_aluno) REFERENCES alunos(id_aluno)
 );
 
@@ -52,13 +56,15 @@ CREATE TABLE presenca (
   id_aluno INT,
   data_presenca DATE,
   presente BOOLEAN,
+  versao BIGINT NOT NULL DEFAULT 1,
   FOREIGN KEY (id_aluno) REFERENCES alunos(id_aluno)
 );
 
 CREATE TABLE atividade (
   id_atividade SERIAL PRIMARY KEY,
   descricao TEXT,
-  data_realizacao DATE
+  data_realizacao DATE,
+  versao BIGINT NOT NULL DEFAULT 1
 );
 
 CREATE TABLE atividade_aluno (
@@ -75,5 +81,46 @@ CREATE TABLE usuario (
   senha VARCHAR(255),
   nivel_acesso VARCHAR(20),
   id_professor INT,
+  versao BIGINT NOT NULL DEFAULT 1,
   FOREIGN KEY (id_professor) REFERENCES professor(id_professor)
-);
\ No newline at end of file
+);
+
+-- Índices dos filtros das listagens (a chave primária no fim mantém a paginação por cursor)
+CREATE INDEX IF NOT EXISTS idx_alunos_turma ON alunos (id_turma, id_aluno);
+CREATE INDEX IF NOT EXISTS idx_turma_professor ON turma (id_professor, id_turma);
+CREATE INDEX IF NOT EXISTS idx_pagamento_aluno ON pagamento (id_aluno, id_pagamento);
+CREATE INDEX IF NOT EXISTS idx_pagamento_status ON pagamento (status, id_pagamento);
+CREATE INDEX IF NOT EXISTS idx_pagamento_forma ON pagamento (forma_pagamento, id_pagamento);
+CREATE INDEX IF NOT EXISTS idx_pagamento_data ON pagamento (data_pagamento, id_pagamento);
+CREATE INDEX IF NOT EXISTS idx_presenca_aluno ON presenca (id_aluno, id_presenca);
+CREATE INDEX IF NOT EXISTS idx_presenca_data ON presenca (data_presenca, id_presenca);
+CREATE INDEX IF NOT EXISTS idx_atividade_data ON atividade (data_realizacao, id_atividade);
+CREATE INDEX IF NOT EXISTS idx_atividade_aluno_aluno ON atividade_aluno (id_aluno, id_atividade);
+
+-- Uma presença por aluno e dia (upsert da chamada da turma)
+CREATE UNIQUE INDEX IF NOT EXISTS uq_presenca_aluno_data ON presenca (id_aluno, data_presenca);
+
+-- Versão da linha, incrementada a cada UPDATE: base do ETag das leituras por id.
+-- O índice com INCLUDE permite conferir o If-None-Match por index-only scan.
+CREATE OR REPLACE FUNCTION incrementa_versao() RETURNS trigger AS $$
+BEGIN
+  NEW.versao := OLD.versao + 1;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tg_professor_versao BEFORE UPDATE ON professor FOR EACH ROW EXECUTE FUNCTION incrementa_versao();
+CREATE TRIGGER tg_turma_versao BEFORE UPDATE ON turma FOR EACH ROW EXECUTE FUNCTION incrementa_versao();
+CREATE TRIGGER tg_alunos_versao BEFORE UPDATE ON alunos FOR EACH ROW EXECUTE FUNCTION incrementa_versao();
+CREATE TRIGGER tg_pagamento_versao BEFORE UPDATE ON pagamento FOR EACH ROW EXECUTE FUNCTION incrementa_versao();
+CREATE TRIGGER tg_presenca_versao BEFORE UPDATE ON presenca FOR EACH ROW EXECUTE FUNCTION incrementa_versao();
+CREATE TRIGGER tg_atividade_versao BEFORE UPDATE ON atividade FOR EACH ROW EXECUTE FUNCTION incrementa_versao();
+CREATE TRIGGER tg_usuario_versao BEFORE UPDATE ON usuario FOR EACH ROW EXECUTE FUNCTION incrementa_versao();
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_professor_versao ON professor (id_professor) INCLUDE (versao);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_turma_versao ON turma (id_turma) INCLUDE (versao);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_alunos_versao ON alunos (id_aluno) INCLUDE (versao);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_pagamento_versao ON pagamento (id_pagamento) INCLUDE (versao);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_presenca_versao ON presenca (id_presenca) INCLUDE (versao);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_atividade_versao ON atividade (id_atividade) INCLUDE (versao);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_usuario_versao ON usuario (id_usuario) INCLUDE (versao);
@@ -0,0 +1,14 @@
+-- Índices dos filtros das listagens paginadas (GET /alunos, /pagamentos, ...)
+-- CONCURRENTLY não bloqueia escritas; rodar fora de uma transação:
+--   psql -U faat -d escola -f InfraBD/migracoes/001_indices_listagem.sql
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_alunos_turma ON alunos (id_turma, id_aluno);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_turma_professor ON turma (id_professor, id_turma);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_pagamento_aluno ON pagamento (id_aluno, id_pagamento);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_pagamento_status ON pagamento (status, id_pagamento);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_pagamento_forma ON pagamento (forma_pagamento, id_pagamento);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_pagamento_data ON pagamento (data_pagamento, id_pagamento);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_presenca_aluno ON presenca (id_aluno, id_presenca);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_presenca_data ON presenca (data_presenca, id_presenca);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_atividade_data ON atividade (data_realizacao, id_atividade);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_atividade_aluno_aluno ON atividade_aluno (id_aluno, id_atividade);
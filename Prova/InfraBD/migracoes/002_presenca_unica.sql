@@ -0,0 +1,28 @@
+-- Uma presença por aluno e dia: base do upsert da chamada da turma
+-- (POST /turmas/<id_turma>/presencas) e do POST /presencas idempotente.
+--
+-- Remove as presenças duplicadas: de cada aluno e dia fica só o registro mais
+-- recente (maior id_presenca) e os mais antigos são APAGADOS. Depois cria o
+-- índice único sem bloquear as leituras.
+--
+-- Rodar com as escritas de presença paradas (API fora do ar ou só leitura):
+-- uma chamada gravada entre o DELETE e o índice traria duplicatas de volta e
+-- o CREATE INDEX falharia. Rodar fora de uma transação, com o psql (usa \gexec):
+--   psql -U faat -d escola -f InfraBD/migracoes/002_presenca_unica.sql
+-- Se uma execução anterior falhou no meio, o índice inválido que ela deixou
+-- é removido antes de ser criado de novo.
+
+\set ON_ERROR_STOP on
+
+SELECT 'DROP INDEX CONCURRENTLY uq_presenca_aluno_data'
+FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+WHERE c.relname = 'uq_presenca_aluno_data' AND NOT i.indisvalid
+\gexec
+
+DELETE FROM presenca p
+USING presenca mais_recente
+WHERE p.id_aluno = mais_recente.id_aluno
+  AND p.data_presenca = mais_recente.data_presenca
+  AND p.id_presenca < mais_recente.id_presenca;
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_presenca_aluno_data ON presenca (id_aluno, data_presenca);
@@ -0,0 +1,46 @@
+-- Versão de linha para ETag / GET condicional (If-None-Match -> 304).
+-- ADD COLUMN com DEFAULT constante não reescreve a tabela (PostgreSQL 11+);
+-- os índices são criados sem bloquear escritas. Rodar fora de uma transação:
+--   psql -U faat -d escola -f InfraBD/migracoes/003_versao_linha.sql
+
+CREATE OR REPLACE FUNCTION incrementa_versao() RETURNS trigger AS $$
+BEGIN
+  NEW.versao := OLD.versao + 1;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+ALTER TABLE professor ADD COLUMN IF NOT EXISTS versao BIGINT NOT NULL DEFAULT 1;
+DROP TRIGGER IF EXISTS tg_professor_versao ON professor;
+CREATE TRIGGER tg_professor_versao BEFORE UPDATE ON professor FOR EACH ROW EXECUTE FUNCTION incrementa_versao();
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_professor_versao ON professor (id_professor) INCLUDE (versao);
+
+ALTER TABLE turma ADD COLUMN IF NOT EXISTS versao BIGINT NOT NULL DEFAULT 1;
+DROP TRIGGER IF EXISTS tg_turma_versao ON turma;
+CREATE TRIGGER tg_turma_versao BEFORE UPDATE ON turma FOR EACH ROW EXECUTE FUNCTION incrementa_versao();
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_turma_versao ON turma (id_turma) INCLUDE (versao);
+
+ALTER TABLE alunos ADD COLUMN IF NOT EXISTS versao BIGINT NOT NULL DEFAULT 1;
+DROP TRIGGER IF EXISTS tg_alunos_versao ON alunos;
+CREATE TRIGGER tg_alunos_versao BEFORE UPDATE ON alunos FOR EACH ROW EXECUTE FUNCTION incrementa_versao();
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_alunos_versao ON alunos (id_aluno) INCLUDE (versao);
+
+ALTER TABLE pagamento ADD COLUMN IF NOT EXISTS versao BIGINT NOT NULL DEFAULT 1;
+DROP TRIGGER IF EXISTS tg_pagamento_versao ON pagamento;
+CREATE TRIGGER tg_pagamento_versao BEFORE UPDATE ON pagamento FOR EACH ROW EXECUTE FUNCTION incrementa_versao();
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_pagamento_versao ON pagamento (id_pagamento) INCLUDE (versao);
+
+ALTER TABLE presenca ADD COLUMN IF NOT EXISTS versao BIGINT NOT NULL DEFAULT 1;
+DROP TRIGGER IF EXISTS tg_presenca_versao ON presenca;
+CREATE TRIGGER tg_presenca_versao BEFORE UPDATE ON presenca FOR EACH ROW EXECUTE FUNCTION incrementa_versao();
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_presenca_versao ON presenca (id_presenca) INCLUDE (versao);
+
+ALTER TABLE atividade ADD COLUMN IF NOT EXISTS versao BIGINT NOT NULL DEFAULT 1;
+DROP TRIGGER IF EXISTS tg_atividade_versao ON atividade;
+CREATE TRIGGER tg_atividade_versao BEFORE UPDATE ON atividade FOR EACH ROW EXECUTE FUNCTION incrementa_versao();
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_atividade_versao ON atividade (id_atividade) INCLUDE (versao);
+
+ALTER TABLE usuario ADD COLUMN IF NOT EXISTS versao BIGINT NOT NULL DEFAULT 1;
+DROP TRIGGER IF EXISTS tg_usuario_versao ON usuario;
+CREATE TRIGGER tg_usuario_versao BEFORE UPDATE ON usuario FOR EACH ROW EXECUTE FUNCTION incrementa_versao();
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_usuario_versao ON usuario (id_usuario) INCLUDE (versao);
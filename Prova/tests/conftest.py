@@ -1,43 +1,27 @@
 import pytest
-from flask import Flask
 import sys
 import os
 
-# Adiciona o diretório raiz do projeto ao path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Os módulos da aplicação importam Util.* a partir de App/
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'App')))
+
+from factory import create_app
+import Util.cache as cache
+
+
+@pytest.fixture(autouse=True)
+def cache_vazio():
+    """Cada teste começa sem dados de referência em cache."""
+    for memoria in cache.CACHES.values():
+        memoria.invalidar()
+    yield
+
 
 @pytest.fixture
 def app():
-    """Cria uma instância Flask para testes."""
-    app = Flask(__name__)
+    """Cria a aplicação de testes com todos os grupos de entidades."""
+    app = create_app(aquecer=False)
     app.config['TESTING'] = True
-    app.config['DATABASE_URL'] = 'sqlite:///:memory:'  # Banco em memória para testes
-    
-    # Importa e registra as rotas dos módulos
-    try:
-        from App.crudAlunos import app as alunos_app
-        for rule in alunos_app.url_map.iter_rules():
-            if rule.endpoint != 'static':
-                app.add_url_rule(rule.rule, rule.endpoint, alunos_app.view_functions[rule.endpoint], methods=rule.methods)
-    except ImportError:
-        pass
-    
-    try:
-        from App.crudUsuario import app as usuarios_app
-        for rule in usuarios_app.url_map.iter_rules():
-            if rule.endpoint != 'static':
-                app.add_url_rule(rule.rule, rule.endpoint, usuarios_app.view_functions[rule.endpoint], methods=rule.methods)
-    except ImportError:
-        pass
-    
-    try:
-        from App.cruProf import app as prof_app
-        for rule in prof_app.url_map.iter_rules():
-            if rule.endpoint != 'static':
-                app.add_url_rule(rule.rule, rule.endpoint, prof_app.view_functions[rule.endpoint], methods=rule.methods)
-    except ImportError:
-        pass
-    
     return app
 
 @pytest.fixture
@@ -48,4 +32,4 @@ def client(app):
 @pytest.fixture
 def runner(app):
     """Um runner de teste para os comandos CLI do app."""
-    return app.test_cli_runner()
\ No newline at end of file
+    return app.test_cli_runner()
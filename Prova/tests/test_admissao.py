@@ -0,0 +1,118 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import Util.admissao as admissao
+
+
+def test_classes_de_endpoint():
+    assert admissao.classe('GET', '/alunos/1') == 'leitura'
+    assert admissao.classe('POST', '/turmas/4/presencas') == 'escrita'
+    assert admissao.classe('GET', '/alunos/export') == 'exportacao'
+    assert admissao.classe('POST', '/professores/import') == 'exportacao'
+    assert admissao.classe('GET', '/health') is None
+    assert admissao.classe('GET', '/') is None
+
+
+@pytest.mark.parametrize('threads', [4, 10, 32])
+def test_leituras_e_exportacoes_com_filas_deixam_threads_para_escritas(threads):
+    divisao = admissao.dividir(threads)
+
+    ocupadas = sum(limite + fila for limite, fila in (divisao['leitura'], divisao['exportacao']))
+    assert ocupadas < threads
+    assert divisao['escrita'][0] + divisao['escrita'][1] <= threads
+
+
+@pytest.mark.parametrize('conexoes', [4, 10, 32])
+def test_async_divide_as_conexoes_com_fila_maior(conexoes):
+    divisao = admissao.dividir_async(conexoes)
+
+    assert divisao['leitura'][0] + divisao['exportacao'][0] < conexoes
+    assert divisao['escrita'][0] == conexoes
+    assert all(fila >= limite for limite, fila in divisao.values())
+
+
+def _limites(threads):
+    """Async and gthread (limite, fila) of a fresh process with `threads` GUNICORN_THREADS."""
+    codigo = ("import Util.admissao as a\n"
+              "print({n: (l.limite, l.fila) for n, l in a.LIMITADORES_ASYNC.items()})\n"
+              "print({n: (l.limite, l.fila) for n, l in a.LIMITADORES.items()})")
+    env = {nome: valor for nome, valor in os.environ.items() if not nome.startswith('ADMISSAO_')}
+    processo = subprocess.run([sys.executable, '-c', codigo], cwd=os.path.join(os.path.dirname(__file__), '..', 'App'),
+                              env=dict(env, GUNICORN_THREADS=str(threads)), capture_output=True, text=True, check=True)
+    return processo.stdout.splitlines()
+
+
+def test_limites_async_nao_dependem_das_threads_do_gunicorn():
+    async_poucas, gthread_poucas = _limites(2)
+    async_muitas, gthread_muitas = _limites(64)
+
+    assert async_poucas == async_muitas
+    assert gthread_poucas != gthread_muitas
+
+
+def test_rejeita_com_fila_cheia():
+    limitador = admissao.Limitador('teste', limite=1, fila=0)
+    limitador.entrar()
+
+    with pytest.raises(admissao.Sobrecarga) as erro:
+        limitador.entrar()
+
+    assert erro.value.retry_after >= 1
+    assert limitador.stats() == {"limit": 1, "queue": 0, "in_flight": 1, "queued": 0, "rejected": 1}
+
+
+def test_rejeita_depois_do_prazo():
+    limitador = admissao.Limitador('teste', limite=1, fila=5, espera=0.05)
+    limitador.entrar()
+
+    inicio = time.monotonic()
+    with pytest.raises(admissao.Sobrecarga):
+        limitador.entrar()
+
+    assert time.monotonic() - inicio >= 0.05
+    assert limitador.esperando == 0
+
+
+def test_fila_recebe_vaga_liberada():
+    limitador = admissao.Limitador('teste', limite=1, fila=5, espera=5)
+    limitador.entrar()
+    admitidas = []
+
+    def esperar():
+        limitador.entrar()
+        admitidas.append(True)
+
+    thread = threading.Thread(target=esperar)
+    thread.start()
+    while limitador.esperando == 0:
+        time.sleep(0.001)
+    limitador.sair()
+    thread.join(1)
+
+    assert admitidas == [True]
+    assert limitador.ativos == 1
+
+
+def test_exportacao_limitada_sem_bloquear_escritas(client, mocker):
+    exportacoes = admissao.LIMITADORES['exportacao']
+    mocker.patch.object(exportacoes, 'limite', 0)
+    mocker.patch.object(exportacoes, 'fila', 0)
+
+    response = client.get('/alunos/export')
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert client.post('/alunos', json={}).status_code == 400
+    assert admissao.LIMITADORES['escrita'].ativos == 0
+
+
+def test_libera_vaga_depois_da_requisicao(client):
+    client.get('/alunos?cursor=invalido')
+
+    assert admissao.LIMITADORES['leitura'].ativos == 0
+    assert client.get('/health').json['admission']['leitura']['in_flight'] == 0
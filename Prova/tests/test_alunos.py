@@ -2,7 +2,7 @@ import pytest
 from unittest import mock
 
 def test_get_aluno(client, mocker):
-    aluno_mock = (1, "João da Silva", "2000-01-01", 1, "Maria Silva", "11999999999", "maria@email.com", "Informações adicionais")
+    aluno_mock = (1, "João da Silva", "2000-01-01", 1, "Maria Silva", "11999999999", "maria@email.com", "Informações adicionais", 3)
     
     mock_conn = mock.MagicMock()
     mock_cursor = mock.MagicMock()
@@ -98,4 +98,28 @@ def test_delete_aluno(client, mocker):
     response = client.delete('/alunos/1')
     
     assert response.status_code == 200
-    assert "Aluno deletado" in response.json['message']
\ No newline at end of file
+    assert "Aluno deletado" in response.json['message']
+
+def test_add_aluno_turma_nao_encontrada(client, mocker):
+    novo_aluno = {
+        "nome_completo": "Maria Oliveira",
+        "data_nascimento": "2001-05-15",
+        "id_turma": 999,
+        "nome_responsavel": "José Oliveira",
+        "telefone_responsavel": "11888888888",
+        "email_responsavel": "jose@email.com"
+    }
+
+    mock_conn = mock.MagicMock()
+    mock_cursor = mock.MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = None  # INSERT ... SELECT não inseriu nenhuma linha
+
+    mocker.patch('Util.bd.create_connection', return_value=mock_conn)
+
+    response = client.post('/alunos', json=novo_aluno)
+
+    assert response.status_code == 404
+    assert response.json['error'] == "Turma não encontrada"
+    assert mock_cursor.execute.call_count == 1
+    mock_conn.commit.assert_not_called()
@@ -0,0 +1,67 @@
+from unittest import mock
+
+import pytest
+from flask import Flask
+
+import Util.aquecimento as aquecimento
+
+
+@pytest.fixture
+def pool(mocker):
+    pool = mock.MagicMock(minconn=2)
+    pool.getconn.side_effect = lambda: mock.MagicMock()
+    mocker.patch('Util.bd.get_pool', return_value=pool)
+    mocker.patch.object(aquecimento, '_pronto', aquecimento.threading.Event())
+    mocker.patch.object(aquecimento, '_etapas', {})
+    return pool
+
+
+def test_aquecer_abre_minimo_e_marca_pronto(pool, mocker):
+    preparar = mocker.patch('Util.statements.preparar_todos', return_value=30)
+
+    assert not aquecimento.pronto()
+    aquecimento.aquecer(Flask(__name__))
+
+    pool.preencher.assert_called_once_with()
+    assert preparar.call_count == 2
+    assert aquecimento.pronto()
+    estado = aquecimento.estado()
+    assert estado['steps']['conexoes']['result'] == 2
+    assert set(estado['steps']['dados_referencia']['result']) == {'turmas', 'professores', 'atividades'}
+
+
+def test_openapi_monta_a_documentacao_e_gera_as_especificacoes(mocker):
+    import factory
+
+    docs = Flask('docs')
+    docs.swag = mock.MagicMock(config={'specs': [{'endpoint': 'apispec_1'}]})
+    docs.swag.get_apispecs.return_value = {'swagger': '2.0', 'paths': {'/alunos/{id_aluno}': {}}}
+    montar = mocker.patch.object(factory, '_app_documentacao', return_value=docs)
+    app = factory.create_app(['alunos'], aquecer=False)
+    assert not montar.called  # sob demanda até o aquecimento
+
+    assert aquecimento._openapi(app) == 1
+
+    montar.assert_called_once_with(['alunos'])
+    docs.swag.get_apispecs.assert_called_once_with('apispec_1')
+    assert app.extensions['documentacao'].especificacoes()['apispec_1']['paths']
+
+
+def test_openapi_gera_especificacao_real():
+    pytest.importorskip('flasgger')
+    import factory
+
+    app = factory.create_app(['turmas'], aquecer=False)
+
+    especificacoes = app.extensions['documentacao'].especificacoes()
+    assert aquecimento._openapi(app) == len(especificacoes) >= 1
+    assert all(spec['info']['title'] == 'API Sistema Escolar' for spec in especificacoes.values())
+
+
+def test_falha_mantem_nao_pronto(pool):
+    pool.preencher.side_effect = OSError('connection refused')
+
+    with pytest.raises(OSError):
+        aquecimento.aquecer(Flask(__name__))
+
+    assert not aquecimento.pronto()
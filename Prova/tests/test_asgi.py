@@ -0,0 +1,143 @@
+import asyncio
+import datetime
+import decimal
+from unittest import mock
+
+import pytest
+
+pytest.importorskip('asyncpg')
+pytest.importorskip('starlette')
+from starlette.testclient import TestClient
+
+import asgi
+
+
+class ConexaoAsync:
+    def __init__(self, fetchrow=None, fetch=None, execute='DELETE 1', fetchval=None):
+        self.fetchrow = mock.AsyncMock(return_value=fetchrow)
+        self.fetchval = mock.AsyncMock(return_value=fetchval)
+        self.fetch = mock.AsyncMock(return_value=fetch or [])
+        self.execute = mock.AsyncMock(return_value=execute)
+
+    def transaction(self):
+        transacao = mock.MagicMock()
+        transacao.__aenter__ = mock.AsyncMock()
+        transacao.__aexit__ = mock.AsyncMock(return_value=False)
+        return transacao
+
+
+@pytest.fixture
+def conexao(monkeypatch):
+    def configurar(**kwargs):
+        conn = ConexaoAsync(**kwargs)
+        pool = mock.MagicMock()
+        pool.acquire = mock.AsyncMock(return_value=conn)
+        pool.release = mock.AsyncMock()
+        monkeypatch.setattr(asgi, '_get_pool', mock.AsyncMock(return_value=pool))
+        return conn
+    return configurar
+
+
+def test_get_pagamento_mesmo_formato_do_flask(conexao):
+    conexao(fetchrow=(1, 123, datetime.date(2023, 5, 15), decimal.Decimal('150.00'), 'pix', 'ref', 'pago', 3))
+
+    response = TestClient(asgi.app).get('/pagamentos/1')
+
+    assert response.status_code == 200
+    assert response.json()['valor_pago'] == '150.00'
+    assert response.json()['data_pagamento'] == 'Mon, 15 May 2023 00:00:00 GMT'
+
+
+def test_get_aluno_nao_encontrado(conexao):
+    conexao(fetchrow=None)
+
+    response = TestClient(asgi.app).get('/alunos/999')
+
+    assert response.status_code == 404
+    assert "não encontrado" in response.json()['error']
+
+
+def test_add_presenca_converte_tipos(conexao):
+    conn = conexao(fetchrow=(1,))
+
+    response = TestClient(asgi.app).post(
+        '/presencas', json={"id_aluno": "1", "data_presenca": "2024-01-15", "presente": True}
+    )
+
+    assert response.status_code == 201
+    args = conn.fetchrow.call_args.args
+    assert args[1:] == (datetime.date(2024, 1, 15), True, 1)
+
+
+def test_chamada_turma_data_invalida(conexao):
+    conn = conexao()
+
+    response = TestClient(asgi.app).post('/turmas/4/presencas', json={"data_presenca": "01/03/2024", "ausentes": []})
+
+    assert response.status_code == 400
+    assert "AAAA-MM-DD" in response.json()['error']
+    conn.fetchrow.assert_not_called()
+
+
+def test_falha_de_conexao(monkeypatch):
+    monkeypatch.setattr(asgi, '_get_pool', mock.AsyncMock(side_effect=OSError('recusada')))
+
+    response = TestClient(asgi.app).get('/turmas/1')
+
+    assert response.status_code == 500
+    assert response.json()['error'] == 'Connection to DB failed'
+
+
+def test_get_condicional_responde_304(conexao):
+    conn = conexao(fetchval=3)
+
+    response = TestClient(asgi.app).get('/turmas/1', headers={'If-None-Match': '"3"'})
+
+    assert response.status_code == 304
+    assert response.headers['ETag'] == '"3"'
+    conn.fetchrow.assert_not_called()
+
+
+def test_listagem_comprimida(conexao):
+    conexao(fetch=[(i, f'Professor {i}', f'p{i}@escola.com', '1199999') for i in range(1, 101)])
+
+    response = TestClient(asgi.app).get('/professores?limit=100', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert len(response.json()['items']) == 100
+
+
+def test_rejeita_leitura_acima_do_limite(conexao, monkeypatch):
+    conn = conexao()
+    leituras = asgi.admissao.LIMITADORES_ASYNC['leitura']
+    monkeypatch.setattr(leituras, 'limite', 0)
+    monkeypatch.setattr(leituras, 'fila', 0)
+
+    response = TestClient(asgi.app).get('/alunos/1')
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    conn.fetchrow.assert_not_called()
+
+
+def test_gets_simultaneos_compartilham_a_consulta(conexao):
+    httpx = pytest.importorskip('httpx')
+    conn = conexao()
+
+    async def buscar(*args):
+        await asyncio.sleep(0.05)
+        return [(1, 7, 'Pintura', datetime.date(2024, 3, 1))]
+
+    conn.fetch.side_effect = buscar
+
+    async def cenario():
+        transporte = httpx.ASGITransport(app=asgi.app)
+        async with httpx.AsyncClient(transport=transporte, base_url='http://teste') as cliente:
+            return await asyncio.gather(*[cliente.get('/atividade_aluno/aluno/7') for _ in range(3)])
+
+    respostas = asyncio.run(cenario())
+
+    assert [r.status_code for r in respostas] == [200] * 3
+    assert respostas[2].json()[0]['descricao'] == 'Pintura'
+    assert conn.fetch.await_count == 1
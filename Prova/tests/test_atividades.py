@@ -2,7 +2,7 @@ import pytest
 from unittest import mock
 
 def test_get_atividade(client, mocker):
-    atividade_mock = (1, "Prova de Matemática", "2023-06-15")
+    atividade_mock = (1, "Prova de Matemática", "2023-06-15", 3)
     
     mock_conn = mock.MagicMock()
     mock_cursor = mock.MagicMock()
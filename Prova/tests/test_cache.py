@@ -0,0 +1,126 @@
+import threading
+from unittest import mock
+
+from Util.cache import CacheLRU
+import Util.cache as cache
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+def test_lru_remove_o_menos_usado():
+    memoria = CacheLRU('teste', capacidade=2)
+    memoria.set(1, 'a')
+    memoria.set(2, 'b')
+    memoria.get(1)
+    memoria.set(3, 'c')
+
+    assert memoria.get(2) is None
+    assert memoria.get(1) == 'a'
+    assert memoria.stats()['evictions'] == 1
+
+
+def test_ttl_expira_entrada():
+    relogio = Relogio()
+    memoria = CacheLRU('teste', ttl=10, relogio=relogio)
+    memoria.set(1, 'a')
+
+    relogio.agora = 9.9
+    assert memoria.get(1) == 'a'
+    relogio.agora = 10.0
+    assert memoria.get(1) is None
+    assert memoria.stats()['entries'] == 0
+
+
+def test_leitura_anterior_a_invalidacao_nao_entra_no_cache():
+    memoria = CacheLRU('teste')
+    geracao = memoria.geracao()
+    memoria.invalidar(1)  # escrita concorrente terminou depois da leitura
+
+    memoria.set(1, 'antigo', geracao)
+
+    assert memoria.get(1) is None
+
+
+def test_acesso_concorrente():
+    memoria = CacheLRU('teste', capacidade=50)
+
+    def trabalhar(base):
+        for i in range(500):
+            memoria.set((base, i % 80), i)
+            memoria.get((base, (i * 7) % 80))
+            if i % 50 == 0:
+                memoria.invalidar((base, i % 80))
+
+    threads = [threading.Thread(target=trabalhar, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = memoria.stats()
+    assert stats['entries'] <= 50
+    assert stats['hits'] + stats['misses'] == 8 * 500
+
+
+def test_get_turma_usa_cache_e_put_invalida(client, mocker):
+    mock_conn = mock.MagicMock()
+    mock_cursor = mock.MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = (1, "Turma A", 1, "08:00", 2)
+    create_connection = mocker.patch('Util.bd.create_connection', return_value=mock_conn)
+
+    assert client.get('/turmas/1').json['nome_turma'] == "Turma A"
+    response = client.get('/turmas/1')
+
+    assert response.json['nome_turma'] == "Turma A"
+    assert response.headers['ETag'] == '"2"'
+    assert create_connection.call_count == 1
+    assert client.get('/turmas/1', headers={'If-None-Match': '"2"'}).status_code == 304
+    assert create_connection.call_count == 1
+
+    client.put('/turmas/1', json={"nome_turma": "Turma B", "id_professor": 1, "horario": "08:00"})
+    mock_cursor.fetchone.return_value = (1, "Turma B", 1, "08:00", 3)
+
+    assert client.get('/turmas/1').json['nome_turma'] == "Turma B"
+    assert cache.TURMAS.stats()['hits'] == 2
+
+
+def test_exportacao_transmitida_em_lotes_e_guardada_em_cache(client, mocker):
+    mock_conn = mock.MagicMock()
+    mock_cursor = mock.MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchmany.side_effect = [
+        [(1, 'Ana', '2015-01-01', 'Maria', '119', 'm@x.com', '')],
+        [(2, 'Bia', '2015-02-02', 'Rita', '118', 'r@x.com', '')],
+        [],
+    ]
+    mocker.patch('Util.bd.create_connection', return_value=mock_conn)
+
+    response = client.get('/alunos/export')
+
+    assert response.data.decode().splitlines()[1:] == [
+        '1,Ana,2015-01-01,Maria,119,m@x.com,', '2,Bia,2015-02-02,Rita,118,r@x.com,'
+    ]
+    assert response.headers['Content-Disposition'].startswith('attachment')
+    assert mock_cursor.fetchmany.call_count == 3
+    mock_conn.close.assert_called_once()
+    assert client.get('/alunos/export').data == response.data
+    assert mock_cursor.execute.call_count == 1
+
+
+def test_exportacao_grande_nao_vai_para_o_cache(client, mocker):
+    mocker.patch('importExport.CACHE_MAXIMO_EXPORTACAO', 10)
+    mock_conn = mock.MagicMock()
+    mock_cursor = mock.MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchmany.side_effect = [[(1, 'Ana', '2023-05-15', 150, 'pix', 'pago')], []]
+    mocker.patch('Util.bd.create_connection', return_value=mock_conn)
+
+    assert client.get('/pagamentos/export').data.startswith(b'ID,Aluno')
+    assert cache.EXPORTACOES.get(('pagamentos', 'csv')) is None
@@ -0,0 +1,110 @@
+import datetime
+import decimal
+from unittest import mock
+
+import pytest
+
+from Util.cache import CacheLRU
+from Util.cache_compartilhado import CANAL, Compartilhado, Memoria, codificar, decodificar
+import Util.cache as cache
+
+
+@pytest.fixture
+def servidor():
+    servidor = Memoria()
+    yield servidor
+    cache.configurar(None)
+    for memoria in cache.CACHES.values():
+        memoria.compartilhado = None
+
+
+def _worker(servidor, nome='teste'):
+    memoria = CacheLRU(nome)
+    memoria.compartilhado = Compartilhado(servidor)
+    return memoria
+
+
+def test_l2_atende_falha_do_l1(servidor):
+    worker_a = _worker(servidor)
+    worker_b = _worker(servidor)
+    worker_a.set(1, ('a', 1))
+
+    assert worker_b.get(1) == ('a', 1)
+    assert worker_b.stats()['entries'] == 1  # promovido ao L1
+
+
+def test_invalidacao_publicada_remove_do_l1_dos_outros_workers(servidor):
+    worker_b = _worker(servidor)
+    worker_b.compartilhado.assinar(lambda nome, chave: worker_b.invalidar_local(chave))
+    worker_b.set(1, 'antigo')
+
+    # Invalidação feita por outro processo
+    servidor.delete('escola:cache:teste:1')
+    servidor.publish(CANAL, codificar(('outro-processo', 'teste', 1)))
+
+    assert worker_b.get(1) is None
+
+
+def test_leitura_anterior_a_invalidacao_de_outro_worker_nao_entra_no_l2(servidor):
+    worker_a = _worker(servidor)
+    worker_b = _worker(servidor)
+    geracao = worker_a.geracao()  # antes de ler do banco
+
+    worker_b.invalidar(1)  # escrita concorrente em outro worker
+    worker_a.set(1, 'antigo', geracao)
+
+    assert servidor.get('escola:cache:teste:1') is None
+    assert worker_a.compartilhado.descartados == 1
+    worker_a.set(1, 'novo', worker_a.geracao())
+    assert worker_b.get(1) == 'novo'
+
+
+def test_valores_em_json_preservam_tipos_das_linhas():
+    linha = (1, 'Ana', datetime.date(2015, 1, 1), decimal.Decimal('150.00'), None, True)
+    arquivo = ('text/csv', 'id;nome\n1;Ana\n'.encode('utf-8'))
+
+    assert decodificar(codificar(linha)) == linha
+    assert decodificar(codificar(arquivo)) == arquivo
+    assert decodificar(codificar(('origem', 'exportacoes', ('alunos', 'csv')))) == ('origem', 'exportacoes', ('alunos', 'csv'))
+
+
+def test_ignora_a_propria_invalidacao(servidor):
+    recebidas = []
+    compartilhado = Compartilhado(servidor)
+    compartilhado.assinar(lambda nome, chave: recebidas.append((nome, chave)))
+
+    compartilhado.invalidar('teste', 1)
+
+    assert recebidas == []
+
+
+def test_servidor_indisponivel_conta_como_falha():
+    cliente = mock.MagicMock()
+    cliente.get.side_effect = ConnectionError('recusada')
+    memoria = CacheLRU('teste')
+    memoria.compartilhado = Compartilhado(cliente)
+
+    assert memoria.get(1) is None
+    assert memoria.compartilhado.erros == 1
+
+
+def test_escrita_em_alunos_invalida_exportacao(client, mocker, servidor):
+    cache.configurar(Compartilhado(servidor))
+    mock_conn = mock.MagicMock()
+    mock_cursor = mock.MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchmany.side_effect = [[(1, 'Ana', '2015-01-01', 'Maria', '119', 'm@x.com', '')], []]
+    mocker.patch('Util.bd.create_connection', return_value=mock_conn)
+
+    assert client.get('/alunos/export').data.startswith(b'id_aluno')
+    assert client.get('/alunos/export').data.startswith(b'id_aluno')
+    assert mock_cursor.execute.call_count == 1
+
+    mock_cursor.fetchone.return_value = (7,)
+    client.post('/alunos', json={
+        "nome_completo": "Bia", "data_nascimento": "2015-02-02", "id_turma": 1,
+        "nome_responsavel": "Rita", "telefone_responsavel": "118", "email_responsavel": "r@x.com",
+    })
+
+    assert cache.EXPORTACOES.get(('alunos', 'csv')) is None
+    assert not list(servidor.scan_iter(match='escola:cache:exportacoes:*'))
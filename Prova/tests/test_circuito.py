@@ -0,0 +1,66 @@
+import time
+from unittest import mock
+
+import pytest
+from psycopg2 import OperationalError
+
+import Util.bd as bd
+from Util.circuito import ABERTO, FECHADO, CircuitBreaker, CircuitOpenError
+
+
+def esperar(condicao, limite=2.0):
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        if condicao():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_abre_apos_falhas_consecutivas():
+    breaker = CircuitBreaker(mock.MagicMock(side_effect=OperationalError), limite=3, tempo_reset=60)
+
+    breaker.falha()
+    breaker.falha()
+    breaker.check()
+    breaker.falha()
+
+    assert breaker.estado == ABERTO
+    with pytest.raises(CircuitOpenError) as erro:
+        breaker.check()
+    assert 1 <= erro.value.retry_after <= 60
+
+
+def test_sucesso_zera_contagem():
+    breaker = CircuitBreaker(mock.MagicMock(), limite=2, tempo_reset=60)
+
+    breaker.falha()
+    breaker.sucesso()
+    breaker.falha()
+
+    assert breaker.estado == FECHADO
+
+
+def test_sonda_fecha_circuito():
+    sonda = mock.MagicMock(side_effect=[OperationalError, None])
+    breaker = CircuitBreaker(sonda, limite=1, tempo_reset=0.01)
+
+    breaker.falha()
+
+    assert esperar(lambda: breaker.estado == FECHADO)
+    assert sonda.call_count == 2
+    breaker.check()
+
+
+def test_create_connection_falha_rapido_com_circuito_aberto(mocker):
+    pool = mocker.MagicMock()
+    pool.getconn.side_effect = OperationalError("connection refused")
+    mocker.patch('Util.bd.get_pool', return_value=pool)
+    breaker = CircuitBreaker(mocker.MagicMock(side_effect=OperationalError), limite=2, tempo_reset=60)
+    mocker.patch.object(bd, 'breaker', breaker)
+
+    assert bd.create_connection() is None
+    assert bd.create_connection() is None
+    with pytest.raises(CircuitOpenError):
+        bd.create_connection()
+    assert pool.getconn.call_count == 2
@@ -0,0 +1,186 @@
+import asyncio
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+import Util.coalescencia as coalescencia
+
+
+def test_chamadas_simultaneas_executam_uma_vez():
+    voos = coalescencia.SingleFlight()
+    execucoes = []
+    liberar = threading.Event()
+
+    def consulta():
+        execucoes.append(1)
+        liberar.wait(1)
+        return 'resposta'
+
+    resultados = []
+    threads = [threading.Thread(target=lambda: resultados.append(voos.executar('k', consulta))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while voos.seguidores < 4:
+        time.sleep(0.001)
+    liberar.set()
+    for thread in threads:
+        thread.join(1)
+
+    assert execucoes == [1]
+    assert resultados == ['resposta'] * 5
+    assert voos.stats() == {"leaders": 1, "followers": 4, "timeouts": 0, "ratio": 0.8}
+
+
+def test_chamadas_seguidas_nao_reaproveitam():
+    voos = coalescencia.SingleFlight()
+
+    assert voos.executar('k', lambda: 1) == 1
+    assert voos.executar('k', lambda: 2) == 2
+    assert voos.stats()['followers'] == 0
+
+
+def test_erro_do_lider_chega_aos_seguidores():
+    voos = coalescencia.SingleFlight()
+    entrou = threading.Event()
+    liberar = threading.Event()
+    erros = []
+
+    def falhar():
+        entrou.set()
+        liberar.wait(1)
+        raise RuntimeError('banco')
+
+    def chamar():
+        try:
+            voos.executar('k', falhar)
+        except RuntimeError as e:
+            erros.append(str(e))
+
+    lider = threading.Thread(target=chamar)
+    lider.start()
+    entrou.wait(1)
+    seguidor = threading.Thread(target=chamar)
+    seguidor.start()
+    while voos.seguidores < 1:
+        time.sleep(0.001)
+    liberar.set()
+    lider.join(1)
+    seguidor.join(1)
+
+    assert erros == ['banco', 'banco']
+
+
+def test_seguidor_desiste_de_lider_travado():
+    voos = coalescencia.SingleFlight(espera=0.05)
+    entrou = threading.Event()
+    liberar = threading.Event()
+
+    def travada():
+        entrou.set()
+        liberar.wait(1)
+        return 'lider'
+
+    lider = threading.Thread(target=voos.executar, args=('k', travada))
+    lider.start()
+    entrou.wait(1)
+
+    assert voos.executar('k', lambda: 'propria') == 'propria'
+    assert voos.stats()['timeouts'] == 1
+    liberar.set()
+    lider.join(1)
+
+
+def test_async_lider_cancelado_nao_cancela_os_seguidores():
+    voos = coalescencia.SingleFlightAsync()
+
+    async def consulta():
+        await asyncio.sleep(0.05)
+        return 'resposta'
+
+    async def cenario():
+        lider = asyncio.ensure_future(voos.executar('k', consulta))
+        await asyncio.sleep(0)
+        seguidor = asyncio.ensure_future(voos.executar('k', consulta))
+        await asyncio.sleep(0)
+        lider.cancel()
+        return await seguidor, lider.cancelled()
+
+    assert asyncio.run(cenario()) == ('resposta', True)
+    assert voos.stats()['timeouts'] == 0
+
+
+def test_async_seguidor_desiste_de_lider_travado():
+    voos = coalescencia.SingleFlightAsync(espera=0.05)
+
+    async def travada():
+        await asyncio.sleep(1)
+        return 'lider'
+
+    async def propria():
+        return 'propria'
+
+    async def cenario():
+        lider = asyncio.ensure_future(voos.executar('k', travada))
+        await asyncio.sleep(0)
+        resultado = await voos.executar('k', propria)
+        lider.cancel()
+        return resultado
+
+    assert asyncio.run(cenario()) == 'propria'
+    assert voos.stats()['timeouts'] == 1
+
+
+def test_chave_normaliza_parametros():
+    a = coalescencia.chave('listar_alunos', {}, [('limit', '10'), ('id_turma', '2')])
+    b = coalescencia.chave('listar_alunos', {}, [('id_turma', '2'), ('limit', '10')])
+
+    assert a == b
+    assert a != coalescencia.chave('listar_alunos', {}, [('id_turma', '2'), ('limit', '10')], '"3"')
+
+
+def test_gets_identicos_compartilham_a_consulta(app, mocker):
+    liberar = threading.Event()
+    mock_conn = mock.MagicMock()
+    mock_cursor = mock_conn.cursor.return_value
+
+    def buscar():
+        liberar.wait(1)
+        return [(1, 7, 'Pintura', '2024-03-01')]
+
+    mock_cursor.fetchall.side_effect = buscar
+    create_connection = mocker.patch('Util.bd.create_connection', return_value=mock_conn)
+    antes = coalescencia.VOOS.seguidores
+
+    respostas = []
+
+    def get():
+        respostas.append(app.test_client().get('/atividade_aluno/aluno/7'))
+
+    threads = [threading.Thread(target=get) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while coalescencia.VOOS.seguidores - antes < 3:
+        time.sleep(0.001)
+    liberar.set()
+    for thread in threads:
+        thread.join(1)
+
+    assert create_connection.call_count == 1
+    assert [r.status_code for r in respostas] == [200] * 4
+    assert all(r.json == [{"id_atividade": 1, "id_aluno": 7, "descricao": "Pintura", "data_realizacao": "2024-03-01"}]
+               for r in respostas)
+
+
+@pytest.mark.parametrize('cabecalho', [{'If-None-Match': '"3"'}, {'X-Read-Your-Writes': '1'}])
+def test_requisicoes_diferentes_nao_se_misturam(client, cabecalho, mocker):
+    identidades = []
+    mocker.patch.object(coalescencia.VOOS, 'executar',
+                        side_effect=lambda chave, funcao, endpoint: identidades.append(chave) or funcao())
+    mocker.patch('Util.bd.create_connection', return_value=None)
+
+    client.get('/atividade_aluno/aluno/7')
+    client.get('/atividade_aluno/aluno/7', headers=cabecalho)
+
+    assert identidades[0] != identidades[1]
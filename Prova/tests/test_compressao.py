@@ -0,0 +1,108 @@
+import gzip
+import zlib
+from unittest import mock
+
+from flask import Flask, Response
+from prometheus_client import REGISTRY
+
+import Util.compressao as compressao
+
+
+def _app(corpo, mimetype='application/json', **cabecalhos):
+    app = Flask(__name__)
+
+    @app.route('/')
+    def index():
+        return Response(corpo() if callable(corpo) else corpo, mimetype=mimetype, headers=cabecalhos)
+
+    app.wsgi_app = compressao.Compressao(app.wsgi_app)
+    return app.test_client()
+
+
+def test_negociacao():
+    assert compressao.escolher('gzip, deflate') == 'gzip'
+    assert compressao.escolher('gzip;q=0') is None
+    assert compressao.escolher('identity') is None
+    assert compressao.escolher(None) is None
+
+
+def test_comprime_json_grande():
+    corpo = b'{"nome_completo": "Ana"},' * 200
+    response = _app(corpo, ETag='"7"').get('/', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert response.headers['ETag'] == 'W/"7"'
+    assert 'Content-Length' not in response.headers
+    assert gzip.decompress(response.data) == corpo
+
+
+def test_resposta_comprimida_nao_anuncia_ranges():
+    corpo = b'id,nome\n' + b'1,Ana\n' * 500
+    response = _app(corpo, mimetype='text/csv', **{'Accept-Ranges': 'bytes'}).get(
+        '/', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Ranges' not in response.headers
+
+
+def test_nao_comprime_resposta_pequena():
+    response = _app(b'{"id": 1}').get('/', headers={'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in response.headers
+    assert response.data == b'{"id": 1}'
+
+
+def test_nao_comprime_sem_accept_encoding():
+    response = _app(b'x' * 5000, mimetype='text/csv').get('/')
+
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_comprime_corpo_gerado_aos_poucos():
+    gerados = []
+
+    def linhas():
+        for i in range(1000):
+            gerados.append(i)
+            yield f'{i},aluno {i}\n'.encode()
+
+    response = _app(linhas, mimetype='text/csv').get('/', headers={'Accept-Encoding': 'gzip'}, buffered=False)
+    pedacos = response.response
+    primeiro = next(iter(pedacos))
+
+    # Os cabeçalhos saem antes do fim do corpo
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert len(gerados) < 1000
+    descompressor = zlib.decompressobj(31)
+    texto = descompressor.decompress(primeiro + b''.join(pedacos))
+    assert texto.splitlines()[-1] == b'999,aluno 999'
+    response.close()
+
+
+def test_metricas_de_compressao():
+    def economia():
+        return REGISTRY.get_sample_value('escola_compression_bytes_saved_total', {'encoding': 'gzip'}) or 0
+
+    antes = economia()
+    response = _app(b'a' * 10000, mimetype='text/plain').get('/', headers={'Accept-Encoding': 'gzip'})
+
+    assert len(response.data) < 1000
+    assert economia() - antes > 9000
+    assert REGISTRY.get_sample_value('escola_compression_cpu_seconds_total', {'encoding': 'gzip'}) is not None
+
+
+def test_export_alunos_comprimido(client, mocker):
+    mock_conn = mock.MagicMock()
+    mock_cursor = mock.MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchmany.side_effect = [[
+        (i, f'Aluno {i}', '2015-01-01', 'Maria', '119', 'm@x.com', '') for i in range(200)
+    ], []]
+    mocker.patch('Util.bd.create_connection', return_value=mock_conn)
+
+    response = client.get('/alunos/export', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data).startswith(b'id_aluno,nome_completo')
@@ -0,0 +1,67 @@
+import os
+import signal
+
+import pytest
+
+import Util.config as config
+
+
+@pytest.fixture
+def arquivo_config(tmp_path, monkeypatch):
+    caminho = tmp_path / 'paramsBD.yml'
+    caminho.write_text(
+        'database: "escola"\nuser: "faat"\npassword: "faat"\nhost: "db"\nport: "5432"\n'
+    )
+    monkeypatch.delenv('DB_HOST', raising=False)
+    monkeypatch.setattr(config, 'CONFIG_FILE', str(caminho))
+    monkeypatch.setattr(config, '_config', None)
+    monkeypatch.setattr(config, '_recarregar', False)
+    return caminho
+
+
+def test_config_carregada_uma_vez(arquivo_config, mocker):
+    primeira = config.get_config()
+    spy = mocker.spy(config.yaml, 'safe_load')
+
+    assert config.get_config() is primeira
+    assert spy.call_count == 0
+    assert primeira.conexao['database'] == 'escola'
+    assert primeira.pool['maxconn'] == 10
+
+
+def test_recarrega_quando_mtime_muda(arquivo_config, monkeypatch):
+    primeira = config.get_config()
+    arquivo_config.write_text(
+        'database: "escola2"\nuser: "faat"\npassword: "faat"\nhost: "db"\nport: "5432"\n'
+    )
+    os.utime(arquivo_config, (primeira.mtime + 10, primeira.mtime + 10))
+    monkeypatch.setattr(config, '_ultima_verificacao', 0.0)
+
+    nova = config.get_config()
+    assert nova is not primeira
+    assert nova.conexao['database'] == 'escola2'
+    assert nova.versao == primeira.versao + 1
+
+
+def test_sighup_forca_releitura(arquivo_config):
+    primeira = config.get_config()
+    config._sighup(signal.SIGHUP, None)
+
+    assert config.get_config() is not primeira
+
+
+def test_arquivo_invalido_mantem_config_anterior(arquivo_config):
+    primeira = config.get_config()
+    arquivo_config.write_text('database: [')
+
+    assert config.reload() is primeira
+
+
+def test_variaveis_de_ambiente(arquivo_config, monkeypatch):
+    monkeypatch.setenv('DB_HOST', 'replica')
+    monkeypatch.setenv('DB_POOL_MAX', '25')
+
+    cfg = config.reload()
+    assert cfg.origem == 'env'
+    assert cfg.conexao['host'] == 'replica'
+    assert cfg.pool['maxconn'] == 25
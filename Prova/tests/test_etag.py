@@ -0,0 +1,53 @@
+from unittest import mock
+
+import Util.etag as etag
+
+
+def test_etag_muda_com_a_projecao():
+    assert etag.etag(3) == '3'
+    assert etag.etag(3, ('id_aluno', 'nome_completo')) != etag.etag(3, ('id_aluno',))
+    assert etag.corresponde('"2", "3"', 3)
+    assert etag.corresponde('W/"3"', 3)
+    assert etag.corresponde('*', 3)
+    assert not etag.corresponde('"3"', 4)
+
+
+def _conexao(mocker, *linhas):
+    mock_conn = mock.MagicMock()
+    mock_cursor = mock.MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.side_effect = linhas
+    mocker.patch('Util.bd.create_connection', return_value=mock_conn)
+    return mock_cursor
+
+
+def test_get_envia_etag(client, mocker):
+    _conexao(mocker, (1, "João Silva", "joao@email.com", "11999999999", 7))
+
+    response = client.get('/professores/1')
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"7"'
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+
+def test_if_none_match_igual_responde_304_sem_ler_a_linha(client, mocker):
+    cursor = _conexao(mocker, (7,))
+
+    response = client.get('/professores/1', headers={'If-None-Match': '"7"'})
+
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == '"7"'
+    assert cursor.execute.call_count == 1
+    assert 'SELECT versao FROM professor' in cursor.execute.call_args.args[0]
+
+
+def test_if_none_match_desatualizado_responde_200(client, mocker):
+    _conexao(mocker, (8,), (1, "João Silva", "joao@email.com", "11999999999", 8))
+
+    response = client.get('/professores/1', headers={'If-None-Match': '"7"'})
+
+    assert response.status_code == 200
+    assert response.json['nome_completo'] == "João Silva"
+    assert response.headers['ETag'] == '"8"'
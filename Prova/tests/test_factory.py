@@ -0,0 +1,31 @@
+import pytest
+
+from factory import create_app
+
+
+def _rotas(app):
+    return {rule.rule for rule in app.url_map.iter_rules()}
+
+
+def test_carrega_somente_grupos_selecionados():
+    app = create_app(['alunos'], aquecer=False)
+
+    rotas = _rotas(app)
+    assert '/alunos/<int:id_aluno>' in rotas
+    assert '/turmas/<int:id_turma>' not in rotas
+    assert {'/health', '/ready', '/metrics'} <= rotas
+
+
+def test_grupos_por_variavel_de_ambiente(monkeypatch):
+    monkeypatch.setenv('APP_GRUPOS', 'turmas, professores')
+
+    rotas = _rotas(create_app(aquecer=False))
+
+    assert '/turmas/<int:id_turma>' in rotas
+    assert '/professores/<int:id_professor>' in rotas
+    assert '/alunos/<int:id_aluno>' not in rotas
+
+
+def test_grupo_desconhecido():
+    with pytest.raises(ValueError):
+        create_app(['financeiro'], aquecer=False)
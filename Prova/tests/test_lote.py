@@ -0,0 +1,108 @@
+from unittest import mock
+
+import psycopg2
+
+import Util.lote as lote
+
+
+def _aluno(id_aluno, data='2024-03-01'):
+    return {"id_aluno": id_aluno, "data_presenca": data, "presente": True}
+
+
+def _execute_values(ids_gerados, ordem=list):
+    """
+    Fake execute_values: falha se alguma linha tem data inválida, senão devolve
+    (índice, id) de cada linha na ordem dada por `ordem`.
+    """
+    def execute_values(cursor, sql, valores, template, page_size, fetch):
+        if any(linha[2] == 'data-invalida' for linha in valores):
+            raise psycopg2.errors.InvalidDatetimeFormat('data inválida')
+        return ordem([(linha[0], next(ids_gerados)) for linha in valores])
+    return execute_values
+
+
+def test_insere_lote_com_uma_consulta_de_referencias(mocker):
+    cursor = mock.MagicMock()
+    cursor.fetchall.return_value = [(1,), (2,)]
+    execute_values = mocker.patch('Util.lote.execute_values', side_effect=_execute_values(iter(range(10, 20))))
+
+    resultado = lote.gravar(cursor, lote.PRESENCAS, [_aluno(1), _aluno(2), _aluno(1)])
+
+    assert resultado.gravado
+    corpo, status = resultado.resposta()
+    assert status == 201
+    assert [r['id_presenca'] for r in corpo['resultados']] == [10, 11, 12]
+    execute_values.assert_called_once()
+    cursor.execute.assert_any_call("SELECT id_aluno FROM alunos WHERE id_aluno = ANY(%s)", ([1, 2],))
+
+
+def test_ids_seguem_o_indice_e_nao_a_ordem_do_returning(mocker):
+    cursor = mock.MagicMock()
+    cursor.fetchall.return_value = [(1,), (2,), (3,)]
+    execute_values = mocker.patch('Util.lote.execute_values',
+                                  side_effect=_execute_values(iter(range(10, 20)), ordem=lambda linhas: linhas[::-1]))
+
+    resultado = lote.gravar(cursor, lote.PRESENCAS, [_aluno(1), _aluno(2), _aluno(3)])
+
+    corpo, _ = resultado.resposta()
+    assert [(r['linha'], r['id_presenca']) for r in corpo['resultados']] == [(0, 10), (1, 11), (2, 12)]
+    sql = execute_values.call_args.args[1]
+    assert 'JOIN dados USING (id_aluno, data_presenca)' in sql
+    assert execute_values.call_args.kwargs['template'] == '(%s, %s::int, %s::date, %s::boolean)'
+
+
+def test_atomico_nao_grava_com_erro_de_validacao(mocker):
+    cursor = mock.MagicMock()
+    cursor.fetchall.return_value = [(1,)]
+    execute_values = mocker.patch('Util.lote.execute_values')
+
+    resultado = lote.gravar(cursor, lote.PRESENCAS, [_aluno(1), _aluno(99), {"id_aluno": 1}])
+
+    corpo, status = resultado.resposta()
+    assert status == 400
+    assert not resultado.gravado
+    assert corpo['resultados'][1]['error'] == "Aluno não encontrado"
+    assert corpo['resultados'][2]['error'].startswith("Campos obrigatórios não preenchidos")
+    execute_values.assert_not_called()
+
+
+def test_parcial_isola_linha_rejeitada_pelo_banco(mocker):
+    cursor = mock.MagicMock()
+    cursor.connection.closed = 0
+    cursor.fetchall.return_value = [(1,)]
+    mocker.patch('Util.lote.execute_values', side_effect=_execute_values(iter(range(10, 20))))
+
+    linhas = [_aluno(1), _aluno(1, 'data-invalida'), _aluno(1), _aluno(1)]
+    resultado = lote.gravar(cursor, lote.PRESENCAS, linhas, atomico=False)
+
+    corpo, status = resultado.resposta()
+    assert status == 207
+    assert corpo['inseridos'] == 3
+    assert 'error' in corpo['resultados'][1]
+    assert sorted(resultado.inseridos) == [0, 2, 3]
+    cursor.execute.assert_any_call('ROLLBACK TO SAVEPOINT lote; RELEASE SAVEPOINT lote')
+
+
+def test_bulk_endpoint_ndjson(client, mocker):
+    mock_conn = mock.MagicMock()
+    mock_cursor = mock.MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchall.return_value = [(1,)]
+    mocker.patch('Util.bd.create_connection', return_value=mock_conn)
+    mocker.patch('Util.lote.execute_values', return_value=[(0, 5)])
+
+    response = client.post(
+        '/pagamentos/bulk',
+        data='{"id_aluno": 1, "valor_pago": 100, "data_pagamento": "2024-03-01", "forma_pagamento": "pix"}\n',
+        content_type='application/x-ndjson',
+    )
+
+    assert response.status_code == 201
+    assert response.json['resultados'] == [{"linha": 0, "id_pagamento": 5}]
+    mock_conn.commit.assert_called_once()
+
+
+def test_bulk_corpo_invalido(client):
+    response = client.post('/alunos/bulk', json={"nome_completo": "Ana"})
+
+    assert response.status_code == 400
@@ -0,0 +1,92 @@
+import os
+import runpy
+import subprocess
+import sys
+from types import SimpleNamespace
+
+from prometheus_client import REGISTRY
+
+import Util.metricas as metricas
+
+APP = os.path.join(os.path.dirname(__file__), '..', 'App')
+
+
+def test_fingerprint_remove_valores():
+    a = metricas.fingerprint("SELECT * FROM alunos WHERE id_aluno = 10 AND nome = 'Ana'")
+    b = metricas.fingerprint("SELECT *\n  FROM alunos\n  WHERE id_aluno = 7 AND nome = 'Bia'")
+
+    assert a == b == "SELECT * FROM alunos WHERE id_aluno = ? AND nome = ?"
+
+
+def test_fingerprint_placeholders_e_listas():
+    assert metricas.fingerprint("EXECUTE aluno_por_id (%s)") == "EXECUTE aluno_por_id (?)"
+    assert metricas.fingerprint("SELECT 1 WHERE id IN ($1, $2, $3)") == "SELECT ? WHERE id IN (?)"
+    assert metricas.fingerprint("PREPARE x AS SELECT * FROM turma WHERE id_turma = $1") == "PREPARE x"
+
+
+def test_observe_registra_histograma_e_erros():
+    sql = "DELETE FROM presenca WHERE id_presenca = %s"
+    labels = {'fingerprint': metricas.fingerprint(sql), 'endpoint': 'teste'}
+
+    metricas.observe(sql, 0.002, 1, endpoint='teste')
+    metricas.observe(sql, 0.5, erro=True, endpoint='teste')
+
+    assert REGISTRY.get_sample_value('escola_db_query_duration_seconds_count', labels) == 2
+    assert REGISTRY.get_sample_value('escola_db_query_rows_sum', labels) == 1
+    assert REGISTRY.get_sample_value('escola_db_query_errors_total', labels) == 1
+
+
+def test_observe_com_rotulo_nao_passa_pelo_cache_de_fingerprint():
+    lote = b"INSERT INTO presenca VALUES ('2024-03-01', 1); INSERT INTO presenca VALUES ('2024-03-01', 2)"
+    labels = {'fingerprint': 'PIPELINE INSERT INTO presenca VALUES (?)', 'endpoint': 'teste'}
+    antes = metricas.fingerprint.cache_info().currsize
+
+    metricas.observe(lote, 0.01, 2, endpoint='teste', rotulo=labels['fingerprint'])
+
+    assert metricas.fingerprint.cache_info().currsize == antes
+    assert REGISTRY.get_sample_value('escola_db_query_duration_seconds_count', labels) == 1
+
+
+def test_endpoint_da_requisicao(app):
+    with app.test_request_context('/alunos/1'):
+        assert metricas.endpoint_atual() == 'alunos.read_aluno'
+    with app.test_request_context('/sem-rota'):
+        assert metricas.endpoint_atual() == 'none'
+
+
+def _worker(diretorio, codigo):
+    """Runs `codigo` in another process writing its metrics to `diretorio`; returns its pid."""
+    processo = subprocess.run(
+        [sys.executable, '-c', 'import os, Util.metricas as metricas\n' + codigo + '\nprint(os.getpid())'],
+        cwd=APP, env=dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(diretorio)),
+        capture_output=True, text=True, check=True,
+    )
+    return int(processo.stdout)
+
+
+def test_registro_sem_multiprocesso_e_o_do_processo(monkeypatch):
+    monkeypatch.delenv('PROMETHEUS_MULTIPROC_DIR', raising=False)
+
+    assert metricas.registro() is REGISTRY
+
+
+def test_metrics_soma_os_workers_e_esquece_os_que_sairam(tmp_path, monkeypatch):
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+    monkeypatch.setenv('APP_WARMUP', '1')
+    conf = runpy.run_path(os.path.join(APP, 'gunicorn.conf.py'))
+    codigo = "metricas.ADMISSAO_ATIVAS.labels('leitura').inc(2); metricas.CIRCUITO_REJEICOES.inc()"
+    primeiro = _worker(tmp_path, codigo)
+    _worker(tmp_path, codigo)
+
+    def amostra(nome, rotulos=None):
+        registro = metricas.registro()
+        assert registro is not REGISTRY
+        return registro.get_sample_value(nome, rotulos or {})
+
+    assert amostra('escola_admission_in_flight', {'classe': 'leitura'}) == 4
+    assert amostra('escola_db_circuit_rejections_total') == 2
+
+    conf['child_exit'](None, SimpleNamespace(pid=primeiro))
+
+    assert amostra('escola_admission_in_flight', {'classe': 'leitura'}) == 2
+    assert amostra('escola_db_circuit_rejections_total') == 2
@@ -6,7 +6,7 @@ from datetime import datetime
 # Teste para obter um pagamento existente
 def test_get_pagamento(client, mocker):
     # Mock de um pagamento
-    pagamento_mock = (1, 123, "2023-05-15", 150.00, "cartão", "ref123", "pago")
+    pagamento_mock = (1, 123, "2023-05-15", 150.00, "cartão", "ref123", "pago", 3)  # ..., status, versao
     
     # Configurando o mock para simular o retorno do banco de dados
     mock_conn = mock.MagicMock()
@@ -23,8 +23,10 @@ def test_get_pagamento(client, mocker):
     assert response.status_code == 200
     assert response.json['id_pagamento'] == 1
     assert response.json['id_aluno'] == 123
-    assert response.json['valor'] == 150.00
-    assert response.json['metodo_pagamento'] == "cartão"
+    assert response.json['valor_pago'] == 150.00
+    assert response.json['forma_pagamento'] == "cartão"
+    assert response.json['status'] == "pago"
+    assert response.headers['ETag'] == '"3"'
 
 # Teste para obter um pagamento que não existe
 def test_get_pagamento_nao_encontrado(client, mocker):
@@ -48,9 +50,9 @@ def test_add_pagamento(client, mocker):
     # Dados do novo pagamento
     novo_pagamento = {
         "id_aluno": 123,
-        "valor": 200.00,
+        "valor_pago": 200.00,
         "data_pagamento": "2023-06-01",
-        "metodo_pagamento": "pix"
+        "forma_pagamento": "pix"
     }
     
     # Configurando os mocks
@@ -58,8 +60,8 @@ def test_add_pagamento(client, mocker):
     mock_cursor = mock.MagicMock()
     mock_conn.cursor.return_value = mock_cursor
     
-    # Mock para verificar se o aluno existe
-    mock_cursor.fetchone.side_effect = [(123, "Nome do Aluno"), (1,)]  # Primeiro retorna o aluno, depois o ID do pagamento
+    # O INSERT ... SELECT confere o aluno e retorna o ID do pagamento
+    mock_cursor.fetchone.return_value = (1,)
     
     mocker.patch('Util.bd.create_connection', return_value=mock_conn)
     
@@ -69,16 +71,16 @@ def test_add_pagamento(client, mocker):
     # Verificando o resultado
     assert response.status_code == 201
     assert "Pagamento adicionado" in response.json['message']
-    assert 'id_pagamento' in response.json
+    assert response.json['id_pagamento'] == 1
 
 # Teste para atualizar um pagamento existente
 def test_update_pagamento(client, mocker):
     # Dados para atualização
     pagamento_atualizado = {
         "id_aluno": 123,
-        "valor": 250.00,
+        "valor_pago": 250.00,
         "data_pagamento": "2023-06-02",
-        "metodo_pagamento": "boleto",
+        "forma_pagamento": "boleto",
         "referencia": "ref456",
         "status": "pago"
     }
@@ -88,9 +90,6 @@ def test_update_pagamento(client, mocker):
     mock_cursor = mock.MagicMock()
     mock_conn.cursor.return_value = mock_cursor
     
-    # Mock para verificar se o pagamento existe
-    mock_cursor.fetchone.return_value = (1, 123, "2023-05-15", 150.00, "cartão", "ref123", "pendente")
-    
     mocker.patch('Util.bd.create_connection', return_value=mock_conn)
     
     # Fazendo a requisição PUT
@@ -107,8 +106,8 @@ def test_delete_pagamento(client, mocker):
     mock_cursor = mock.MagicMock()
     mock_conn.cursor.return_value = mock_cursor
     
-    # Mock para verificar se o pagamento existe
-    mock_cursor.fetchone.return_value = (1, 123, "2023-05-15", 150.00, "cartão", "ref123", "pago")
+    # O DELETE ... RETURNING retorna o ID do pagamento removido
+    mock_cursor.fetchone.return_value = (1,)
     
     mocker.patch('Util.bd.create_connection', return_value=mock_conn)
     
@@ -126,7 +125,7 @@ def test_delete_pagamento_nao_encontrado(client, mocker):
     mock_cursor = mock.MagicMock()
     mock_conn.cursor.return_value = mock_cursor
     
-    # Mock para simular que o pagamento não foi encontrado
+    # O DELETE ... RETURNING não retorna linha
     mock_cursor.fetchone.return_value = None
     
     mocker.patch('Util.bd.create_connection', return_value=mock_conn)
@@ -0,0 +1,174 @@
+import datetime
+from unittest import mock
+
+import pytest
+
+import Util.entidades as entidades
+import Util.paginacao as paginacao
+
+
+def test_consulta_com_cursor_e_filtros():
+    cursor = paginacao.codificar_cursor(40)
+
+    consulta = paginacao.consulta(
+        entidades.PAGAMENTOS,
+        {'cursor': cursor, 'status': 'pago', 'id_aluno': '3', 'limit': '10'},
+    )
+
+    assert consulta.sql.endswith(
+        "FROM pagamento WHERE id_aluno = %s AND status = %s AND id_pagamento > %s "
+        "ORDER BY id_pagamento LIMIT 11"
+    )
+    assert consulta.params == [3, 'pago', 40]
+    assert consulta.limite == 10
+
+
+def test_filtro_de_intervalo_ordena_pela_coluna_e_chave():
+    cursor = paginacao.codificar_cursor(40, datetime.date(2024, 1, 15))
+
+    consulta = paginacao.consulta(
+        entidades.PAGAMENTOS,
+        {'cursor': cursor, 'status': 'pago', 'data_inicio': '2024-01-01', 'limit': '10'},
+    )
+
+    assert consulta.sql.endswith(
+        "FROM pagamento WHERE status = %s AND data_pagamento >= %s "
+        "AND (data_pagamento, id_pagamento) > (%s, %s) "
+        "ORDER BY data_pagamento, id_pagamento LIMIT 11"
+    )
+    assert consulta.params == ['pago', datetime.date(2024, 1, 1), datetime.date(2024, 1, 15), 40]
+
+
+def test_filtro_de_intervalo_cursor_leva_a_data_mesmo_fora_da_projecao():
+    consulta = paginacao.consulta(
+        entidades.PRESENCAS, {'fields': 'presente', 'data_fim': '2024-03-31', 'limit': '1'},
+    )
+
+    assert consulta.sql.startswith("SELECT id_presenca, presente, data_presenca FROM presenca ")
+    corpo = paginacao.pagina(consulta, [(9, True, datetime.date(2024, 3, 2)), (4, False, datetime.date(2024, 3, 5))])
+    assert corpo['items'] == [{"id_presenca": 9, "presente": True}]
+    assert paginacao.decodificar_cursor(corpo['next_cursor'], entidades._data) == (datetime.date(2024, 3, 2), 9)
+
+
+@pytest.mark.parametrize('args', [
+    # cursor de uma listagem sem filtro de intervalo, e vice-versa
+    {'cursor': paginacao.codificar_cursor(40), 'data_inicio': '2024-01-01'},
+    {'cursor': paginacao.codificar_cursor(40, datetime.date(2024, 1, 15))},
+    {'cursor': paginacao.codificar_cursor(40, 'ontem'), 'data_inicio': '2024-01-01'},
+    {'cursor': paginacao.codificar_cursor(True)},
+])
+def test_cursor_de_outra_ordem_ou_chave_nao_inteira(args):
+    with pytest.raises(paginacao.ParametroInvalido):
+        paginacao.consulta(entidades.PAGAMENTOS, args)
+
+
+def test_marcador_numerado_para_asyncpg():
+    consulta = paginacao.consulta(entidades.ALUNOS, {'id_turma': '3'}, marcador=lambda n: f'${n}')
+
+    assert 'WHERE id_turma = $1 ' in consulta.sql
+
+
+@pytest.mark.parametrize('args', [
+    {'limit': '0'},
+    {'limit': str(paginacao.LIMITE_MAXIMO + 1)},
+    {'limit': 'dez'},
+    {'cursor': 'nao-e-um-cursor'},
+    {'data_fim': '31/01/2024'},
+])
+def test_parametros_invalidos(args):
+    with pytest.raises(paginacao.ParametroInvalido):
+        paginacao.consulta(entidades.PAGAMENTOS, args)
+
+
+def test_pagina_retorna_proximo_cursor():
+    linhas = [(i, f"Professor {i}", None, None) for i in (1, 2, 3)]
+
+    corpo = paginacao.pagina(paginacao.consulta(entidades.PROFESSORES, {'limit': '2'}), linhas)
+
+    assert [item['id_professor'] for item in corpo['items']] == [1, 2]
+    assert paginacao.decodificar_cursor(corpo['next_cursor']) == 2
+    assert paginacao.pagina(paginacao.consulta(entidades.PROFESSORES, {'limit': '3'}), linhas)['next_cursor'] is None
+
+
+def test_projecao_na_lista_de_colunas():
+    consulta = paginacao.consulta(entidades.ALUNOS, {'fields': 'nome_completo, id_turma', 'limit': '1'})
+
+    assert consulta.sql.startswith("SELECT id_aluno, nome_completo, id_turma FROM alunos ")
+    corpo = paginacao.pagina(consulta, [(3, "Ana", 1), (4, "Bia", 1)])
+    assert corpo['items'] == [{"id_aluno": 3, "nome_completo": "Ana", "id_turma": 1}]
+    assert paginacao.decodificar_cursor(corpo['next_cursor']) == 3
+
+
+def test_projecao_campo_desconhecido():
+    with pytest.raises(paginacao.ParametroInvalido):
+        entidades.ALUNOS.projecao('nome_completo,senha')
+    assert entidades.ALUNOS.projecao('') is None
+
+
+def test_listar_turmas(client, mocker):
+    mock_conn = mock.MagicMock()
+    mock_cursor = mock.MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchall.return_value = [(5, "Turma A", 1, "08:00"), (7, "Turma B", 1, "13:00")]
+    mocker.patch('Util.bd.create_connection', return_value=mock_conn)
+
+    response = client.get('/turmas?id_professor=1&limit=1')
+
+    assert response.status_code == 200
+    assert response.json['items'] == [{"id_turma": 5, "nome_turma": "Turma A", "id_professor": 1, "horario": "08:00"}]
+    assert paginacao.decodificar_cursor(response.json['next_cursor']) == 5
+    assert mock_cursor.execute.call_args.args[1] == [1]
+
+
+def test_listar_limite_invalido(client):
+    response = client.get('/alunos?limit=1000')
+
+    assert response.status_code == 400
+
+
+def test_read_com_fields(client, mocker):
+    mock_conn = mock.MagicMock()
+    mock_cursor = mock.MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = (2, "Turma B", 3)
+    mocker.patch('Util.bd.create_connection', return_value=mock_conn)
+
+    response = client.get('/turmas/2?fields=nome_turma')
+
+    assert response.status_code == 200
+    assert response.json == {"id_turma": 2, "nome_turma": "Turma B"}
+    mock_cursor.execute.assert_called_once_with("SELECT id_turma, nome_turma, versao FROM turma WHERE id_turma = %s", (2,))
+
+
+def test_read_fields_invalido(client, mocker):
+    create_connection = mocker.patch('Util.bd.create_connection')
+
+    response = client.get('/alunos/1?fields=senha')
+
+    assert response.status_code == 400
+    create_connection.assert_not_called()
+
+
+def test_listar_por_ids_em_ordem_com_faltantes(client, mocker):
+    mock_conn = mock.MagicMock()
+    mock_cursor = mock.MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchall.return_value = [(2, "Bia"), (7, "Ana")]
+    mocker.patch('Util.bd.create_connection', return_value=mock_conn)
+
+    response = client.get('/alunos?ids=7,3,2&fields=nome_completo')
+
+    assert response.status_code == 200
+    assert response.json == {
+        "items": [{"id_aluno": 7, "nome_completo": "Ana"}, None, {"id_aluno": 2, "nome_completo": "Bia"}],
+        "missing": [3],
+    }
+    mock_cursor.execute.assert_called_once_with(
+        "SELECT id_aluno, nome_completo FROM alunos WHERE id_aluno = ANY(%s)", [[2, 3, 7]]
+    )
+
+
+@pytest.mark.parametrize('valor', ['', '1,a', ','.join(['1'] * (paginacao.MAX_IDS + 1))])
+def test_ids_invalidos(valor):
+    with pytest.raises(paginacao.ParametroInvalido):
+        paginacao.consulta(entidades.PROFESSORES, {'ids': valor})
@@ -0,0 +1,32 @@
+import sys
+
+import Util.perfil as perfil
+
+SAIDA = """import time: self [us] | cumulative | imported package
+import time:       227 |        227 |   _io
+import time:       500 |       1500 |     Util.bd
+import time:      1000 |       2727 |   factory
+import time:      3000 |       5727 | main
+"""
+
+
+def test_parse_importtime():
+    modulos = perfil.parse_importtime(SAIDA)
+
+    assert [m['modulo'] for m in modulos] == ['_io', 'Util.bd', 'factory', 'main']
+    assert modulos[-1] == {'modulo': 'main', 'self_us': 3000, 'cumulative_us': 5727, 'nivel': 0}
+    assert modulos[1]['nivel'] == 2
+
+
+def test_relatorio_ordena_por_acumulado():
+    texto = perfil.relatorio(perfil.parse_importtime(SAIDA), top=2)
+
+    linhas = texto.splitlines()
+    assert linhas[0].startswith('Tempo total de importação: 5.7 ms')
+    assert linhas[-2].endswith('main')
+    assert linhas[-1].endswith('factory')
+
+
+def test_importexport_nao_carrega_pandas(app):
+    assert 'pandas' not in sys.modules
+    assert 'flasgger' not in sys.modules
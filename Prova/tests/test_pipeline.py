@@ -0,0 +1,66 @@
+from unittest import mock
+
+import psycopg2
+
+from Util.pipeline import Pipeline
+
+
+class CursorFalso:
+    """Executa lotes e falha quando algum statement contém ERRO."""
+
+    def __init__(self):
+        self.connection = mock.MagicMock(closed=0)
+        self.executados = []
+        self.aplicados = []
+
+    def mogrify(self, sql, params=None):
+        return (sql % tuple(f"'{p}'" for p in params)).encode() if params else sql.encode()
+
+    def execute(self, sql):
+        self.executados.append(sql)
+        if isinstance(sql, bytes):
+            statements = sql.split(b'; ')[1:-1]
+            if any(b'ERRO' in s for s in statements):
+                raise psycopg2.errors.CheckViolation('linha inválida')
+            self.aplicados.extend(statements)
+
+
+def test_envia_lote_em_um_round_trip():
+    cursor = CursorFalso()
+
+    with Pipeline(cursor) as lote:
+        for i in range(5):
+            lote.add("INSERT INTO professor (nome_completo) VALUES (%s)", (f"Prof {i}",), chave=i)
+
+    assert len(cursor.executados) == 1
+    assert lote.sucessos == 5
+    assert lote.erros == []
+
+
+def test_isola_statement_com_erro():
+    cursor = CursorFalso()
+
+    with Pipeline(cursor) as lote:
+        for nome in ['A', 'B', 'ERRO', 'C']:
+            lote.add("INSERT INTO professor (nome_completo) VALUES (%s)", (nome,), chave=nome)
+
+    assert lote.sucessos == 3
+    assert [chave for chave, _ in lote.erros] == ['ERRO']
+    assert isinstance(lote.erros[0][1], psycopg2.errors.CheckViolation)
+    assert len(cursor.aplicados) == 3
+    assert list(lote.resultados) == ['A', 'B', 'ERRO', 'C']
+    assert [lote.resultados[chave] for chave in 'ABC'] == [None, None, None]
+    assert lote.resultados['ERRO'] is lote.erros[0][1]
+    assert 'ROLLBACK TO SAVEPOINT pipeline; RELEASE SAVEPOINT pipeline' in cursor.executados
+
+
+def test_divide_em_lotes_pelo_tamanho():
+    cursor = CursorFalso()
+
+    with Pipeline(cursor, tamanho=2) as lote:
+        for i in range(5):
+            lote.add("INSERT INTO atividade (descricao) VALUES (%s)", (str(i),))
+
+    assert lote.round_trips == 3
+    assert lote.sucessos == 5
+    assert list(lote.resultados) == [0, 1, 2, 3, 4]
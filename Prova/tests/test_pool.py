@@ -0,0 +1,119 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS
+
+from Util.pool import ConnectionPool, PoolTimeout
+
+
+class ConexaoFalsa:
+    """Objeto com a mesma interface que o pool usa de PooledConnection."""
+
+    def __init__(self):
+        self._pool = None
+        self._emprestada = False
+        self.criada_em = time.monotonic()
+        self.ultimo_uso = self.criada_em
+        self.closed = 0
+        self.info = mock.MagicMock(transaction_status=TRANSACTION_STATUS_IDLE)
+        self.rollback = mock.MagicMock()
+
+    def cursor(self):
+        return mock.MagicMock()
+
+    def close(self):
+        self._pool.putconn(self)
+
+    def _encerrar(self):
+        self.closed = 1
+
+
+def test_reutiliza_conexao_devolvida():
+    pool = ConnectionPool(ConexaoFalsa, minconn=0, maxconn=2)
+
+    conn = pool.getconn()
+    conn.close()
+    assert pool.getconn() is conn
+    assert pool.stats()['created'] == 1
+
+
+def test_context_manager_devolve_conexao():
+    pool = ConnectionPool(ConexaoFalsa, minconn=0, maxconn=1)
+
+    with pool.connection() as conn:
+        assert pool.stats()['in_use'] == 1
+
+    stats = pool.stats()
+    assert stats['in_use'] == 0
+    assert stats['idle'] == 1
+    assert conn.closed == 0
+
+
+def test_close_repetido_nao_duplica_conexao():
+    pool = ConnectionPool(ConexaoFalsa, minconn=0, maxconn=2)
+
+    conn = pool.getconn()
+    conn.close()
+    conn.close()
+    assert pool.stats()['idle'] == 1
+
+
+def test_rollback_de_transacao_pendente_na_devolucao():
+    pool = ConnectionPool(ConexaoFalsa, minconn=0, maxconn=1)
+
+    conn = pool.getconn()
+    conn.info.transaction_status = TRANSACTION_STATUS_INTRANS
+    conn.close()
+    conn.rollback.assert_called_once()
+
+
+def test_timeout_quando_pool_esgotado():
+    pool = ConnectionPool(ConexaoFalsa, minconn=0, maxconn=1, timeout=0.05)
+
+    pool.getconn()
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+    assert pool.stats()['timeouts'] == 1
+
+
+def test_espera_conexao_liberada_por_outra_thread():
+    pool = ConnectionPool(ConexaoFalsa, minconn=0, maxconn=1, timeout=2)
+    conn = pool.getconn()
+    threading.Timer(0.05, conn.close).start()
+
+    assert pool.getconn() is conn
+    stats = pool.stats()
+    assert stats['waits'] == 1
+    assert stats['wait_time_max'] > 0
+
+
+def test_recicla_conexao_apos_max_lifetime():
+    pool = ConnectionPool(ConexaoFalsa, minconn=0, maxconn=1, max_lifetime=10)
+
+    conn = pool.getconn()
+    conn.criada_em -= 60
+    conn.close()
+
+    assert conn.closed == 1
+    assert pool.getconn() is not conn
+    assert pool.stats()['recycled'] == 1
+
+
+def test_descarta_conexao_fechada_no_checkout():
+    pool = ConnectionPool(ConexaoFalsa, minconn=0, maxconn=1)
+
+    conn = pool.getconn()
+    conn.close()
+    conn.closed = 1
+
+    assert pool.getconn() is not conn
+    assert pool.stats()['discarded'] == 1
+
+
+def test_preencher_abre_minimo():
+    pool = ConnectionPool(ConexaoFalsa, minconn=3, maxconn=5)
+
+    assert pool.preencher() == 3
+    assert pool.stats()['idle'] == 3
@@ -2,7 +2,7 @@ import pytest
 from unittest import mock
 
 def test_get_presenca(client, mocker):
-    presenca_mock = (1, 123, "2023-06-01", True)
+    presenca_mock = (1, 123, "2023-06-01", True, 3)
     
     mock_conn = mock.MagicMock()
     mock_cursor = mock.MagicMock()
@@ -89,4 +89,49 @@ def test_delete_presenca(client, mocker):
     response = client.delete('/presencas/1')
     
     assert response.status_code == 200
-    assert "Presença deletada" in response.json['message']
\ No newline at end of file
+    assert "Presença deletada" in response.json['message']
+
+def test_chamada_turma(client, mocker):
+    mock_conn = mock.MagicMock()
+    mock_cursor = mock.MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = (True, 23, 2, 25, [99])
+
+    mocker.patch('Util.bd.create_connection', return_value=mock_conn)
+
+    response = client.post('/turmas/4/presencas', json={"data_presenca": "2024-03-01", "ausentes": [7, 9, 99]})
+
+    assert response.status_code == 200
+    assert response.json == {
+        "id_turma": 4, "data_presenca": "2024-03-01",
+        "presentes": 23, "ausentes": 2, "alterados": 25, "ignorados": [99],
+    }
+    assert mock_cursor.execute.call_count == 1
+    assert mock_cursor.execute.call_args.args[1] == (4, [7, 9, 99], False, "2024-03-01")
+    mock_conn.commit.assert_called_once()
+
+def test_chamada_turma_nao_encontrada(client, mocker):
+    mock_conn = mock.MagicMock()
+    mock_cursor = mock.MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = (False, 0, 0, 0, [])
+
+    mocker.patch('Util.bd.create_connection', return_value=mock_conn)
+
+    response = client.post('/turmas/999/presencas', json={"data_presenca": "2024-03-01", "presentes": []})
+
+    assert response.status_code == 404
+    mock_conn.rollback.assert_called_once()
+
+@pytest.mark.parametrize('corpo', [
+    {"ausentes": [1]},
+    {"data_presenca": "2024-03-01"},
+    {"data_presenca": "2024-03-01", "ausentes": [1], "presentes": [2]},
+    {"data_presenca": "2024-03-01", "ausentes": "1,2"},
+    {"data_presenca": "01/03/2024", "ausentes": []},
+    {"data_presenca": 20240301, "ausentes": []},
+])
+def test_chamada_turma_corpo_invalido(client, corpo):
+    response = client.post('/turmas/4/presencas', json=corpo)
+
+    assert response.status_code == 400
@@ -2,7 +2,7 @@ import pytest
 from unittest import mock
 
 def test_get_professor(client, mocker):
-    professor_mock = (1, "João Silva", "joao@email.com", "11999999999")
+    professor_mock = (1, "João Silva", "joao@email.com", "11999999999", 3)
     
     mock_conn = mock.MagicMock()
     mock_cursor = mock.MagicMock()
@@ -0,0 +1,71 @@
+import time
+from unittest import mock
+
+from flask import Flask, Response
+
+import Util.bd as bd
+import Util.replicas as replicas
+from Util.config import DatabaseConfig
+
+CONFIG = {
+    'user': 'faat', 'password': 'faat', 'host': 'db', 'port': '5432', 'database': 'escola',
+    'replicas': 'host=replica1,host=replica2', 'replica_max_lag': 5,
+}
+
+
+def _cursor_com_lag(atraso):
+    conn = mock.MagicMock()
+    conn.cursor.return_value.fetchone.return_value = (atraso,)
+    return conn
+
+
+def test_lag_aceitavel_usa_cache(monkeypatch):
+    monkeypatch.setattr(replicas, '_lags', {})
+    conn = _cursor_com_lag(1.0)
+
+    assert replicas.lag_aceitavel('r1', conn, 5, 60)
+    assert replicas.lag_aceitavel('r1', conn, 5, 60)
+    assert conn.cursor.return_value.execute.call_count == 1
+
+
+def test_replica_atrasada_volta_para_primario(monkeypatch):
+    monkeypatch.setattr(replicas, '_lags', {})
+    cfg = DatabaseConfig(CONFIG, 'teste')
+    monkeypatch.setattr(bd.config, 'get_config', lambda: cfg)
+    replica = _cursor_com_lag(30.0)
+    pool_replica = mock.MagicMock()
+    pool_replica.getconn.return_value = replica
+    monkeypatch.setattr(bd, '_get_replica_pools', lambda c: {dsn: pool_replica for dsn in c.replicas})
+    primario = mock.MagicMock()
+    monkeypatch.setattr(bd, 'get_pool', lambda: mock.MagicMock(getconn=lambda: primario))
+
+    assert bd.create_connection(readonly=True) is primario
+    assert replica.close.call_count == 2
+
+
+def test_leitura_usa_replica_sem_atraso(monkeypatch):
+    monkeypatch.setattr(replicas, '_lags', {})
+    cfg = DatabaseConfig(CONFIG, 'teste')
+    monkeypatch.setattr(bd.config, 'get_config', lambda: cfg)
+    replica = _cursor_com_lag(0.0)
+    pool_replica = mock.MagicMock()
+    pool_replica.getconn.return_value = replica
+    monkeypatch.setattr(bd, '_get_replica_pools', lambda c: {dsn: pool_replica for dsn in c.replicas})
+
+    assert bd.create_connection(readonly=True) is replica
+
+
+def test_ler_proprias_escritas():
+    app = Flask(__name__)
+
+    with app.test_request_context('/alunos', method='POST'):
+        response = replicas.marcar_escrita(Response(status=201), 5)
+    assert replicas.COOKIE_LEITURA_PRIMARIO in response.headers['Set-Cookie']
+
+    cookie = f"{replicas.COOKIE_LEITURA_PRIMARIO}={time.time() + 5}"
+    with app.test_request_context('/alunos/1', headers={'Cookie': cookie}):
+        assert replicas.leitura_exige_primario()
+    with app.test_request_context('/alunos/1', headers={replicas.HEADER_LEITURA_PRIMARIO: 'true'}):
+        assert replicas.leitura_exige_primario()
+    with app.test_request_context('/alunos/1'):
+        assert not replicas.leitura_exige_primario()
@@ -0,0 +1,70 @@
+import datetime
+import decimal
+import json
+
+import pytest
+
+import Util.perfil as perfil
+import Util.serializacao as serializacao
+
+LINHA = {
+    "id_pagamento": 1,
+    "data_pagamento": datetime.date(2023, 5, 15),
+    "valor_pago": decimal.Decimal('150.00'),
+    "nome": "João",
+}
+
+
+def test_mesmo_formato_do_encoder_padrao_do_flask(app):
+    with app.app_context():
+        texto = app.json.dumps(LINHA)
+
+    assert json.loads(texto) == {
+        "id_pagamento": 1,
+        "data_pagamento": "Mon, 15 May 2023 00:00:00 GMT",
+        "valor_pago": "150.00",
+        "nome": "João",
+    }
+    # Ordem em que o handler montou o dicionário
+    assert list(json.loads(texto)) == list(LINHA)
+
+
+def test_formato_iso(monkeypatch):
+    monkeypatch.setattr(serializacao, 'FORMATO_DATA', 'iso')
+
+    dados = json.loads(serializacao.dumps(LINHA))
+
+    assert dados["data_pagamento"] == "2023-05-15"
+    assert dados["valor_pago"] == "150.00"
+
+
+def test_sem_orjson_escreve_os_mesmos_valores(monkeypatch):
+    com_orjson = serializacao.dumps(LINHA)
+    monkeypatch.setattr(serializacao, 'orjson', None)
+
+    assert json.loads(serializacao.dumps(LINHA)) == json.loads(com_orjson)
+
+
+def test_tipo_desconhecido():
+    with pytest.raises(TypeError):
+        serializacao.dumps({"x": object()})
+
+
+def test_jsonify_e_get_json(client, mocker):
+    mock_conn = mocker.MagicMock()
+    mock_cursor = mock_conn.cursor.return_value
+    mock_cursor.fetchone.return_value = (1, 123, datetime.date(2023, 5, 15), decimal.Decimal('150.00'),
+                                         'pix', 'ref', 'pago', 3)
+    mocker.patch('Util.bd.create_connection', return_value=mock_conn)
+
+    response = client.get('/pagamentos/1')
+
+    assert response.json['data_pagamento'] == 'Mon, 15 May 2023 00:00:00 GMT'
+    assert response.json['valor_pago'] == '150.00'
+
+
+def test_medir_json():
+    resultados = perfil.medir_json(linhas=10, repeticoes=1)
+
+    assert {(r['payload'], r['encoder']) for r in resultados} >= {('listagem', 'json'), ('exportacao', 'json')}
+    assert perfil.relatorio_json(resultados).splitlines()[1].endswith('1.0x')
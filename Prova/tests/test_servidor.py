@@ -0,0 +1,32 @@
+import Util.servidor as servidor
+
+
+def test_dimensiona_threads_pelo_pool():
+    assert servidor.dimensionar(cpus=4, pool_max=10, max_conexoes=90) == (8, 10)
+
+
+def test_workers_limitados_pelas_conexoes_do_banco():
+    assert servidor.dimensionar(cpus=16, pool_max=10, max_conexoes=90) == (9, 10)
+    assert servidor.dimensionar(cpus=2, pool_max=50, max_conexoes=30) == (1, 50)
+
+
+def test_iniciar_worker_aquece_depois_do_fork(app, mocker):
+    reload = mocker.patch('Util.config.reload')
+    configurar = mocker.patch('Util.cache.configurar')
+    iniciar = mocker.patch('Util.aquecimento.iniciar')
+
+    servidor.iniciar_worker(app)
+
+    reload.assert_called_once()
+    configurar.assert_called_once()
+    iniciar.assert_called_once_with(app)
+
+
+def test_iniciar_worker_sem_aquecimento(app, mocker):
+    mocker.patch('Util.config.reload')
+    mocker.patch('Util.cache.configurar')
+    iniciar = mocker.patch('Util.aquecimento.iniciar')
+
+    servidor.iniciar_worker(app, aquecer=False)
+
+    iniciar.assert_not_called()
@@ -0,0 +1,61 @@
+from unittest import mock
+
+import Util.statements as statements
+from Util.pool import PooledConnection
+
+
+def _cursor_pooled():
+    conn = mock.MagicMock(spec=PooledConnection)
+    conn.preparados = set()
+    cursor = mock.MagicMock()
+    cursor.connection = conn
+    return cursor
+
+
+def test_placeholders_convertidos():
+    sql, total = statements._PREPARADOS['aluno_atualizar']
+    assert total == 8
+    assert '$8' in sql and '%s' not in sql
+
+
+def test_prepara_uma_vez_por_conexao():
+    cursor = _cursor_pooled()
+
+    statements.execute(cursor, 'aluno_por_id', (1,))
+    statements.execute(cursor, 'aluno_por_id', (2,))
+
+    comandos = [c.args[0] for c in cursor.execute.call_args_list]
+    assert comandos[0].startswith('PREPARE aluno_por_id AS SELECT')
+    assert comandos[1:] == ['EXECUTE aluno_por_id (%s)', 'EXECUTE aluno_por_id (%s)']
+    assert cursor.execute.call_args_list[2].args[1] == (2,)
+
+
+def test_conexao_comum_executa_sql_original():
+    cursor = mock.MagicMock()
+
+    statements.execute(cursor, 'turma_por_id', (1,))
+
+    cursor.execute.assert_called_once_with(statements.STATEMENTS['turma_por_id'], (1,))
+
+
+def test_estatisticas_por_statement():
+    cursor = mock.MagicMock()
+    antes = statements.stats().get('professor_remover', {'calls': 0})['calls']
+
+    statements.execute(cursor, 'professor_remover', (1,))
+
+    stats = statements.stats()['professor_remover']
+    assert stats['calls'] == antes + 1
+    assert stats['total_time'] >= 0
+
+
+def test_preparar_todos_em_um_round_trip():
+    cursor = _cursor_pooled()
+    cursor.connection.preparados.add('aluno_por_id')
+
+    preparados = statements.preparar_todos(cursor)
+
+    assert preparados == len(statements.STATEMENTS) - 1
+    cursor.execute.assert_called_once()
+    assert 'PREPARE aluno_por_id ' not in cursor.execute.call_args.args[0]
+    assert cursor.connection.preparados == set(statements.STATEMENTS)
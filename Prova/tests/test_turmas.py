@@ -2,7 +2,7 @@ import pytest
 from unittest import mock
 
 def test_get_turma(client, mocker):
-    turma_mock = (1, "Turma A", 1, "08:00-12:00")
+    turma_mock = (1, "Turma A", 1, "08:00-12:00", 3)
     
     mock_conn = mock.MagicMock()
     mock_cursor = mock.MagicMock()
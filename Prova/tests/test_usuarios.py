@@ -2,7 +2,7 @@ import pytest
 from unittest import mock
 
 def test_get_usuario(client, mocker):
-    usuario_mock = (1, "admin", "senha123", "administrador", 1)
+    usuario_mock = (1, "admin", "senha123", "administrador", 1, 3)
     
     mock_conn = mock.MagicMock()
     mock_cursor = mock.MagicMock()